@@ -1,6 +1,54 @@
 import dash_bootstrap_components as dbc
 from dash import html, dcc
-import pandas as pd
+from services.startup.lazy_imports import lazy_import
+
+# NumPy-backed services, imported when a filter is first evaluated so the
+# filter constants below stay cheap to import
+filter_engine = lazy_import('services.filters.filter_engine')
+hierarchy_index = lazy_import('services.hierarchy.hierarchy_index')
+capacity_store = lazy_import('services.store.capacity_store')
+
+# Store column filtered by each overview dropdown
+FILTER_COLUMNS = {
+    'activity': 'activity',
+    'cycle': 'cycle',
+    'area': 'tm_area',
+    'region': 'tm_region',
+    'division': 'tm_division',
+    'territory': 'tm_territory',
+}
+
+# Hierarchy dropdowns in cascade order: Area -> Region -> Division -> Territory
+HIERARCHY_FILTERS = ('area', 'region', 'division', 'territory')
+
+# Values selected when the overview first loads
+DEFAULT_FILTER_VALUES = {'activity': ["Trade Planning"], 'cycle': ["Cycle 3"]}
+
+
+def default_selection():
+    """Store selection {column: values} matching the default filter values"""
+    return {FILTER_COLUMNS[f]: values for f, values in DEFAULT_FILTER_VALUES.items()}
+
+
+def filter_selection(*values):
+    """Store selection {column: values} from the six dropdown values in FILTER_COLUMNS order"""
+    return {column: list(v or []) for column, v in zip(FILTER_COLUMNS.values(), values)}
+
+
+def selected_rows(selection):
+    """Capacity store row positions matching a filter selection"""
+    return filter_engine.get_filter_engine().select(selection)
+
+
+def resolve_hierarchy_filters(area, region, division, territory):
+    """Cascade the hierarchy dropdowns through the hierarchy index
+    
+    Returns the resolved index result: child 'options' and still-valid
+    'values' per tm_* level. Rows are selected by the filter engine.
+    """
+    selected = dict(zip(HIERARCHY_FILTERS, (area, region, division, territory)))
+    return hierarchy_index.get_hierarchy_index().resolve({FILTER_COLUMNS[f]: v for f, v in selected.items()})
+
 
 def create_filter_dropdown(filter_id, label, options=None, default_values=None):
     """Create a filter dropdown with checkbox selection and count display"""
@@ -44,24 +92,21 @@ def create_filter_dropdown(filter_id, label, options=None, default_values=None):
         dcc.Store(id=f"{filter_id}-selected", data=default_values)
     ], style={'width': '100%'})
     
-
+    return dropdown
 
 
 def create_filters_section():
     """Create the complete filters section with all dropdowns"""
     
-    # Sample data for filters with more options
-    activities = ["Trade Planning", "Trade Execution", "Trade Analysis", "Risk Management", 
-                  "Portfolio Optimization", "Market Research", "Client Management", "Compliance"]
-    cycles = ["Cycle 1", "Cycle 2", "Cycle 3", "Cycle 4", "Cycle 5", "Q1 2024", "Q2 2024", "Q3 2024"]
-    areas = ["North America", "South America", "Europe", "Asia Pacific", "Middle East", 
-             "Africa", "Central America", "Eastern Europe"]
-    regions = ["US West", "US East", "US Central", "Canada", "Mexico", "UK", "Germany", 
-               "France", "Japan", "China", "Australia", "Brazil"]
-    divisions = ["Technology", "Healthcare", "Finance", "Energy", "Consumer Goods", 
-                 "Industrial", "Real Estate", "Telecommunications"]
-    territories = ["California", "New York", "Texas", "Florida", "Illinois", "Pennsylvania",
-                   "Ohio", "Georgia", "North Carolina", "Michigan", "New Jersey", "Virginia"]
+    # Options come from the capacity store; hierarchy levels from its hierarchy index
+    store = capacity_store.get_capacity_store()
+    activities = store.categorical['activity'].categories
+    cycles = store.categorical['cycle'].categories
+    hierarchy = hierarchy_index.get_hierarchy_index().resolve({})['options']
+    areas = hierarchy['tm_area']
+    regions = hierarchy['tm_region']
+    divisions = hierarchy['tm_division']
+    territories = hierarchy['tm_territory']
     
     return html.Div([
         html.Div([
@@ -74,8 +119,8 @@ def create_filters_section():
         
         # Filters row
         dbc.Row([
-            dbc.Col(create_filter_dropdown("activity", "Activity", activities, ["Trade Planning"]), width=2),
-            dbc.Col(create_filter_dropdown("cycle", "Cycle", cycles, ["Cycle 3"]), width=2),
+            dbc.Col(create_filter_dropdown("activity", "Activity", activities, DEFAULT_FILTER_VALUES['activity']), width=2),
+            dbc.Col(create_filter_dropdown("cycle", "Cycle", cycles, DEFAULT_FILTER_VALUES['cycle']), width=2),
             dbc.Col(create_filter_dropdown("area", "Area", areas, []), width=2),
             dbc.Col(create_filter_dropdown("region", "Region", regions, []), width=2),
             dbc.Col(create_filter_dropdown("division", "Division", divisions, []), width=2),
@@ -0,0 +1,74 @@
+import plotly.graph_objects as go
+from dash import dcc, html, Patch
+from components.filters.filters import selected_rows
+from services.figures.figure_cache import get_figure_cache, view_key
+from services.filters.filter_engine import selection_key
+from services.store.capacity_store import get_capacity_store
+
+# Number of territories shown in the bar chart
+TOP_TERRITORIES = 10
+
+
+def _create_capacity_bar_skeleton():
+    """Create the data-free part of the bar chart: layout and capacity limit line"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(marker_color=[], textposition='auto'))
+
+    fig.update_layout(
+        title='Capacity by Territory',
+        xaxis_title='Territory',
+        yaxis_title='Capacity %',
+        showlegend=False,
+        plot_bgcolor='white',
+        height=400
+    )
+
+    fig.add_hline(y=100, line_dash="dash", line_color="red",
+                  annotation_text="Capacity Limit", annotation_position="right")
+    return fig
+
+
+def capacity_bar_data(selection):
+    """Bar trace arrays for the highest-capacity territories of a filter selection"""
+    labels, percents = get_capacity_store().capacity_by('tm_territory', selected_rows(selection))
+    top = sorted(zip(percents, labels), reverse=True)[:TOP_TERRITORIES]
+    capacities = [percent for percent, _ in top]
+    return {
+        'x': [label.replace('TM - ', '', 1) for _, label in top],
+        'y': capacities,
+        'marker': {'color': ['#ff5722' if c > 100 else '#ff9800' if c >= 90 else '#4caf50' for c in capacities]},
+        'text': [f'{c}%' for c in capacities]
+    }
+
+
+def capacity_bar_view(selection):
+    """Key of the data a bar chart shows"""
+    return view_key(selection_key(selection), get_capacity_store().version)
+
+
+def create_capacity_bar_figure(selection):
+    """Create the capacity bar chart figure, from the figure cache"""
+    return get_figure_cache().figure(
+        'capacity-bar', _create_capacity_bar_skeleton, capacity_bar_view(selection),
+        lambda: capacity_bar_data(selection)
+    )
+
+
+def create_capacity_bar_patch(selection):
+    """Partial update of a displayed bar chart that replaces only x, y, text and marker.color"""
+    data = capacity_bar_data(selection)
+    patch = Patch()
+    patch['data'][0]['x'] = data['x']
+    patch['data'][0]['y'] = data['y']
+    patch['data'][0]['text'] = data['text']
+    patch['data'][0]['marker']['color'] = data['marker']['color']
+    return patch
+
+
+def create_capacity_graph():
+    """Create the (initially empty) bar chart shown by the 'By Graph' view"""
+    return html.Div([
+        dcc.Graph(id='capacity-graph', figure={}, config={'displayModeBar': False}),
+        # Key of the data the chart shows; None until the first full figure is sent
+        dcc.Store(id='capacity-graph-view', data=None)
+    ])
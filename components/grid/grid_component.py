@@ -1,135 +1,63 @@
 import dash_ag_grid as dag
-import pandas as pd
+import dash_bootstrap_components as dbc
 from dash import html, dcc
+from components.grid.grid_export import available_formats
+from components.grid.grid_query import DEFAULT_BLOCK_SIZE
+from services.store.capacity_store import get_capacity_store
 
-def create_capacity_grid():
-    """Create the AG Grid showing capacity data with row details"""
+# Milliseconds between checks for changed rows while live refresh is on
+LIVE_REFRESH_INTERVAL = 5000
+
+# Export menu labels per format
+EXPORT_LABELS = {'csv': 'CSV', 'parquet': 'Parquet', 'xlsx': 'Excel'}
+
+
+def create_capacity_grid(row_model_type='infinite', rows=None):
+    """Create the AG Grid showing capacity data with row details
     
-    # Sample data
-    data = [
-        {
-            'id': 1,
-            'tm_area': 'AW - WESTERN AREA',
-            'tm_region': 'SDR - LOS ANGELES REGION',
-            'tm_division': 'DM - San Francisco CA',
-            'tm_territory': 'TM - San Francisco CA',
-            'capacity_percent': 110,
-            'pacing_percent': 42,
-            'region_color': '#ff9800'
-        },
-        {
-            'id': 2,
-            'tm_area': 'AW - WESTERN AREA',
-            'tm_region': 'SDR - LOS ANGELES REGION',
-            'tm_division': 'DM - Santa Rosa CA',
-            'tm_territory': 'TM - Eureka CA',
-            'capacity_percent': 98,
-            'pacing_percent': 42,
-            'region_color': '#ffeb3b'
-        },
-        {
-            'id': 3,
-            'tm_area': 'AW - WESTERN AREA',
-            'tm_region': 'SDR - LOS ANGELES REGION',
-            'tm_division': 'DM - San Francisco CA',
-            'tm_territory': 'TM - Livermore CA',
-            'capacity_percent': 120,
-            'pacing_percent': 82,
-            'region_color': '#ff5722'
-        },
-        {
-            'id': 4,
-            'tm_area': 'AW - WESTERN AREA',
-            'tm_region': 'SDR - LOS ANGELES REGION',
-            'tm_division': 'DM - Los Angeles CA',
-            'tm_territory': 'TM - Hollywood CA',
-            'capacity_percent': 87,
-            'pacing_percent': 42,
-            'region_color': '#4caf50'
-        },
-        {
-            'id': 5,
-            'tm_area': 'AW - WESTERN AREA',
-            'tm_region': 'SDR - LOS ANGELES REGION',
-            'tm_division': 'DM - Santa Rosa CA',
-            'tm_territory': 'TM - La Mesa CA',
-            'capacity_percent': 87,
-            'pacing_percent': 42,
-            'region_color': '#4caf50'
-        },
-        {
-            'id': 6,
-            'tm_area': 'AW - WESTERN AREA',
-            'tm_region': 'SDR - LOS ANGELES REGION',
-            'tm_division': 'DM - San Diego CA',
-            'tm_territory': 'TM - El Cajon CA',
-            'capacity_percent': 110,
-            'pacing_percent': 42,
-            'region_color': '#ff9800'
-        },
-        {
-            'id': 7,
-            'tm_area': 'AW - WESTERN AREA',
-            'tm_region': 'SDR - HOUSTON REGION',
-            'tm_division': 'DM - Bakersfield CA',
-            'tm_territory': 'TM - Escondido CA',
-            'capacity_percent': 110,
-            'pacing_percent': 42,
-            'region_color': '#ff9800'
-        },
-        {
-            'id': 8,
-            'tm_area': 'AW - WESTERN AREA',
-            'tm_region': 'SDR - HOUSTON REGION',
-            'tm_division': 'DM - Houston North TX',
-            'tm_territory': 'TM - Lancaster CA',
-            'capacity_percent': 87,
-            'pacing_percent': 42,
-            'region_color': '#4caf50'
-        },
-        {
-            'id': 9,
-            'tm_area': 'AW - WESTERN AREA',
-            'tm_region': 'SDR - HOUSTON REGION',
-            'tm_division': 'DM - Sacramento CA',
-            'tm_territory': 'TM - Houston TX',
-            'capacity_percent': 87,
-            'pacing_percent': 42,
-            'region_color': '#4caf50'
-        }
-    ]
+    With the default 'infinite' row model the grid requests blocks of rows
+    from the server (see load_grid_rows in main.py) and its filterModel and
+    sortModel are applied server-side. 'clientSide' ships the given store
+    row positions (all rows by default) as rowData.
+    """
+    infinite = row_model_type == 'infinite'
     
-    # Column definitions
+    # Column definitions; hierarchy columns arrive as dictionary codes (static/dashAgGridFunctions.js)
     column_defs = [
         {
             'field': 'id',
             'headerName': '',
             'width': 40,
             'checkboxSelection': True,
-            'headerCheckboxSelection': True,
-            'headerCheckboxSelectionFilteredOnly': True,
+            # Select-all needs every row loaded, so only offer it client-side
+            'headerCheckboxSelection': not infinite,
+            'headerCheckboxSelectionFilteredOnly': not infinite,
             'cellStyle': {'textAlign': 'center'}
         },
         {
             'field': 'tm_area',
+            'valueGetter': {'function': "decodeCategory(params, 'tm_area')"},
             'headerName': 'TM Area',
             'minWidth': 180,
             'cellStyle': {'fontSize': '0.8rem'}
         },
         {
             'field': 'tm_region',
+            'valueGetter': {'function': "decodeCategory(params, 'tm_region')"},
             'headerName': 'TM Region',
             'minWidth': 200,
             'cellStyle': {'fontSize': '0.8rem'}
         },
         {
             'field': 'tm_division',
+            'valueGetter': {'function': "decodeCategory(params, 'tm_division')"},
             'headerName': 'TM Division',
             'minWidth': 180,
             'cellStyle': {'fontSize': '0.8rem'}
         },
         {
             'field': 'tm_territory',
+            'valueGetter': {'function': "decodeCategory(params, 'tm_territory')"},
             'headerName': 'TM Territory',
             'minWidth': 180,
             'cellStyle': {'fontSize': '0.8rem'}
@@ -138,6 +66,7 @@ def create_capacity_grid():
             'field': 'capacity_percent',
             'headerName': 'Capacity %',
             'width': 100,
+            'filter': 'agNumberColumnFilter',
             'cellStyle': {
                 'styleConditions': [
                     {
@@ -160,6 +89,7 @@ def create_capacity_grid():
             'field': 'pacing_percent',
             'headerName': 'Pacing %',
             'width': 100,
+            'filter': 'agNumberColumnFilter',
             'valueFormatter': {'function': 'params.value + "%"'},
             'cellStyle': {'fontSize': '0.8rem'}
         }
@@ -178,6 +108,17 @@ def create_capacity_grid():
         'headerHeight': 40
     }
     
+    if infinite:
+        # Only the visible block of rows goes over the wire
+        grid_options.update({
+            'cacheBlockSize': DEFAULT_BLOCK_SIZE,
+            'maxBlocksInCache': 10,
+            'infiniteInitialRowCount': DEFAULT_BLOCK_SIZE
+        })
+        row_data_props = {'rowModelType': 'infinite', 'getRowId': 'params.data.id'}
+    else:
+        row_data_props = {'rowData': get_capacity_store().records(rows)}
+    
     # Create the grid component
     grid_component = html.Div([
         # Grid header
@@ -197,14 +138,24 @@ def create_capacity_grid():
                     clearable=False,
                     style={'width': '80px', 'display': 'inline-block', 'marginLeft': '0.5rem'}
                 ),
-                html.Span(" 1 - 10 records", style={'fontSize': '0.75rem', 'color': '#666', 'marginLeft': '1rem'})
+                html.Span(" 1 - 10 records", style={'fontSize': '0.75rem', 'color': '#666', 'marginLeft': '1rem'}),
+                dbc.Switch(id='capacity-grid-live', label="Live", value=True,
+                           className="mb-0", style={'fontSize': '0.75rem', 'marginLeft': '1rem'}),
+                # Server-side export of the grid's current view (see grid_export.py), in the formats installed
+                dbc.DropdownMenu(
+                    [dbc.DropdownMenuItem(EXPORT_LABELS[export_format], n_clicks=0,
+                                          id={'type': 'capacity-grid-export', 'format': export_format})
+                     for export_format in available_formats()],
+                    label=html.Span([html.I(className="fas fa-download me-1"), "Export"]),
+                    size='sm', color='secondary', className="ms-3",
+                    toggle_style={'fontSize': '0.75rem'}
+                )
             ], className="d-flex align-items-center justify-content-between mb-2")
         ]),
         
         # The AG Grid
         dag.AgGrid(
             id='capacity-grid',
-            rowData=data,
             columnDefs=column_defs,
             defaultColDef={
                 'sortable': True,
@@ -216,11 +167,137 @@ def create_capacity_grid():
             className='ag-theme-alpine',
             style={'height': '500px', 'width': '100%'},
             persistence=True,
-            persisted_props=['filterModel', 'sortModel']
+            persisted_props=['filterModel', 'sortModel'],
+            **row_data_props
         ),
         
+        # Target of the clientside callback that refreshes the grid when filters change
+        dcc.Store(id='capacity-grid-refresh'),
+        
+        # Encoded row block from the server, handed to the grid by a clientside callback
+        dcc.Store(id='capacity-grid-block', data=None),
+        
+        # Live refresh: the data version this client's rows are at (see grid_query.data_version) and the
+        # row changes since
+        dcc.Store(id='capacity-grid-version', data=None),
+        dcc.Store(id='capacity-grid-delta', data=None),
+        dcc.Interval(id='capacity-grid-poll', interval=LIVE_REFRESH_INTERVAL, n_intervals=0),
+        
+        # Id of the selected row, the only part of the selection sent to the row details callback
+        dcc.Store(id='capacity-grid-selected', data=None),
+        
         # Row details section
         html.Div(id='row-details-container', className='mt-3')
     ])
     
-    return grid_component
\ No newline at end of file
+    return grid_component
+
+# Row details labels of the rollup cube levels
+HIERARCHY_LABELS = {'tm_area': 'Area', 'tm_region': 'Region', 'tm_division': 'Division', 'tm_territory': 'Territory'}
+
+
+def create_hierarchy_totals(path, cycle, activity):
+    """Capacity totals of a territory and its ancestors (a RollupCube path) in its cycle and activity"""
+    return html.Div([
+        html.H6(f"Hierarchy Totals - {cycle}, {activity}", className="mb-2", style={'fontSize': '0.85rem'}),
+        dbc.Table([
+            html.Thead(html.Tr([html.Th("Level"), html.Th("Name"), html.Th("Used"),
+                                html.Th("Target"), html.Th("Capacity %")])),
+            html.Tbody([
+                html.Tr([html.Td(HIERARCHY_LABELS[level]), html.Td(name), html.Td(f"{cell.used:,}"),
+                         html.Td(f"{cell.target:,}"),
+                         html.Td(f"{cell.percent}%", className="text-danger" if cell.percent > 100 else None)])
+                for level, (name, cell) in path.items()
+            ])
+        ], bordered=False, hover=True, size='sm', className="mb-0", style={'fontSize': '0.8rem'})
+    ])
+
+
+def _create_history_figure(x, traces, title):
+    """Small line chart of detail history series: traces are (name, values) pairs"""
+    return {
+        'data': [{'type': 'scatter', 'mode': 'lines+markers', 'name': name, 'x': x, 'y': values,
+                  'connectgaps': False} for name, values in traces],
+        'layout': {
+            'title': {'text': title, 'font': {'size': 12}},
+            'height': 200,
+            'margin': {'l': 40, 'r': 10, 't': 30, 'b': 30},
+            'plot_bgcolor': 'white',
+            'yaxis': {'ticksuffix': '%'},
+            'legend': {'orientation': 'h', 'y': -0.25, 'font': {'size': 10}},
+            'shapes': [{'type': 'line', 'xref': 'paper', 'x0': 0, 'x1': 1, 'y0': 100, 'y1': 100,
+                        'line': {'color': 'red', 'dash': 'dash', 'width': 1}}]
+        }
+    }
+
+
+def create_row_details(detail, row, path):
+    """Details card of a grid row: its territory's summary (a TerritoryDetail), history and hierarchy totals"""
+    capacity_percent = row.get('capacity_percent', 0)
+    pacing_percent = row.get('pacing_percent', 0)
+    hierarchy = detail.hierarchy
+    return dbc.Card([
+        dbc.CardHeader([
+            html.H6("Territory Details", className="mb-0"),
+            html.Small(hierarchy['tm_territory'], className="text-muted")
+        ]),
+        dbc.CardBody([
+            dbc.Row([
+                dbc.Col([
+                    html.P([html.Strong("Area: "), hierarchy['tm_area']], className="mb-2"),
+                    html.P([html.Strong("Region: "), hierarchy['tm_region']], className="mb-2")
+                ], md=6),
+                dbc.Col([
+                    html.P([html.Strong("Division: "), hierarchy['tm_division']], className="mb-2"),
+                    html.P([html.Strong("Territory: "), hierarchy['tm_territory']], className="mb-2")
+                ], md=6)
+            ]),
+            html.Hr(),
+            dbc.Row([
+                dbc.Col([
+                    html.Div([
+                        html.H3(f"{capacity_percent}%", className="mb-1"),
+                        html.P("Current Capacity", className="text-muted mb-0")
+                    ], className="text-center")
+                ], md=3),
+                dbc.Col([
+                    html.Div([
+                        html.H3(f"{pacing_percent}%", className="mb-1"),
+                        html.P("YTD Pacing", className="text-muted mb-0")
+                    ], className="text-center")
+                ], md=3),
+                dbc.Col([
+                    html.Div([
+                        html.H3("Over Capacity" if capacity_percent > 100 else "Within Limits",
+                               className="mb-1 text-danger" if capacity_percent > 100 else "mb-1 text-success",
+                               style={'fontSize': '1.2rem'}),
+                        html.P("Status", className="text-muted mb-0")
+                    ], className="text-center")
+                ], md=3),
+                dbc.Col([
+                    html.Div([
+                        html.H3("On Track" if pacing_percent > 50 else "Needs Attention",
+                               className="mb-1 text-success" if pacing_percent > 50 else "mb-1 text-warning",
+                               style={'fontSize': '1.2rem'}),
+                        html.P("Trend", className="text-muted mb-0")
+                    ], className="text-center")
+                ], md=3)
+            ]),
+            html.Hr(),
+            dbc.Row([
+                dbc.Col([
+                    dcc.Graph(figure=_create_history_figure(
+                        detail.cycles,
+                        [(row['activity'], detail.capacity[row['activity']]), ("All activities", detail.capacity[None])],
+                        "Capacity Trend"), config={'displayModeBar': False})
+                ], md=6),
+                dbc.Col([
+                    dcc.Graph(figure=_create_history_figure(
+                        detail.weeks, [(row['cycle'], detail.pacing[row['id']])],
+                        "Pacing by Week"), config={'displayModeBar': False})
+                ], md=6)
+            ]),
+            html.Hr(),
+            create_hierarchy_totals(path, row['cycle'], row['activity'])
+        ])
+    ], className="shadow-sm")
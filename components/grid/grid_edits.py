@@ -0,0 +1,72 @@
+import numpy as np
+
+from services.store.capacity_store import NUMERIC_COLUMNS, sync_changes
+from services.store.change_log import get_change_log
+
+# Columns the control table can edit, and the smallest value each accepts
+EDITABLE_COLUMNS = {'capacity_target': 1}
+
+# Columns sent to the control table; edited rows are sent back with these
+CONTROL_COLUMNS = ('id', 'tm_area', 'tm_region', 'tm_division', 'tm_territory',
+                   'capacity_target', 'capacity_used', 'capacity_percent')
+
+# Largest batch of cell edits accepted in one request
+MAX_BATCH_EDITS = 5000
+
+
+def _valid_value(value, minimum, maximum):
+    """Whole number in [minimum, maximum] from a cell value, or None"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not np.isfinite(number) or number != round(number) or not minimum <= number <= maximum:
+        return None
+    return int(number)
+
+
+def validate_edits(store, edits):
+    """Split a batch of {'id', 'field', 'value'} cell edits into valid updates and rejected row ids
+
+    Returns ({field: {row id: value}}, rejected ids). Later edits of the
+    same cell win. Edits of unknown rows are dropped; an edit of a column
+    that cannot be edited or with a value out of range is rejected.
+    """
+    updates, rejected = {}, set()
+    for edit in edits[:MAX_BATCH_EDITS]:
+        row_id, field = edit.get('id'), edit.get('field')
+        if not isinstance(row_id, int) or row_id not in store.positions:
+            continue
+        minimum = EDITABLE_COLUMNS.get(field)
+        value = None
+        if minimum is not None:
+            value = _valid_value(edit.get('value'), minimum, np.iinfo(NUMERIC_COLUMNS[field]).max)
+        if value is None:
+            rejected.add(row_id)
+        else:
+            updates.setdefault(field, {})[row_id] = value
+            rejected.discard(row_id)
+    return updates, rejected
+
+
+def apply_edit_batch(store, edits, source):
+    """Apply a batch of cell edits as one change log transaction
+
+    Returns (row transaction, applied count, rejected count): the
+    ``{'update': [...]}`` rows the grid needs to show the stored values of
+    every edited row, including the derived capacity % and the current
+    values of rows whose edits were rejected.
+    """
+    updates, rejected = validate_edits(store, edits)
+    if updates:
+        get_change_log().append_many(store.fingerprint, source, [
+            (np.fromiter(values, dtype=np.int64, count=len(values)),
+             {field: np.fromiter(values.values(), dtype=NUMERIC_COLUMNS[field], count=len(values))})
+            for field, values in updates.items()
+        ])
+        # Other workers pick the batch up on their next sync
+        sync_changes(store, force=True)
+    applied = sum(len(values) for values in updates.values())
+    edited = rejected.union(*updates.values())
+    rows = store.rows_for(sorted(edited))
+    return {'update': store.records(rows, CONTROL_COLUMNS)}, applied, len(rejected)
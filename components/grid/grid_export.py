@@ -0,0 +1,213 @@
+import csv
+import importlib.util
+import io
+import json
+import numbers
+import tempfile
+
+import numpy as np
+
+from components.filters.filters import FILTER_COLUMNS
+from components.grid.grid_query import apply_filter_model, apply_sort_model
+
+# Rows decoded and written at a time; bounds an export's memory whatever its size
+EXPORT_CHUNK_ROWS = 10000
+
+# Exported columns and their headers
+EXPORT_COLUMNS = {
+    'id': 'ID',
+    'cycle': 'Cycle',
+    'activity': 'Activity',
+    'tm_area': 'Area',
+    'tm_region': 'Region',
+    'tm_division': 'Division',
+    'tm_territory': 'Territory',
+    'capacity_target': 'Capacity Target',
+    'capacity_used': 'Capacity Used',
+    'capacity_percent': 'Capacity %',
+    'pacing_percent': 'Pacing %',
+}
+
+# Mimetype and file extension per export format
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+}
+
+# Optional package each format needs; pyarrow is not a declared dependency
+EXPORT_REQUIRES = {'parquet': 'pyarrow', 'xlsx': 'openpyxl'}
+
+# Data rows an Excel sheet holds below its header
+XLSX_MAX_ROWS = 1048575
+
+# Bytes of a finished Excel file sent per piece
+XLSX_PIECE_BYTES = 1024 * 1024
+
+
+def available_formats():
+    """Export formats whose required package is installed, in EXPORT_FORMATS order"""
+    return [export_format for export_format in EXPORT_FORMATS
+            if export_format not in EXPORT_REQUIRES or importlib.util.find_spec(EXPORT_REQUIRES[export_format])]
+
+
+def export_rows(store, rows, filter_model=None, sort_model=None):
+    """Row positions of the grid's current view: the overview selection with its filterModel and sortModel"""
+    rows = apply_filter_model(store, rows, filter_model)
+    return apply_sort_model(store, rows, sort_model)
+
+
+def _is_number(value):
+    return value is None or (isinstance(value, numbers.Real) and not isinstance(value, bool))
+
+
+def _check_condition(store, name, condition):
+    if not isinstance(condition, dict) or not isinstance(condition.get('type', ''), str):
+        raise ValueError(f'Malformed filter for {name}')
+    if name != 'id' and name in store.categorical:
+        return
+    if not (_is_number(condition.get('filter')) and _is_number(condition.get('filterTo'))):
+        raise ValueError(f'{name} filters take numbers')
+
+
+def export_view(store, text):
+    """(filter dropdown values, filterModel, sortModel) of a posted view; ValueError when malformed
+
+    The view is {'filters': [values per FILTER_COLUMNS dropdown], 'filterModel': {...}, 'sortModel': [...]}.
+    """
+    view = json.loads(text or '{}')
+    if not isinstance(view, dict):
+        raise ValueError('Malformed view')
+    filters = view.get('filters', [None] * len(FILTER_COLUMNS))
+    if (not isinstance(filters, list) or len(filters) != len(FILTER_COLUMNS)
+            or not all(v is None or (isinstance(v, list) and all(isinstance(x, str) for x in v)) for v in filters)):
+        raise ValueError(f'Malformed view filters; expected {len(FILTER_COLUMNS)} lists of values')
+
+    filter_model = view.get('filterModel') if view.get('filterModel') is not None else {}
+    if not isinstance(filter_model, dict):
+        raise ValueError('Malformed filterModel')
+    for name, column_filter in filter_model.items():
+        if not isinstance(column_filter, dict) or not isinstance(column_filter.get('operator', ''), str):
+            raise ValueError(f'Malformed filter for {name}')
+        conditions = column_filter.get('conditions')
+        if conditions is None and 'condition1' in column_filter:
+            conditions = [column_filter['condition1'], column_filter.get('condition2')]
+        if conditions is None:
+            conditions = [column_filter]
+        if not isinstance(conditions, list):
+            raise ValueError(f'Malformed filter for {name}')
+        for condition in conditions:
+            if condition:
+                _check_condition(store, name, condition)
+
+    sort_model = view.get('sortModel') if view.get('sortModel') is not None else []
+    if not isinstance(sort_model, list) or not all(isinstance(sort, dict) and isinstance(sort.get('colId'), str)
+                                                   for sort in sort_model):
+        raise ValueError('Malformed sortModel')
+    return filters, filter_model, sort_model
+
+
+def _column_chunks(store, rows):
+    """{column: values} per EXPORT_CHUNK_ROWS rows, categorical columns decoded (one empty chunk for no rows)"""
+    categories = {name: np.asarray(store.categorical[name].categories, dtype=object)
+                  for name in EXPORT_COLUMNS if name in store.categorical}
+    for start in range(0, max(len(rows), 1), EXPORT_CHUNK_ROWS):
+        chunk = rows[start:start + EXPORT_CHUNK_ROWS]
+        yield {name: categories[name][store.categorical[name].codes[chunk]] if name in categories
+               else store.column(name)[chunk] for name in EXPORT_COLUMNS}
+
+
+def _csv_stream(store, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS.values())
+    for columns in _column_chunks(store, rows):
+        writer.writerows(zip(*(values.tolist() for values in columns.values())))
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class _PieceSink(io.RawIOBase):
+    """Write-only file object collecting bytes until they are taken"""
+
+    def __init__(self):
+        self.pieces = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.pieces.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data = b''.join(self.pieces)
+        self.pieces = []
+        return data
+
+
+def _parquet_stream(store, rows, pa, pq):
+    sink = _PieceSink()
+    writer = None
+    for columns in _column_chunks(store, rows):
+        table = pa.table({EXPORT_COLUMNS[name]: values for name, values in columns.items()})
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        # One row group per chunk, sent as soon as it is written
+        writer.write_table(table)
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def _xlsx_stream(store, rows, Workbook):
+    # A workbook can only be zipped up once complete: rows are streamed to a
+    # temporary file by openpyxl's write-only mode, then the file is sent in pieces
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Capacity')
+    sheet.append(list(EXPORT_COLUMNS.values()))
+    for columns in _column_chunks(store, rows):
+        for row in zip(*(values.tolist() for values in columns.values())):
+            sheet.append(row)
+    with tempfile.TemporaryFile() as f:
+        workbook.save(f)
+        f.seek(0)
+        while True:
+            piece = f.read(XLSX_PIECE_BYTES)
+            if not piece:
+                break
+            yield piece
+
+
+def export_grid(store, rows, export_format):
+    """Stream row positions as a file; returns (generator of byte pieces, mimetype, extension)
+
+    Raises ValueError for an unknown format, a missing optional dependency
+    (pyarrow for Parquet, openpyxl for Excel) or more rows than Excel holds,
+    before anything is written.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Export as {", ".join(EXPORT_FORMATS)}')
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    if export_format == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError('Parquet exports need pyarrow installed; export as CSV instead')
+        return _parquet_stream(store, rows, pa, pq), mimetype, extension
+    if export_format == 'xlsx':
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise ValueError('Excel exports need openpyxl installed; export as CSV instead')
+        if len(rows) > XLSX_MAX_ROWS:
+            raise ValueError(f'Excel sheets hold up to {XLSX_MAX_ROWS:,} rows; export as CSV or Parquet instead')
+        return _xlsx_stream(store, rows, Workbook), mimetype, extension
+    return _csv_stream(store, rows), mimetype, extension
@@ -0,0 +1,203 @@
+import numpy as np
+
+from services.store.capacity_store import GRID_COLUMNS, logged_changes
+
+# Default number of rows per block requested by the infinite row model
+DEFAULT_BLOCK_SIZE = 50
+
+# Changed rows sent to a live-refreshed grid; above this it reloads its blocks instead
+MAX_DELTA_ROWS = 1000
+
+# Columns a logged update changes besides its own: the store derives capacity %, and the activity
+# store recomputes row pacing against a new target
+DERIVED_COLUMNS = {
+    'capacity_used': ('capacity_percent',),
+    'capacity_target': ('capacity_percent', 'pacing_percent'),
+}
+
+# AG Grid text filter operators, evaluated once per dictionary entry of a categorical column
+TEXT_FILTERS = {
+    'equals': lambda s, v: s == v,
+    'notEqual': lambda s, v: s != v,
+    'contains': lambda s, v: v in s,
+    'notContains': lambda s, v: v not in s,
+    'startsWith': lambda s, v: s.startswith(v),
+    'endsWith': lambda s, v: s.endswith(v),
+}
+
+# AG Grid number filter operators, evaluated on whole numeric arrays
+NUMBER_FILTERS = {
+    'equals': lambda a, v: a == v,
+    'notEqual': lambda a, v: a != v,
+    'lessThan': lambda a, v: a < v,
+    'lessThanOrEqual': lambda a, v: a <= v,
+    'greaterThan': lambda a, v: a > v,
+    'greaterThanOrEqual': lambda a, v: a >= v,
+}
+
+
+def _text_condition_mask(column, codes, condition):
+    """Build a boolean mask for a text condition on a categorical column"""
+    operator = condition.get('type', 'contains')
+    if operator == 'blank':
+        lut = np.array([c == '' for c in column.categories], dtype=bool)
+        return lut[codes]
+    if operator == 'notBlank':
+        lut = np.array([c != '' for c in column.categories], dtype=bool)
+        return lut[codes]
+
+    value = str(condition.get('filter') or '').lower()
+    predicate = TEXT_FILTERS.get(operator)
+    if not value or predicate is None:
+        # Empty or unknown conditions are ignored rather than failing the whole block
+        return np.ones(len(codes), dtype=bool)
+
+    # Evaluate the predicate per dictionary entry, then map it onto the rows
+    lut = np.array([predicate(c.lower(), value) for c in column.categories], dtype=bool)
+    return lut[codes]
+
+
+def _number_condition_mask(values, condition):
+    """Build a boolean mask for a number condition on a numeric column"""
+    operator = condition.get('type', 'equals')
+    if operator in ('blank', 'notBlank'):
+        # Numeric columns have no missing values
+        return np.full(len(values), operator == 'notBlank')
+
+    value = condition.get('filter')
+    if value is None:
+        return np.ones(len(values), dtype=bool)
+    if operator == 'inRange':
+        return (values >= value) & (values <= condition.get('filterTo', value))
+    predicate = NUMBER_FILTERS.get(operator)
+    if predicate is None:
+        return np.ones(len(values), dtype=bool)
+    return predicate(values, value)
+
+
+def _column_mask(store, name, rows, column_filter):
+    """Build a boolean mask over ``rows`` for one column entry of a filterModel"""
+    if name in store.categorical:
+        column = store.categorical[name]
+        codes = column.codes[rows]
+        condition_mask = lambda c: _text_condition_mask(column, codes, c)
+    else:
+        values = store.column(name)[rows]
+        condition_mask = lambda c: _number_condition_mask(values, c)
+
+    # Combined filters: {'operator': 'AND', 'conditions': [...]}
+    conditions = column_filter.get('conditions')
+    if conditions is None and 'condition1' in column_filter:
+        # Older AG Grid format with condition1/condition2
+        conditions = [column_filter['condition1'], column_filter.get('condition2')]
+    if conditions is None:
+        return condition_mask(column_filter)
+
+    masks = [condition_mask(c) for c in conditions if c]
+    if not masks:
+        return np.ones(len(rows), dtype=bool)
+    if column_filter.get('operator', 'AND').upper() == 'OR':
+        return np.logical_or.reduce(masks)
+    return np.logical_and.reduce(masks)
+
+
+def apply_filter_model(store, rows, filter_model):
+    """Restrict row positions to those matching an AG Grid filterModel"""
+    if not filter_model:
+        return rows
+
+    mask = np.ones(len(rows), dtype=bool)
+    for name, column_filter in filter_model.items():
+        if name != 'id' and name not in store.categorical and name not in store.numeric:
+            continue
+        mask &= _column_mask(store, name, rows, column_filter)
+    return rows[mask]
+
+
+def apply_sort_model(store, rows, sort_model):
+    """Order row positions using an AG Grid sortModel"""
+    keys = []
+    for sort in sort_model or []:
+        name = sort.get('colId')
+        if name != 'id' and name not in store.categorical and name not in store.numeric:
+            continue
+        # Categories are numbered in sorted order, so codes sort like the strings
+        key = store.column(name)[rows].astype(np.int64)
+        keys.append(-key if sort.get('sort') == 'desc' else key)
+    if not keys:
+        return rows
+    # lexsort uses the last key as the primary one
+    return rows[np.lexsort(keys[::-1])]
+
+
+def encode_rows(store, rows):
+    """Rows as the grid's transport: {'columns': {column: values}, 'dictionary': {column: {code: string}}}
+
+    Values are sent column by column and categorical columns as codes, with
+    one dictionary of the codes used; the browser rebuilds the row objects
+    and the grid's valueGetters decode the codes (static/dashAgGridFunctions.js).
+    """
+    return {
+        'columns': {name: store.column(name)[rows].tolist() for name in GRID_COLUMNS},
+        'dictionary': store.dictionary(rows)
+    }
+
+
+def get_rows_block(store, request, rows=None):
+    """Answer an infinite row model getRowsRequest with one block of rows
+
+    ``rows`` optionally restricts the query to a subset of row positions.
+    """
+    request = request or {}
+    start_row = int(request.get('startRow') or 0)
+    end_row = int(request.get('endRow') or start_row + DEFAULT_BLOCK_SIZE)
+
+    if rows is None:
+        rows = np.arange(len(store))
+    rows = apply_filter_model(store, rows, request.get('filterModel'))
+    rows = apply_sort_model(store, rows, request.get('sortModel'))
+
+    return dict(encode_rows(store, rows[start_row:end_row]), rowCount=len(rows))
+
+
+def data_version(store, activity):
+    """Version of the grid's data that every worker agrees on: [base data fingerprint, change log seq, activity stamp]"""
+    return [store.fingerprint, store.change_seq, activity.stamp]
+
+
+def get_rows_delta(store, activity, version, rows=None):
+    """Changes to the grid's rows since a client's data version (see data_version)
+
+    Returns (version, delta). The delta is None when no row the grid
+    shows changed, the changed rows of ``rows`` (all rows by default)
+    encoded like row blocks plus {'changed': [...]} with the grid columns
+    that changed, or {'refresh': True} when the changes can no longer be
+    listed (other base data, or a version older than the kept history) or
+    too many rows changed, and the client should reload its row blocks
+    instead. A worker that has not yet caught up with the client's version
+    sends nothing and leaves the client at its version.
+    """
+    current = data_version(store, activity)
+    # Versions of other base data (or from before a deploy changed their form) cannot be caught up from
+    if not isinstance(version, list) or len(version) != 3 or version[0] != store.fingerprint:
+        return current, {'refresh': True}
+    _, seq, stamp = version
+    if seq > store.change_seq or stamp > activity.stamp:
+        return version, None
+
+    logged, logged_columns = logged_changes(store, seq)
+    paced = activity.changes_since(stamp)
+    if logged is None or paced is None:
+        return current, {'refresh': True}
+    changed = np.union1d(logged, paced)
+    columns = set(logged_columns).union(*(DERIVED_COLUMNS.get(name, ()) for name in logged_columns))
+    if len(paced):
+        columns.add('pacing_percent')
+    columns = [name for name in GRID_COLUMNS if name in columns]
+    if rows is not None:
+        changed = np.intersect1d(changed, rows, assume_unique=True)
+    if not columns or not len(changed):
+        return current, None
+    if len(changed) > MAX_DELTA_ROWS:
+        return current, {'refresh': True}
+    return current, dict(encode_rows(store, changed), changed=columns)
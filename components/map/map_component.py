@@ -1,31 +1,13 @@
 import plotly.graph_objects as go
-from dash import dcc
+from dash import dcc, html, Patch
 import dash_bootstrap_components as dbc
-import pandas as pd
+from services.figures.figure_cache import get_figure_cache, view_key
 
-def create_choropleth_map():
-    """Create the US choropleth map showing capacity by state"""
-    
-    # Sample data for US states
-    states_data = {
-        'state': ['CA', 'TX', 'FL', 'NY', 'OR', 'WA', 'NV', 'AZ', 'CO', 'NM', 
-                  'UT', 'ID', 'MT', 'WY', 'ND', 'SD', 'NE', 'KS', 'OK', 'MN',
-                  'IA', 'MO', 'AR', 'LA', 'WI', 'IL', 'MS', 'AL', 'TN', 'KY',
-                  'IN', 'MI', 'OH', 'WV', 'VA', 'NC', 'SC', 'GA', 'PA', 'MD',
-                  'DE', 'NJ', 'CT', 'RI', 'MA', 'VT', 'NH', 'ME', 'AK', 'HI'],
-        'capacity': [95, 88, 92, 87, 96, 94, 45, 85, 82, 78,
-                    80, 48, 83, 52, 89, 55, 58, 60, 86, 91,
-                    57, 85, 62, 88, 90, 92, 65, 68, 70, 72,
-                    88, 89, 87, 75, 78, 82, 80, 91, 86, 84,
-                    82, 88, 85, 83, 89, 87, 86, 88, 45, 92]
-    }
-    
-    df = pd.DataFrame(states_data)
+def _create_choropleth_skeleton():
+    """Create the data-free part of the choropleth: colorscale, projection, hover and layout"""
     
     # Create the choropleth map
     fig = go.Figure(data=go.Choropleth(
-        locations=df['state'],
-        z=df['capacity'],
         locationmode='USA-states',
         colorscale=[
             [0.0, '#e8eaf6'],  # Light blue for low values
@@ -33,7 +15,6 @@ def create_choropleth_map():
             [0.8, '#ff9800'],  # Orange for high values
             [1.0, '#ff5722']   # Red for highest values
         ],
-        text=df['state'],
         hovertemplate='<b>%{text}</b><br>Capacity: %{z}%<extra></extra>',
         colorbar=dict(
             title=dict(
@@ -69,14 +50,55 @@ def create_choropleth_map():
         )
     )
     
-    return dcc.Graph(
-        id='capacity-map',
-        figure=fig,
-        config={'displayModeBar': False},
-        style={'height': '400px'}
+    return fig
+
+
+def choropleth_data(rollup, organize_by='area'):
+    """Per-state trace arrays for the choropleth
+    
+    ``rollup`` is a state/area Rollup from the rollup engine; ``organize_by``
+    colors states by their own ('state') or their area's ('area') capacity.
+    """
+    # Capacity-weighted capacity % per state, O(states) to read from the rollup
+    states, capacities, labels = rollup.state_view(organize_by)
+    return {'locations': states, 'z': capacities, 'text': labels}
+
+
+def choropleth_view(rollup, organize_by='area'):
+    """Key of the data a choropleth figure shows"""
+    return view_key(rollup.key, rollup.version, organize_by)
+
+
+def create_choropleth_figure(rollup, organize_by='area'):
+    """Create the US choropleth figure showing capacity by state, from the figure cache"""
+    return get_figure_cache().figure(
+        'choropleth', _create_choropleth_skeleton, choropleth_view(rollup, organize_by),
+        lambda: choropleth_data(rollup, organize_by)
     )
 
 
+def create_choropleth_patch(rollup, organize_by='area'):
+    """Partial update of a displayed choropleth that replaces only its data arrays"""
+    patch = Patch()
+    for prop, values in choropleth_data(rollup, organize_by).items():
+        patch['data'][0][prop] = values
+    return patch
+
+
+def create_choropleth_map(rollup, organize_by='area'):
+    """Create the US choropleth map showing capacity by state"""
+    return html.Div([
+        dcc.Graph(
+            id='capacity-map',
+            figure=create_choropleth_figure(rollup, organize_by),
+            config={'displayModeBar': False},
+            style={'height': '400px'}
+        ),
+        # Key of the data the map shows, so updates can be sent as patches
+        dcc.Store(id='capacity-map-view', data=choropleth_view(rollup, organize_by))
+    ])
+
+
 def create_map_controls():
     """Create the map control buttons"""
     return [
@@ -1,7 +1,10 @@
 import dash_bootstrap_components as dbc
 from dash import html, dcc
 import base64
+from services.layout.layout_cache import cached_layout
+from services.web.assets import asset_url
 
+@cached_layout
 def create_sidebar():
     """Create the sidebar navigation component"""
     
@@ -32,7 +35,7 @@ def create_sidebar():
     sidebar = html.Div([
         # Logo section
         html.Div([
-            html.Img(src="/assets/reynolds-logo.png", 
+            html.Img(src=asset_url("reynolds-logo.png"), 
                     style={'width': '40px', 'height': '40px', 'marginRight': '10px'}),
             html.Span("REYNOLDS", className="logo-text", 
                      style={'fontSize': '1.2rem', 'fontWeight': 'bold', 'color': '#1a237e'})
@@ -115,6 +118,7 @@ def create_sidebar():
     return sidebar
 
 
+@cached_layout
 def create_hamburger_menu():
     """Create the hamburger menu button"""
     return html.Div([
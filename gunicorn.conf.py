@@ -0,0 +1,86 @@
+"""Production gunicorn settings
+
+    gunicorn --config gunicorn.conf.py main:app
+
+The app is imported and warmed up once in the master (``preload_app``):
+the capacity store, filter bitmaps, hierarchy index, default rollup and
+static layouts are built before forking, so workers share them
+copy-on-write instead of each loading the data again.
+
+Workers run the threaded ``gthread`` class. A slow simulation or data
+callback then only blocks one thread, and the worker's other threads keep
+answering ``_dash-update-component`` requests.
+
+Sizing:
+- ``workers`` defaults to one per available core. The per-worker services
+  take locks only around short critical sections, and NumPy releases the GIL
+  in its kernels.
+- ``threads`` (default 4) is the number of callbacks each worker runs
+  concurrently. Concurrent requests = workers x threads.
+- Raise ``threads`` for I/O-heavy callbacks. Raise ``workers`` (and memory)
+  for CPU-heavy ones.
+- Memory is roughly the preloaded master plus each worker's private pages:
+  caches and anything copied on write.
+
+Overrides: ``PORT``, ``WEB_CONCURRENCY`` (workers), ``GUNICORN_THREADS``,
+``GUNICORN_TIMEOUT``.
+
+For development set ``GUNICORN_RELOAD=1``. It reloads on code changes and
+turns preloading off, because the master would otherwise keep serving the
+old code.
+"""
+import os
+
+
+def available_cores():
+    """CPU cores this process may use, honoring affinity masks and cgroup CPU quotas"""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cores = min(cores, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+reuse_port = True
+
+# Concurrency: one threaded worker per core
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', available_cores()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Development reloads code in the workers, which a preloaded master would defeat
+reload = os.environ.get('GUNICORN_RELOAD') == '1'
+preload_app = not reload
+if preload_app:
+    # Import page modules and data services in the master so workers inherit them
+    os.environ.setdefault('STARTUP_MODE', 'eager')
+
+# Timeouts: long enough for heavy callbacks, short enough to recycle a hung worker
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+# Keep connections from the proxy open across the renderer's callback bursts
+keepalive = 5
+
+# Recycle workers now and then to bound cache growth; re-forking a preloaded master is cheap
+max_requests = 2000
+max_requests_jitter = 200
+
+# Heartbeat files in memory so a slow disk cannot stall workers
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    """Build the shared data state in the master before the first worker forks"""
+    if preload_app:
+        import main
+        main.warm_up()
+        server.log.info('Warmed up application state for %d workers x %d threads', workers, threads)
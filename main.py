@@ -1,36 +1,121 @@
 import os
+import sqlite3
+import time
 import dash
-from dash import Dash, html, dcc, Input, Output, State, ALL
+import flask
+from dash import Dash, html, dcc, Input, Output, State, ALL, ClientsideFunction
 import dash_bootstrap_components as dbc
-import dash_ag_grid as dag
+# Imported at startup even in lazy mode so the AG Grid script is part of the first page served
+import dash_ag_grid
 from dash.exceptions import PreventUpdate
-import plotly.graph_objects as go
-from werkzeug.security import check_password_hash, generate_password_hash
+from services.auth.credential_store import LOGIN_BUSY, LOGIN_OK, get_credential_backend
+from services.layout.layout_cache import cached_layout
+from services.session.session_store import current_session, get_session_store, session_id
+from services.web.assets import asset_url, init_asset_caching
+from services.web.compression import ResponseCompressor
 
 # Initialize the Dash app with Bootstrap theme
+# Theme and icon subset are self-hosted from static/vendor (built by services/web/build_assets.py)
+# and linked explicitly so they load before custom.css
 dash_app = Dash(__name__, 
-           external_stylesheets=[dbc.themes.BOOTSTRAP, 
-                                "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css"],
+           external_stylesheets=[asset_url('vendor/bootstrap.min.css'),
+                                asset_url('vendor/fontawesome-subset.css')],
            suppress_callback_exceptions=True,
            title="Reynolds Trade Capacity Manager",
-           assets_folder='static')
+           assets_folder='static',
+           assets_path_ignore=['vendor'])
+
+# Pure-UI callbacks that run in the browser (static/clientside.js) and never reach the server
+SERVER_FREE_CALLBACKS = []
+
+def server_free_callback(function_name, *dependencies, **kwargs):
+    """Register window.dash_clientside.ui[function_name] as a clientside callback"""
+    dash_app.clientside_callback(ClientsideFunction(namespace='ui', function_name=function_name), *dependencies, **kwargs)
+    SERVER_FREE_CALLBACKS.append(function_name)
+
+# Compress callback, layout and asset responses; serve fingerprinted assets as immutable
+# (after_request hooks run in reverse order, so cache headers are set before compression)
+ResponseCompressor().init_app(dash_app.server)
+init_asset_caching(dash_app.server)
 
 # Set the secret key for sessions
 dash_app.server.secret_key = os.environ.get("SESSION_SECRET", "demo-secret-key-for-development")
 
-# Demo user credentials
-DEMO_USERS = {
-    'demo@reynolds.com': {
-        'password_hash': generate_password_hash('demo123'),
-        'name': 'Demo User'
-    },
-    'admin@reynolds.com': {
-        'password_hash': generate_password_hash('admin123'),
-        'name': 'Admin User'
-    }
-}
+# Function to create email login form
+@cached_layout
+def create_email_login_form():
+    return html.Div([
+        # Alert for messages - preserved when switching forms
+        html.Div(id="login-alert", style={'marginBottom': '1rem', 'minHeight': '40px'}),
+        html.H3("Sign In", style={'fontSize': '1.375rem', 'fontWeight': '500', 'color': '#2d3748', 'marginBottom': '0.125rem', 'textAlign': 'center'}),
+        html.P("Let's build something great", style={'color': '#a0aec0', 'fontSize': '0.75rem', 'marginBottom': '1.5rem', 'textAlign': 'center', 'fontWeight': '400'}),
+    
+
+    
+        # Email input
+        html.Div([
+            dbc.Label("Enter your E-mail id", style={'fontWeight': '400', 'color': '#495057', 'fontSize': '0.8125rem', 'marginBottom': '0.375rem'}),
+            dbc.Input(
+                type="email",
+                id="email-input",
+                placeholder="Enter your email",
+                style={'borderRadius': '5px', 'padding': '0.5rem 0.75rem', 'fontSize': '0.8125rem', 
+                       'border': '1px solid #ced4da', 'backgroundColor': '#fafbfc', 
+                       'height': '38px'}
+            )
+        ], style={'marginBottom': '1rem'}),
+    
+        # Password input
+        html.Div([
+            dbc.Label("Enter your Password", style={'fontWeight': '400', 'color': '#495057', 'fontSize': '0.8125rem', 'marginBottom': '0.375rem'}),
+            html.Div([
+                dbc.Input(
+                    type="password",
+                    id="password-input",
+                    placeholder="Enter your password",
+                    style={'borderRadius': '5px', 'padding': '0.5rem 2.25rem 0.5rem 0.75rem', 
+                           'fontSize': '0.8125rem', 'border': '1px solid #ced4da', 
+                           'backgroundColor': '#fafbfc', 'width': '100%', 
+                           'height': '38px'}
+                ),
+                html.I(id='password-toggle', className='fas fa-eye', 
+                      style={'position': 'absolute', 'right': '0.75rem', 'top': '50%', 
+                             'transform': 'translateY(-50%)', 'cursor': 'pointer', 
+                             'color': '#6c757d', 'fontSize': '0.75rem'})
+            ], style={'position': 'relative'})
+        ], style={'marginBottom': '1.25rem'}),
+    
+        # Login button
+        dbc.Button(
+            "Login",
+            id="login-button",
+            style={
+                'backgroundColor': '#1e3c72',
+                'border': 'none',
+                'borderRadius': '5px',
+                'padding': '0.5rem 1.5rem',
+                'fontSize': '0.875rem',
+                'fontWeight': '500',
+                'color': '#ffffff',
+                'width': '100%',
+                'marginTop': '0.25rem',
+                'marginBottom': '0.75rem',
+                'height': '38px',
+                'boxShadow': '0 1px 3px rgba(30, 60, 114, 0.15)'
+            },
+            n_clicks=0
+        ),
+    
+        # Forgot password link
+        html.Div([
+            html.Span("Cannot remember your password? ", style={'color': '#6c757d', 'fontSize': '0.75rem'}),
+            html.A("Click here", href="#", id="forgot-password-link", 
+                  style={'color': '#0066cc', 'textDecoration': 'none', 'fontSize': '0.75rem'})
+        ], style={'textAlign': 'center'})
+    ])
 
 # Function to create SSO login form
+@cached_layout
 def create_sso_login_form():
     return html.Div([
         # Alert for messages - preserved when switching forms
@@ -170,6 +255,7 @@ custom_styles = {
 }
 
 # Login layout
+@cached_layout
 def create_login_layout():
     return html.Div([
         # Main container
@@ -187,7 +273,7 @@ def create_login_layout():
                             html.Div([
                                 # Reynolds logo
                                 html.Img(
-                                    src='/assets/reynolds-logo.png',
+                                    src=asset_url('reynolds-logo.png'),
                                     style={
                                         'width': '280px',
                                         'height': 'auto',
@@ -344,21 +430,54 @@ def create_login_layout():
         dcc.Store(id='login-mode-store', data={'mode': 'email'}),
         # Store for alert messages
         dcc.Store(id='alert-message-store', data=None),
-        # Interval for auto-hiding alerts (5 seconds)
-        dcc.Interval(id='alert-interval', interval=1000, n_intervals=0, disabled=True, max_intervals=5)
+        # Interval for auto-hiding alerts (fires once, after 5 seconds)
+        dcc.Interval(id='alert-interval', interval=5000, n_intervals=0, disabled=True, max_intervals=1)
     ])
 
 # Import additional components
 from components.sidebar.sidebar import create_sidebar, create_hamburger_menu
-from modules.overview.overview import create_overview_layout
-from modules.activities.activities import create_activities_layout
-from modules.capacity.capacity import create_capacity_layout
-from modules.cycle.cycle import create_cycle_layout
-from modules.control.control import create_control_layout
+from components.filters.filters import FILTER_COLUMNS, filter_selection, resolve_hierarchy_filters, selected_rows
+from services.startup.lazy_imports import lazy_import, preload
 
-# Dashboard layout with sidebar and routing
-def create_dashboard_layout(user_name="User", user_email=""):
-    return html.Div([
+# Data-bearing components and services; in lazy startup mode they (and NumPy,
+# Plotly figure building and the capacity store) load on first dashboard use
+graph_component = lazy_import('components.graph.graph_component')
+map_component = lazy_import('components.map.map_component')
+grid_query = lazy_import('components.grid.grid_query')
+grid_component = lazy_import('components.grid.grid_component')
+rollup_engine = lazy_import('services.rollup.rollup_engine')
+rollup_cube = lazy_import('services.rollup.rollup_cube')
+territory_detail = lazy_import('services.territory.territory_detail')
+capacity_store = lazy_import('services.store.capacity_store')
+filter_engine = lazy_import('services.filters.filter_engine')
+hierarchy_index = lazy_import('services.hierarchy.hierarchy_index')
+capacity_simulation = lazy_import('services.simulation.capacity_simulation')
+job_manager = lazy_import('services.jobs.job_manager')
+activity_store = lazy_import('services.activity.activity_store')
+plan_import = lazy_import('services.imports.plan_import')
+grid_edits = lazy_import('components.grid.grid_edits')
+grid_export = lazy_import('components.grid.grid_export')
+
+# Dashboard routes: module and layout builder of each page, imported on first navigation
+DASHBOARD_PAGES = {
+    '/': ('modules.overview.overview', 'create_overview_layout'),
+    '/activities': ('modules.activities.activities', 'create_activities_layout'),
+    '/capacity': ('modules.capacity.capacity', 'create_capacity_layout'),
+    '/cycle': ('modules.cycle.cycle', 'create_cycle_layout'),
+    '/control': ('modules.control.control', 'create_control_layout'),
+}
+
+PAGE_MODULES = {path: lazy_import(module) for path, (module, _) in DASHBOARD_PAGES.items()}
+
+def create_page_layout(pathname):
+    """Layout of a dashboard route, loading its page module on first use"""
+    _, builder = DASHBOARD_PAGES[pathname]
+    return getattr(PAGE_MODULES[pathname], builder)()
+
+# Dashboard chrome that is the same for every user: overlay, sidebar, hamburger menu, sidebar state
+@cached_layout
+def create_dashboard_chrome():
+    return (
         # Sidebar overlay
         html.Div(id='sidebar-overlay', className='sidebar-overlay', n_clicks=0, style={
             'position': 'fixed',
@@ -378,28 +497,53 @@ def create_dashboard_layout(user_name="User", user_email=""):
         # Hamburger menu
         create_hamburger_menu(),
         
+        # Store for sidebar state
+        dcc.Store(id='sidebar-state', data={'isOpen': False})
+    )
 
+# Dashboard layout with sidebar and routing
+def create_dashboard_layout(user_name="User", user_email=""):
+    overlay, sidebar, hamburger_menu, sidebar_state = create_dashboard_chrome()
+    return html.Div([
+        overlay,
+        sidebar,
+        hamburger_menu,
         
         # Main content area
         html.Div([
             # Content container - Start with overview page
-            html.Div(id='dashboard-page-content', children=create_overview_layout(), style={
+            html.Div(id='dashboard-page-content', children=create_page_layout('/'), style={
                 'backgroundColor': '#f5f6fa',
                 'minHeight': '100vh'
             })
         ], style={'marginLeft': '0', 'transition': 'margin-left 0.3s ease-in-out'}, id='main-content', className='content-wrapper'),
         
-        # Store for sidebar state
-        dcc.Store(id='sidebar-state', data={'isOpen': False}),
+        sidebar_state,
         
         # Store for user data
         dcc.Store(id='user-data', data={'name': user_name, 'email': user_email})
     ])
 
+def warm_up():
+    """Load every page module and build the data state and static layouts ahead of the first request"""
+    preload()
+    capacity_store.get_capacity_store()
+    filter_engine.get_filter_engine()
+    hierarchy_index.get_hierarchy_index()
+    activity_store.get_activity_store()
+    rollup_cube.get_rollup_cube()
+    territory_detail.get_territory_details().preload()
+    get_credential_backend()
+    for pathname in DASHBOARD_PAGES:
+        create_page_layout(pathname)
+    create_dashboard_layout()
+    create_login_layout()
+
 # Main app layout
 dash_app.layout = html.Div([
     dcc.Location(id='url', refresh=False),
     html.Div(id='page-content'),
+    # Opaque session ID only; session data is kept server-side (services/session)
     dcc.Store(id='session-data', storage_type='session')
 ])
 
@@ -410,15 +554,17 @@ dash_app.layout = html.Div([
      Input('session-data', 'data')]
 )
 def display_page(pathname, session_data):
-    if session_data and session_data.get('authenticated'):
+    # The client only holds the session ID; the session itself is read server-side
+    session = current_session(session_data)
+    if session and session.get('authenticated'):
         # Return the dashboard layout with routing capabilities
         return create_dashboard_layout(
-            user_name=session_data.get('user_name', 'User'),
-            user_email=session_data.get('user_email', '')
+            user_name=session.get('user_name', 'User'),
+            user_email=session.get('user_email', '')
         )
     return create_login_layout()
 
-# Callback for login - Bypass authentication for Plotly Dash Enterprise
+# Callback for login - verified against the local user store
 @dash_app.callback(
     [Output('session-data', 'data'),
      Output('alert-message-store', 'data'),
@@ -435,33 +581,34 @@ def handle_login(n_clicks, email, password, session_data):
     if not n_clicks:
         raise PreventUpdate
     
-    # Force reset interval
-    if not session_data:
-        session_data = {}
+    # Password check runs on the credential backend's bounded pool
+    outcome, user = get_credential_backend().verify(email, password)
+    if outcome == LOGIN_BUSY:
+        alert = {"message": "Too many sign-ins right now. Please try again in a moment.", "color": "warning"}
+        return dash.no_update, alert, dash.no_update, False, 0
+    if outcome != LOGIN_OK:
+        alert = {"message": "Invalid email or password", "color": "danger"}
+        return dash.no_update, alert, dash.no_update, False, 0
     
-    # Skip authentication - directly login for Plotly Dash Enterprise compatibility
-    # Login successful - bypass credential checking
-    new_session = {
+    # Replace any earlier session of this browser tab
+    sessions = get_session_store()
+    sessions.delete(session_id(session_data))
+    sid = sessions.create({
         'authenticated': True,
-        'user_email': email if email else 'user@reynolds.com',
-        'user_name': 'Demo User'
-    }
-    return new_session, None, '/', True, 0
+        'user_email': email.strip().lower(),
+        'user_name': user['name']
+    })
+    return {'sid': sid}, None, '/', True, 0
 
-@dash_app.callback(
+# Callback to show/hide the password
+server_free_callback(
+    'togglePassword',
     [Output('password-input', 'type'),
      Output('password-toggle', 'className')],
     [Input('password-toggle', 'n_clicks')],
     [State('password-input', 'type')],
     prevent_initial_call=True
 )
-def toggle_password(n_clicks, current_type):
-    if n_clicks:
-        if current_type == 'password':
-            return 'text', 'fas fa-eye-slash'
-        else:
-            return 'password', 'fas fa-eye'
-    return current_type, 'fas fa-eye'
 
 # Callback for forgot password
 @dash_app.callback(
@@ -503,150 +650,9 @@ def toggle_login_mode(email_clicks, sso_clicks, mode_data):
         if button_id == 'by-sso-btn':
             # Return SSO form
             return create_sso_login_form(), email_style_inactive, sso_style_active
-        else:
-            # Return email form (default)
-            email_form = html.Div([
-                # Alert for messages - preserved when switching forms
-                html.Div(id="login-alert", style={'marginBottom': '1rem', 'minHeight': '40px'}),
-                html.H3("Sign In", style={'fontSize': '1.375rem', 'fontWeight': '500', 'color': '#2d3748', 'marginBottom': '0.125rem', 'textAlign': 'center'}),
-                html.P("Let's build something great", style={'color': '#a0aec0', 'fontSize': '0.75rem', 'marginBottom': '1.5rem', 'textAlign': 'center', 'fontWeight': '400'}),
-                
 
-                
-                # Email input
-                html.Div([
-                    dbc.Label("Enter your E-mail id", style={'fontWeight': '400', 'color': '#495057', 'fontSize': '0.8125rem', 'marginBottom': '0.375rem'}),
-                    dbc.Input(
-                        type="email",
-                        id="email-input",
-                        placeholder="Enter your email",
-                        style={'borderRadius': '5px', 'padding': '0.5rem 0.75rem', 'fontSize': '0.8125rem', 
-                               'border': '1px solid #ced4da', 'backgroundColor': '#fafbfc', 
-                               'height': '38px'}
-                    )
-                ], style={'marginBottom': '1rem'}),
-                
-                # Password input
-                html.Div([
-                    dbc.Label("Enter your Password", style={'fontWeight': '400', 'color': '#495057', 'fontSize': '0.8125rem', 'marginBottom': '0.375rem'}),
-                    html.Div([
-                        dbc.Input(
-                            type="password",
-                            id="password-input",
-                            placeholder="Enter your password",
-                            style={'borderRadius': '5px', 'padding': '0.5rem 2.25rem 0.5rem 0.75rem', 
-                                   'fontSize': '0.8125rem', 'border': '1px solid #ced4da', 
-                                   'backgroundColor': '#fafbfc', 'width': '100%', 
-                                   'height': '38px'}
-                        ),
-                        html.I(id='password-toggle', className='fas fa-eye', 
-                              style={'position': 'absolute', 'right': '0.75rem', 'top': '50%', 
-                                     'transform': 'translateY(-50%)', 'cursor': 'pointer', 
-                                     'color': '#6c757d', 'fontSize': '0.75rem'})
-                    ], style={'position': 'relative'})
-                ], style={'marginBottom': '1.25rem'}),
-                
-                # Login button
-                dbc.Button(
-                    "Login",
-                    id="login-button",
-                    style={
-                        'backgroundColor': '#1e3c72',
-                        'border': 'none',
-                        'borderRadius': '5px',
-                        'padding': '0.5rem 1.5rem',
-                        'fontSize': '0.875rem',
-                        'fontWeight': '500',
-                        'color': '#ffffff',
-                        'width': '100%',
-                        'marginTop': '0.25rem',
-                        'marginBottom': '0.75rem',
-                        'height': '38px',
-                        'boxShadow': '0 1px 3px rgba(30, 60, 114, 0.15)'
-                    },
-                    n_clicks=0
-                ),
-                
-                # Forgot password link
-                html.Div([
-                    html.Span("Cannot remember your password? ", style={'color': '#6c757d', 'fontSize': '0.75rem'}),
-                    html.A("Click here", href="#", id="forgot-password-link", 
-                          style={'color': '#0066cc', 'textDecoration': 'none', 'fontSize': '0.75rem'})
-                ], style={'textAlign': 'center'})
-            ])
-            return email_form, email_style_active, sso_style_inactive
-    
-    # Default to email form
-    email_form = html.Div([
-        # Alert for messages - preserved when switching forms
-        html.Div(id="login-alert", style={'marginBottom': '1rem', 'minHeight': '40px'}),
-        html.H3("Sign In", style={'fontSize': '1.375rem', 'fontWeight': '500', 'color': '#2d3748', 'marginBottom': '0.125rem', 'textAlign': 'center'}),
-        html.P("Let's build something great", style={'color': '#a0aec0', 'fontSize': '0.75rem', 'marginBottom': '1.5rem', 'textAlign': 'center', 'fontWeight': '400'}),
-        
-
-        
-        # Email input
-        html.Div([
-            dbc.Label("Enter your E-mail id", style={'fontWeight': '400', 'color': '#495057', 'fontSize': '0.8125rem', 'marginBottom': '0.375rem'}),
-            dbc.Input(
-                type="email",
-                id="email-input",
-                placeholder="Enter your email",
-                style={'borderRadius': '5px', 'padding': '0.5rem 0.75rem', 'fontSize': '0.8125rem', 
-                       'border': '1px solid #ced4da', 'backgroundColor': '#fafbfc', 
-                       'height': '38px'}
-            )
-        ], style={'marginBottom': '1rem'}),
-        
-        # Password input
-        html.Div([
-            dbc.Label("Enter your Password", style={'fontWeight': '400', 'color': '#495057', 'fontSize': '0.8125rem', 'marginBottom': '0.375rem'}),
-            html.Div([
-                dbc.Input(
-                    type="password",
-                    id="password-input",
-                    placeholder="Enter your password",
-                    style={'borderRadius': '5px', 'padding': '0.5rem 2.25rem 0.5rem 0.75rem', 
-                           'fontSize': '0.8125rem', 'border': '1px solid #ced4da', 
-                           'backgroundColor': '#fafbfc', 'width': '100%', 
-                           'height': '38px'}
-                ),
-                html.I(id='password-toggle', className='fas fa-eye', 
-                      style={'position': 'absolute', 'right': '0.75rem', 'top': '50%', 
-                             'transform': 'translateY(-50%)', 'cursor': 'pointer', 
-                             'color': '#6c757d', 'fontSize': '0.75rem'})
-            ], style={'position': 'relative'})
-        ], style={'marginBottom': '1.25rem'}),
-        
-        # Login button
-        dbc.Button(
-            "Login",
-            id="login-button",
-            style={
-                'backgroundColor': '#1e3c72',
-                'border': 'none',
-                'borderRadius': '5px',
-                'padding': '0.5rem 1.5rem',
-                'fontSize': '0.875rem',
-                'fontWeight': '500',
-                'color': '#ffffff',
-                'width': '100%',
-                'marginTop': '0.25rem',
-                'marginBottom': '0.75rem',
-                'height': '38px',
-                'boxShadow': '0 1px 3px rgba(30, 60, 114, 0.15)'
-            },
-            n_clicks=0
-        ),
-        
-        # Forgot password link
-        html.Div([
-            html.Span("Cannot remember your password? ", style={'color': '#6c757d', 'fontSize': '0.75rem'}),
-            html.A("Click here", href="#", id="forgot-password-link", 
-                  style={'color': '#0066cc', 'textDecoration': 'none', 'fontSize': '0.75rem'})
-        ], style={'textAlign': 'center'})
-    ])
-    return email_form, email_style_active, sso_style_inactive
+    # Email form (default)
+    return create_email_login_form(), email_style_active, sso_style_inactive
 
 # Callback to display alerts from store
 @dash_app.callback(
@@ -674,7 +680,8 @@ def display_alert(alert_data):
     return None
 
 # Callback to auto-hide alerts after interval
-@dash_app.callback(
+server_free_callback(
+    'autoHideAlert',
     [Output('alert-message-store', 'data', allow_duplicate=True),
      Output('alert-interval', 'disabled', allow_duplicate=True),
      Output('alert-interval', 'n_intervals')],
@@ -682,12 +689,6 @@ def display_alert(alert_data):
     [State('alert-message-store', 'data')],
     prevent_initial_call=True
 )
-def auto_hide_alert(n_intervals, alert_data):
-    # Only hide after 5 intervals of 1 second each (5 seconds total)
-    if n_intervals and n_intervals >= 5 and alert_data:
-        # Clear the alert and reset the interval
-        return None, True, 0
-    raise PreventUpdate
 
 # Callback for SSO login - Bypass authentication for Plotly Dash Enterprise
 @dash_app.callback(
@@ -699,16 +700,17 @@ def auto_hide_alert(n_intervals, alert_data):
 def handle_sso_login(n_clicks):
     if n_clicks:
         # Skip SSO authentication - directly login for Plotly Dash Enterprise compatibility
-        new_session = {
+        sid = get_session_store().create({
             'authenticated': True,
             'user_email': 'sso.user@reynolds.com',
             'user_name': 'SSO User'
-        }
-        return new_session, '/'
+        })
+        return {'sid': sid}, '/'
     raise PreventUpdate
 
 # Callback for sidebar toggle - simplified
-@dash_app.callback(
+server_free_callback(
+    'toggleSidebar',
     [Output('sidebar', 'style'),
      Output('main-content', 'style'),
      Output('sidebar-overlay', 'style'),
@@ -716,104 +718,30 @@ def handle_sso_login(n_clicks):
     [Input('hamburger-menu', 'n_clicks')],
     [State('sidebar-state', 'data')]
 )
-def toggle_sidebar(n_clicks, sidebar_state):
-    # Initial state
-    if n_clicks is None or n_clicks == 0:
-        sidebar_style = {
-            'position': 'fixed',
-            'top': '0',
-            'left': '-280px',
-            'width': '280px',
-            'height': '100vh',
-            'backgroundColor': 'white',
-            'boxShadow': '2px 0 5px rgba(0,0,0,0.1)',
-            'transition': 'left 0.3s ease',
-            'zIndex': '1050',
-            'display': 'flex',
-            'flexDirection': 'column'
-        }
-        
-        main_style = {
-            'marginLeft': '0',
-            'transition': 'margin-left 0.3s ease'
-        }
-        
-        overlay_style = {
-            'position': 'fixed',
-            'top': '0',
-            'left': '0',
-            'width': '100vw',
-            'height': '100vh',
-            'backgroundColor': 'rgba(0, 0, 0, 0)',
-            'zIndex': '999',
-            'pointerEvents': 'none',
-            'transition': 'background-color 0.3s ease'
-        }
-        
-        return sidebar_style, main_style, overlay_style, {'isOpen': False}
-    
-    # Toggle state based on clicks
-    is_open = n_clicks % 2 == 1
-    
-    sidebar_style = {
-        'position': 'fixed',
-        'top': '0',
-        'left': '0' if is_open else '-280px',
-        'width': '280px',
-        'height': '100vh',
-        'backgroundColor': 'white',
-        'boxShadow': '2px 0 5px rgba(0,0,0,0.1)',
-        'transition': 'left 0.3s ease',
-        'zIndex': '1050',
-        'display': 'flex',
-        'flexDirection': 'column'
-    }
-    
-    main_style = {
-        'marginLeft': '280px' if is_open else '0',
-        'transition': 'margin-left 0.3s ease'
-    }
-    
-    overlay_style = {
-        'position': 'fixed',
-        'top': '0',
-        'left': '0',
-        'width': '100vw',
-        'height': '100vh',
-        'backgroundColor': 'rgba(0, 0, 0, 0.5)' if is_open else 'rgba(0, 0, 0, 0)',
-        'zIndex': '999',
-        'pointerEvents': 'auto' if is_open else 'none',
-        'transition': 'background-color 0.3s ease'
-    }
-    
-    return sidebar_style, main_style, overlay_style, {'isOpen': is_open}
-
 
 # Callback to close sidebar when overlay is clicked
-@dash_app.callback(
+server_free_callback(
+    'closeSidebarOnOverlay',
     Output('hamburger-menu', 'n_clicks'),
     [Input('sidebar-overlay', 'n_clicks')],
     [State('hamburger-menu', 'n_clicks'),
      State('sidebar-state', 'data')],
     prevent_initial_call=True
 )
-def close_sidebar_on_overlay(overlay_clicks, hamburger_clicks, sidebar_state):
-    if overlay_clicks and sidebar_state.get('isOpen', False):
-        # Increment hamburger clicks to close sidebar
-        return (hamburger_clicks or 0) + 1
-    raise PreventUpdate
 
 # Callback for logout functionality
 @dash_app.callback(
     [Output('session-data', 'data', allow_duplicate=True),
      Output('url', 'pathname', allow_duplicate=True)],
     [Input('logout-button', 'n_clicks')],
+    [State('session-data', 'data')],
     prevent_initial_call=True
 )
-def handle_logout(n_clicks):
+def handle_logout(n_clicks, session_data):
     if n_clicks:
-        # Clear session data and redirect to root (which will show login page)
-        return {'authenticated': False}, '/'
+        # End the server-side session and redirect to root (which will show login page)
+        get_session_store().delete(session_id(session_data))
+        return None, '/'
     raise PreventUpdate
 
 # Callback for page routing within dashboard with animation
@@ -825,86 +753,166 @@ def handle_logout(n_clicks):
 )
 def display_dashboard_page(pathname, session_data):
     # Only route within dashboard if user is authenticated
-    if session_data and session_data.get('authenticated'):
-        if pathname == '/activities':
-            return create_activities_layout()
-        elif pathname == '/capacity':
-            return create_capacity_layout()
-        elif pathname == '/cycle':
-            return create_cycle_layout()
-        elif pathname == '/control':
-            return create_control_layout()
-        elif pathname == '/' or pathname is None:
-            # Default to overview
-            return create_overview_layout()
+    session = current_session(session_data)
+    if session and session.get('authenticated'):
+        # Default to overview
+        if pathname is None:
+            pathname = '/'
+        if pathname in DASHBOARD_PAGES:
+            return create_page_layout(pathname)
     raise PreventUpdate
 
+# Callback for cascading Area -> Region -> Division -> Territory filters
+@dash_app.callback(
+    [Output('region-dropdown', 'options'),
+     Output('division-dropdown', 'options'),
+     Output('territory-dropdown', 'options'),
+     Output('region-dropdown', 'value'),
+     Output('division-dropdown', 'value'),
+     Output('territory-dropdown', 'value')],
+    [Input('area-dropdown', 'value'),
+     Input('region-dropdown', 'value'),
+     Input('division-dropdown', 'value'),
+     Input('territory-dropdown', 'value')],
+    prevent_initial_call=True
+)
+def cascade_hierarchy_filters(area, region, division, territory):
+    resolved = resolve_hierarchy_filters(area, region, division, territory)
+    options, values = resolved['options'], resolved['values']
+    
+    # Only send values back when a selection was dropped, so the inputs don't re-trigger
+    def pruned(level, current):
+        return values[level] if set(values[level]) != set(current or []) else dash.no_update
+    
+    return (options['tm_region'], options['tm_division'], options['tm_territory'],
+            pruned('tm_region', region), pruned('tm_division', division), pruned('tm_territory', territory))
 
+# Values of the six overview filter dropdowns, in FILTER_COLUMNS order
+FILTER_INPUTS = [Input(f'{name}-dropdown', 'value') for name in FILTER_COLUMNS]
+FILTER_STATES = [State(f'{name}-dropdown', 'value') for name in FILTER_COLUMNS]
 
+# Callback for the grid's infinite row model - filterModel/sortModel are applied server-side
+@dash_app.callback(
+    Output('capacity-grid-block', 'data'),
+    [Input('capacity-grid', 'getRowsRequest')],
+    FILTER_STATES,
+    prevent_initial_call=True
+)
+def load_grid_rows(request, *filter_values):
+    if not request:
+        raise PreventUpdate
+    rows = selected_rows(filter_selection(*filter_values))
+    return grid_query.get_rows_block(capacity_store.get_capacity_store(), request, rows)
+
+# Pass each encoded row block to the grid after registering its dictionary
+server_free_callback(
+    'receiveRowsBlock',
+    Output('capacity-grid', 'getRowsResponse'),
+    [Input('capacity-grid-block', 'data')],
+    prevent_initial_call=True
+)
+
+# Refresh the grid's row blocks when the overview filters change
+server_free_callback(
+    'purgeGridCache',
+    Output('capacity-grid-refresh', 'data'),
+    FILTER_INPUTS,
+    prevent_initial_call=True
+)
+
+# Callback for the grid's live refresh - rows changed since the client's data version, nothing when unchanged
+@dash_app.callback(
+    [Output('capacity-grid-delta', 'data'),
+     Output('capacity-grid-version', 'data')],
+    [Input('capacity-grid-poll', 'n_intervals')],
+    [State('capacity-grid-version', 'data')] + FILTER_STATES,
+    prevent_initial_call=True
+)
+def refresh_grid_rows(n_intervals, version, *filter_values):
+    store = capacity_store.get_capacity_store()
+    activity = activity_store.get_activity_store()
+    current = grid_query.data_version(store, activity)
+    if version == current:
+        raise PreventUpdate
+    if not version:
+        # First poll: the grid's blocks were just loaded at the current version
+        return dash.no_update, current
+    rows = selected_rows(filter_selection(*filter_values))
+    latest, delta = grid_query.get_rows_delta(store, activity, version, rows)
+    if delta is None and latest == version:
+        raise PreventUpdate
+    return (delta if delta is not None else dash.no_update), latest
+
+# Apply live refresh deltas to the grid's loaded rows
+server_free_callback(
+    'applyGridDelta',
+    Output('capacity-grid-refresh', 'data', allow_duplicate=True),
+    [Input('capacity-grid-delta', 'data')],
+    prevent_initial_call=True
+)
+
+# Export the grid's current view through the streaming export route
+server_free_callback(
+    'exportGrid',
+    Output('capacity-grid-refresh', 'data', allow_duplicate=True),
+    [Input({'type': 'capacity-grid-export', 'format': ALL}, 'n_clicks')],
+    [State('session-data', 'data')] + FILTER_STATES,
+    prevent_initial_call=True
+)
+
+# Pause or resume the grid's live refresh
+server_free_callback(
+    'toggleLiveRefresh',
+    Output('capacity-grid-poll', 'disabled'),
+    [Input('capacity-grid-live', 'value')]
+)
+
+# Callback to recolor the map for the overview filters and the organize-by choice
+@dash_app.callback(
+    [Output('capacity-map', 'figure'),
+     Output('capacity-map-view', 'data')],
+    [Input('organize-by-dropdown', 'value')] + FILTER_INPUTS,
+    [State('capacity-map-view', 'data')],
+    prevent_initial_call=True
+)
+def update_map_for_filters(organize_by, *args):
+    *filter_values, shown_view = args
+    organize_by = organize_by or 'area'
+    rollup = rollup_engine.get_rollup_engine().rollup(filter_selection(*filter_values))
+    view = map_component.choropleth_view(rollup, organize_by)
+    if view == shown_view:
+        raise PreventUpdate
+    # The map always holds a full figure from the layout, so only its data arrays are sent
+    return map_component.create_choropleth_patch(rollup, organize_by), view
+
+
+# Keep only the selected row's id, so the details callback is sent an id instead of the row
+server_free_callback(
+    'selectedRowId',
+    Output('capacity-grid-selected', 'data'),
+    [Input('capacity-grid', 'selectedRows')],
+    [State('capacity-grid-selected', 'data')],
+    prevent_initial_call=True
+)
 
 # Callback for row selection details
 @dash_app.callback(
     Output('row-details-container', 'children'),
-    [Input('capacity-grid', 'selectedRows')],
+    [Input('capacity-grid-selected', 'data')],
     prevent_initial_call=True
 )
-def display_row_details(selected_rows):
-    if selected_rows and len(selected_rows) > 0:
-        row = selected_rows[0]  # Show details for first selected row
-        
-        details_card = dbc.Card([
-            dbc.CardHeader([
-                html.H6("Territory Details", className="mb-0"),
-                html.Small(f"{row.get('tm_territory', '')}", className="text-muted")
-            ]),
-            dbc.CardBody([
-                dbc.Row([
-                    dbc.Col([
-                        html.P([html.Strong("Area: "), row.get('tm_area', '')], className="mb-2"),
-                        html.P([html.Strong("Region: "), row.get('tm_region', '')], className="mb-2")
-                    ], md=6),
-                    dbc.Col([
-                        html.P([html.Strong("Division: "), row.get('tm_division', '')], className="mb-2"),
-                        html.P([html.Strong("Territory: "), row.get('tm_territory', '')], className="mb-2")
-                    ], md=6)
-                ]),
-                html.Hr(),
-                dbc.Row([
-                    dbc.Col([
-                        html.Div([
-                            html.H3(f"{row.get('capacity_percent', 0)}%", className="mb-1"),
-                            html.P("Current Capacity", className="text-muted mb-0")
-                        ], className="text-center")
-                    ], md=3),
-                    dbc.Col([
-                        html.Div([
-                            html.H3(f"{row.get('pacing_percent', 0)}%", className="mb-1"),
-                            html.P("YTD Pacing", className="text-muted mb-0")
-                        ], className="text-center")
-                    ], md=3),
-                    dbc.Col([
-                        html.Div([
-                            html.H3("Over Capacity" if row.get('capacity_percent', 0) > 100 else "Within Limits", 
-                                   className="mb-1 text-danger" if row.get('capacity_percent', 0) > 100 else "mb-1 text-success",
-                                   style={'fontSize': '1.2rem'}),
-                            html.P("Status", className="text-muted mb-0")
-                        ], className="text-center")
-                    ], md=3),
-                    dbc.Col([
-                        html.Div([
-                            html.H3("On Track" if row.get('pacing_percent', 0) > 50 else "Needs Attention",
-                                   className="mb-1 text-success" if row.get('pacing_percent', 0) > 50 else "mb-1 text-warning",
-                                   style={'fontSize': '1.2rem'}),
-                            html.P("Trend", className="text-muted mb-0")
-                        ], className="text-center")
-                    ], md=3)
-                ])
-            ])
-        ], className="shadow-sm")
-        
-        return details_card
-    
-    return None
+def display_row_details(row_id):
+    if row_id is None:
+        return None
+    # Land any new days of activity first; their pacing updates drop the affected territory details
+    activity_store.get_activity_store()
+    # Summary and history are cached per territory until its rows change
+    detail, row = territory_detail.get_territory_details().for_row(row_id)
+    if row is None:
+        return None
+    # Area, region and division totals are read from the rollup cube, not grouped per request
+    path = rollup_cube.get_rollup_cube().path(row['tm_territory'], row['cycle'], row['activity'])
+    return grid_component.create_row_details(detail, row, path)
 
 # Callback for map click filtering
 # @dash_app.callback(
@@ -945,7 +953,8 @@ def display_row_details(selected_rows):
 
 
 # Callback for view mode buttons (by area, by map, by graph)
-@dash_app.callback(
+server_free_callback(
+    'toggleViewMode',
     [Output('map-container', 'style'),
      Output('graph-container', 'style', allow_duplicate=True),
      Output('btn-map', 'outline'),
@@ -956,76 +965,307 @@ def display_row_details(selected_rows):
      Input('organize-by-dropdown', 'value')],
     prevent_initial_call=True
 )
-def toggle_view_mode(map_clicks, graph_clicks, organize_value):
-    ctx = dash.callback_context
-    
-    if not ctx.triggered:
+
+# Callback for the bar chart view - full figure once, then partial updates
+@dash_app.callback(
+    [Output('capacity-graph', 'figure'),
+     Output('capacity-graph-view', 'data')],
+    [Input('btn-graph', 'n_clicks')] + FILTER_INPUTS,
+    [State('capacity-graph-view', 'data')],
+    prevent_initial_call=True
+)
+def show_graph_view(n_clicks, *args):
+    *filter_values, shown_view = args
+    if not n_clicks:
         raise PreventUpdate
     
-    button_id = ctx.triggered[0]['prop_id'].split('.')[0]
-    
-    # Default styles
-    map_style = {'display': 'block'}
-    graph_style = {'display': 'none'}
-    map_outline = False
-    graph_outline = True
-    dropdown_style = {'width': '120px', 'fontSize': '0.8rem', 'display': 'inline-block'}
-    
-    if button_id == 'btn-map' or organize_value == 'area':
-        # Show map view
-        map_style = {'display': 'block'}
-        graph_style = {'display': 'none'}
-        map_outline = False
-        graph_outline = True
-    elif button_id == 'btn-graph':
-        # Show graph view
-        map_style = {'display': 'none'}
-        graph_style = {'display': 'block', 'minHeight': '400px'}
-        map_outline = True
-        graph_outline = False
-    
-    return map_style, graph_style, map_outline, graph_outline, dropdown_style
+    selection = filter_selection(*filter_values)
+    view = graph_component.capacity_bar_view(selection)
+    if view == shown_view:
+        raise PreventUpdate
+    if shown_view is None:
+        # First time the chart is shown: send the whole figure
+        return graph_component.create_capacity_bar_figure(selection), view
+    return graph_component.create_capacity_bar_patch(selection), view
 
-# Add graph container to the overview layout
+# Callback to start the Monte Carlo capacity simulation as a background job
 @dash_app.callback(
-    Output('graph-container', 'children'),
-    [Input('btn-graph', 'n_clicks')],
+    [Output('simulation-job', 'data'),
+     Output('simulation-poll', 'disabled'),
+     Output('simulation-poll', 'n_intervals')],
+    [Input('simulation-run-button', 'n_clicks')],
+    [State('simulation-cycle-dropdown', 'value'),
+     State('simulation-activity-dropdown', 'value'),
+     State('simulation-area-dropdown', 'value'),
+     State('simulation-scenarios-input', 'value'),
+     State('simulation-horizon-input', 'value'),
+     State('simulation-volatility-slider', 'value'),
+     State('simulation-growth-slider', 'value')],
     prevent_initial_call=True
 )
-def show_graph_view(n_clicks):
-    if n_clicks:
-        # Create a bar chart view
-        import plotly.graph_objects as go
-        
-        fig = go.Figure()
-        
-        # Sample data for the graph
-        territories = ['San Francisco CA', 'Los Angeles CA', 'Houston TX', 'New York NY', 'Miami FL']
-        capacities = [110, 87, 98, 92, 105]
-        
-        fig.add_trace(go.Bar(
-            x=territories,
-            y=capacities,
-            marker_color=['#ff5722' if c > 100 else '#ff9800' if c >= 90 else '#4caf50' for c in capacities],
-            text=[f'{c}%' for c in capacities],
-            textposition='auto'
-        ))
-        
-        fig.update_layout(
-            title='Capacity by Territory',
-            xaxis_title='Territory',
-            yaxis_title='Capacity %',
-            showlegend=False,
-            plot_bgcolor='white',
-            height=400
+def start_capacity_simulation(n_clicks, cycle, activities, areas, scenarios, horizon_weeks, volatility, growth):
+    if not n_clicks:
+        raise PreventUpdate
+    capacity_page = PAGE_MODULES['/capacity']
+    store = capacity_store.get_capacity_store()
+    selection = capacity_page.simulation_selection(cycle, activities, areas)
+    params = capacity_page.simulation_params(scenarios, horizon_weeks, volatility, growth)
+    # Identical submissions (same slice, parameters and data) share one job and its result
+    # Read before the inputs, so a change landing in between can't be keyed as already simulated
+    version = (store.fingerprint, store.change_seq, activity_store.get_activity_store().stamp)
+    inputs = capacity_simulation.territory_inputs(store, selected_rows(selection))
+    job_id = job_manager.get_job_manager().submit(
+        'capacity-simulation', capacity_page.simulation_job_key(selection, params, version),
+        capacity_simulation.simulation_job, inputs, params
+    )
+    return job_id, False, 0
+
+# Callback to report the simulation job's progress and show its result once done
+@dash_app.callback(
+    [Output('simulation-progress', 'value'),
+     Output('simulation-status', 'children'),
+     Output('simulation-graph', 'figure'),
+     Output('simulation-summary', 'children'),
+     Output('simulation-poll', 'disabled', allow_duplicate=True),
+     Output('simulation-run-button', 'disabled'),
+     Output('simulation-cancel-button', 'disabled')],
+    [Input('simulation-poll', 'n_intervals')],
+    [State('simulation-job', 'data')],
+    prevent_initial_call=True
+)
+def poll_capacity_simulation(n_intervals, job_id):
+    job = job_manager.get_job_manager().status(job_id)
+    if job is None:
+        return 0, "", dash.no_update, dash.no_update, True, False, True
+    progress = round(job['progress'] * 100)
+    if job['status'] in job_manager.ACTIVE_STATES:
+        return progress, job['message'] or "Queued...", dash.no_update, dash.no_update, False, True, False
+    if job['status'] != job_manager.JOB_DONE:
+        message = "Simulation cancelled" if job['status'] == job_manager.JOB_CANCELLED else f"Simulation failed: {job['error']}"
+        return progress, message, dash.no_update, dash.no_update, True, False, True
+    capacity_page = PAGE_MODULES['/capacity']
+    result = capacity_simulation.SimulationResult.from_dict(job['result'])
+    return (100, "", capacity_page.create_simulation_figure(result), capacity_page.create_simulation_summary(result),
+            True, False, True)
+
+# Callback to cancel the running simulation job
+@dash_app.callback(
+    Output('simulation-status', 'children', allow_duplicate=True),
+    [Input('simulation-cancel-button', 'n_clicks')],
+    [State('simulation-job', 'data')],
+    prevent_initial_call=True
+)
+def cancel_capacity_simulation(n_clicks, job_id):
+    if not n_clicks:
+        raise PreventUpdate
+    job_manager.get_job_manager().cancel(job_id)
+    return "Cancelling..."
+
+# Callback for the cycle page: pacing stats, trend and breakdown from the activity store's running totals
+@dash_app.callback(
+    [Output('cycle-stats', 'children'),
+     Output('cycle-trend-graph', 'figure'),
+     Output('cycle-breakdown-graph', 'figure')],
+    [Input('cycle-select-dropdown', 'value'),
+     Input('cycle-level-radio', 'value')]
+)
+def update_cycle_pacing(cycle, level):
+    if not cycle or not level:
+        raise PreventUpdate
+    cycle_page = PAGE_MODULES['/cycle']
+    activity = activity_store.get_activity_store()
+    return (cycle_page.create_cycle_stats(activity, cycle),
+            cycle_page.create_pacing_trend_figure(activity, cycle),
+            cycle_page.create_pacing_breakdown_figure(activity, cycle, level))
+
+# Callback to send a picked activity plan to the streaming upload route (static/uploads.js)
+dash_app.clientside_callback(
+    ClientsideFunction(namespace='uploads', function_name='postActivityPlan'),
+    [Output('activities-upload', 'data'),
+     Output('activities-file-upload', 'contents')],
+    [Input('activities-file-upload', 'contents')],
+    [State('activities-file-upload', 'filename'),
+     State('session-data', 'data')],
+    prevent_initial_call=True
+)
+
+# Callback to start the import job for a saved upload
+@dash_app.callback(
+    [Output('activities-import-job', 'data'),
+     Output('activities-import-poll', 'disabled'),
+     Output('activities-import-status', 'children'),
+     Output('activities-import-summary', 'children'),
+     Output('activities-import-errors', 'children')],
+    [Input('activities-upload', 'data')],
+    prevent_initial_call=True
+)
+def start_activity_import(upload):
+    if not upload:
+        raise PreventUpdate
+    if upload.get('error'):
+        return dash.no_update, True, upload['error'], None, None
+    # Validation runs against the store's categories and plan rows, sent along with the job
+    index = plan_import.plan_index(capacity_store.get_capacity_store())
+    job_id = job_manager.get_job_manager().submit(
+        'activity-import', upload['upload_id'], plan_import.import_plan_job,
+        upload['upload_id'], index, f"import:{upload['name']}"
+    )
+    return job_id, False, f"Importing {upload['name']}...", None, None
+
+# Callback to report the import job's progress and row errors as it goes
+@dash_app.callback(
+    [Output('activities-import-progress', 'value'),
+     Output('activities-import-status', 'children', allow_duplicate=True),
+     Output('activities-import-summary', 'children', allow_duplicate=True),
+     Output('activities-import-errors', 'children', allow_duplicate=True),
+     Output('activities-import-poll', 'disabled', allow_duplicate=True),
+     Output('activities-import-cancel', 'disabled')],
+    [Input('activities-import-poll', 'n_intervals')],
+    [State('activities-import-job', 'data')],
+    prevent_initial_call=True
+)
+def poll_activity_import(n_intervals, job_id):
+    job = job_manager.get_job_manager().status(job_id)
+    if job is None:
+        return 0, "", None, None, True, True
+    activities_page = PAGE_MODULES['/activities']
+    progress = round(job['progress'] * 100)
+    detail = job['result'] or job['detail'] or {}
+    errors = activities_page.create_import_errors(detail.get('errors', []), detail.get('error_count', 0))
+    if job['status'] in job_manager.ACTIVE_STATES:
+        return progress, job['message'] or "Queued...", None, errors, False, False
+    if job['status'] == job_manager.JOB_DONE:
+        # Apply the imported rows to this worker's store now; other workers pick them up on their next sync
+        capacity_store.sync_changes(capacity_store.get_capacity_store(), force=True)
+        return 100, "", activities_page.create_import_summary(job['result']), errors, True, True
+    message = (f"Import cancelled; {job['message'] or 'no rows applied'}" if job['status'] == job_manager.JOB_CANCELLED
+               else f"Import failed: {job['error']}")
+    return progress, message, None, errors, True, True
+
+# Callback to cancel the running import
+@dash_app.callback(
+    Output('activities-import-status', 'children', allow_duplicate=True),
+    [Input('activities-import-cancel', 'n_clicks')],
+    [State('activities-import-job', 'data')],
+    prevent_initial_call=True
+)
+def cancel_activity_import(n_clicks, job_id):
+    if not n_clicks:
+        raise PreventUpdate
+    job_manager.get_job_manager().cancel(job_id)
+    return "Cancelling..."
+
+# Callback to load the control table rows for the selected slice
+@dash_app.callback(
+    Output('control-grid', 'rowData'),
+    [Input('control-cycle-dropdown', 'value'),
+     Input('control-activity-dropdown', 'value'),
+     Input('control-area-dropdown', 'value')]
+)
+def load_control_rows(cycle, activity, areas):
+    control_page = PAGE_MODULES['/control']
+    store = capacity_store.get_capacity_store()
+    return control_page.control_rows(store, selected_rows(control_page.control_selection(cycle, activity, areas)))
+
+# Callback to coalesce control table cell edits in the browser
+server_free_callback(
+    'queueCellEdits',
+    Output('control-pending', 'data'),
+    [Input('control-grid', 'cellValueChanged')],
+    [State('control-pending', 'data')],
+    prevent_initial_call=True
+)
+
+# Callback to send the coalesced edits as one batch, at most one batch in flight
+server_free_callback(
+    'flushCellEdits',
+    [Output('control-batch', 'data'),
+     Output('control-pending', 'data', allow_duplicate=True)],
+    [Input('control-flush', 'n_intervals')],
+    [State('control-pending', 'data'),
+     State('control-batch', 'data'),
+     State('control-ack', 'data')],
+    prevent_initial_call=True
+)
+
+# Queue the edits of a batch that could not be saved again, behind any newer edit of the same cell
+server_free_callback(
+    'requeueCellEdits',
+    Output('control-pending', 'data', allow_duplicate=True),
+    [Input('control-ack', 'data')],
+    [State('control-pending', 'data')],
+    prevent_initial_call=True
+)
+
+# Callback to apply a batch of control table edits as one transaction and send back only the edited rows
+@dash_app.callback(
+    [Output('control-grid', 'rowTransaction'),
+     Output('control-ack', 'data'),
+     Output('control-save-status', 'children')],
+    [Input('control-batch', 'data')],
+    [State('session-data', 'data')],
+    prevent_initial_call=True
+)
+def save_control_edits(batch, session_data):
+    if not batch:
+        raise PreventUpdate
+    # Every outcome acknowledges the batch, so the client keeps flushing later edits
+    edits = batch.get('edits') or []
+    session = current_session(session_data)
+    if not (session and session.get('authenticated')):
+        return (dash.no_update, {'seq': batch['seq'], 'retry': []},
+                html.Span("Sign in again to save changes", className="text-danger"))
+    control_page = PAGE_MODULES['/control']
+    try:
+        transaction, applied, rejected = grid_edits.apply_edit_batch(
+            capacity_store.get_capacity_store(), edits, f"control:{session.get('user_email', '')}"
         )
-        
-        fig.add_hline(y=100, line_dash="dash", line_color="red", 
-                      annotation_text="Capacity Limit", annotation_position="right")
-        
-        return dcc.Graph(figure=fig, config={'displayModeBar': False})
-    
-    raise PreventUpdate
+    except sqlite3.OperationalError:
+        # The change log stayed locked: the client queues the edits again for the next batch
+        dash_app.server.logger.warning('Control table edits not saved, change log busy; retrying')
+        return dash.no_update, {'seq': batch['seq'], 'retry': edits}, control_page.create_save_error(len(edits), True)
+    except Exception:
+        dash_app.server.logger.exception('Saving control table edits failed')
+        return dash.no_update, {'seq': batch['seq'], 'retry': []}, control_page.create_save_error(len(edits), False)
+    return transaction, {'seq': batch['seq'], 'retry': []}, control_page.create_save_status(applied, rejected)
+
+# Streamed activity plan uploads: the body is written to disk piece by piece for the import job
+@dash_app.server.route('/_upload/activities', methods=['POST'])
+def upload_activities():
+    session = current_session({'sid': flask.request.headers.get('X-Session-Id')})
+    if not (session and session.get('authenticated')):
+        return flask.jsonify(error='Sign in again to upload files'), 401
+    try:
+        upload = plan_import.save_upload(flask.request.stream, flask.request.args.get('name', ''),
+                                         flask.request.content_length)
+    except ValueError as exc:
+        return flask.jsonify(error=str(exc)), 400
+    return flask.jsonify(upload)
+
+# Streamed export of the grid's current view; rows are written chunk by chunk as they are sent
+@dash_app.server.route('/_export/grid', methods=['POST'])
+def export_grid():
+    session = current_session({'sid': flask.request.form.get('sid')})
+    if not (session and session.get('authenticated')):
+        return flask.Response('Sign in again to export data', status=401, mimetype='text/plain')
+    try:
+        store = capacity_store.get_capacity_store()
+        filters, filter_model, sort_model = grid_export.export_view(store, flask.request.form.get('view'))
+        rows = grid_export.export_rows(store, selected_rows(filter_selection(*filters)), filter_model, sort_model)
+        body, mimetype, extension = grid_export.export_grid(store, rows, flask.request.form.get('format'))
+    except ValueError as exc:
+        return flask.Response(str(exc), status=400, mimetype='text/plain')
+    filename = f"capacity-{time.strftime('%Y%m%d-%H%M')}{extension}"
+    return flask.Response(body, mimetype=mimetype,
+                          headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+# Login latency and verification queue depth of this worker, for signed-in users
+@dash_app.server.route('/_stats/login')
+def login_stats():
+    session = current_session({'sid': flask.request.headers.get('X-Session-Id')})
+    if not (session and session.get('authenticated')):
+        return flask.jsonify(error='Sign in to view login statistics'), 401
+    return flask.jsonify(get_credential_backend().stats())
 
 # WSGI server compatibility - Export Flask server for gunicorn
 app = dash_app.server
@@ -1,10 +1,78 @@
-from dash import html
+from dash import html, dcc
+import dash_bootstrap_components as dbc
+from services.layout.layout_cache import cached_layout
 
+# Row errors listed under the import progress
+ERRORS_SHOWN = 50
+
+
+def create_import_errors(errors, error_count):
+    """Table of the first row errors of an import"""
+    if not error_count:
+        return None
+    rows = [html.Tr([html.Td(line), html.Td(message)]) for line, message in errors[:ERRORS_SHOWN]]
+    more = error_count - len(rows)
+    return html.Div([
+        html.H6(f"{error_count:,} row{'s' if error_count != 1 else ''} rejected", className="text-danger mb-2"),
+        dbc.Table([
+            html.Thead(html.Tr([html.Th("Line", style={'width': '80px'}), html.Th("Problem")])),
+            html.Tbody(rows)
+        ], bordered=False, hover=True, size='sm', className="mb-1"),
+        html.Small(f"and {more:,} more", className="text-muted") if more > 0 else None
+    ])
+
+
+def create_import_summary(result):
+    """Outcome of a finished import"""
+    color = "success" if not result['error_count'] else "warning"
+    return dbc.Alert(
+        f"Imported {result['applied']:,} of {result['rows']:,} rows"
+        + (f"; {result['error_count']:,} rows were rejected." if result['error_count'] else "."),
+        color=color, className="mb-3"
+    )
+
+
+@cached_layout
 def create_activities_layout():
     """Create the activities management page layout"""
     return html.Div([
         html.H4("Activities Management", className="mb-3"),
-        html.P("Manage your trade activities here.", className="text-muted"),
-        html.Div("Activities content will be implemented here.", 
-                className="bg-white p-4 rounded shadow-sm card-animate")
-    ], className="activities-page page-container", style={'paddingLeft': '60px', 'paddingTop': '20px', 'paddingRight': '20px'})
\ No newline at end of file
+        html.P("Manage trading activities and tasks.", className="text-muted"),
+        html.Div([
+            html.H6("Import Activity Plan", className="mb-2"),
+            html.P([
+                "CSV or Excel file with columns ", html.Code("cycle"), ", ", html.Code("activity"), ", ",
+                html.Code("territory"), " and ", html.Code("planned"), ", and optionally ", html.Code("target"),
+                ". Each row sets the planned activity of a territory's activity in a cycle."
+            ], className="text-muted", style={'fontSize': '0.85rem'}),
+            dcc.Upload(
+                id='activities-file-upload',
+                children=html.Div(["Drag and drop or ", html.A("select a file")]),
+                accept='.csv,.xlsx',
+                multiple=False,
+                style={
+                    'borderWidth': '1px',
+                    'borderStyle': 'dashed',
+                    'borderRadius': '8px',
+                    'borderColor': '#ced4da',
+                    'textAlign': 'center',
+                    'padding': '24px',
+                    'color': '#64748b',
+                    'cursor': 'pointer'
+                }
+            ),
+            dbc.Row([
+                dbc.Col(dbc.Progress(id='activities-import-progress', value=0, striped=True, animated=True,
+                                     style={'height': '6px'}), width=10, className="d-flex align-items-center"),
+                dbc.Col(dbc.Button("Cancel", id='activities-import-cancel', n_clicks=0, color="secondary",
+                                   outline=True, size='sm', disabled=True, style={'width': '100%'}), width=2)
+            ], className="g-3 mt-3 mb-1"),
+            html.Small(id='activities-import-status', className="text-muted d-block mb-3"),
+            html.Div(id='activities-import-summary'),
+            html.Div(id='activities-import-errors'),
+            # Saved upload and the import job reading it, polled until the job ends
+            dcc.Store(id='activities-upload', data=None),
+            dcc.Store(id='activities-import-job', data=None),
+            dcc.Interval(id='activities-import-poll', interval=500, n_intervals=0, disabled=True)
+        ], className="bg-white p-4 rounded shadow-sm card-animate")
+    ], className="activities-page page-container", style={'paddingLeft': '60px', 'paddingTop': '20px', 'paddingRight': '20px'})
@@ -1,10 +1,187 @@
-from dash import html
+import plotly.graph_objects as go
+from dash import html, dcc
+import dash_bootstrap_components as dbc
+from components.filters.filters import DEFAULT_FILTER_VALUES
+from services.layout.layout_cache import cached_layout
+from services.simulation.capacity_simulation import PERCENTILES, SimulationParams
+from services.store.capacity_store import get_capacity_store
 
+# Territories charted, highest median end-of-cycle capacity first
+CHART_TERRITORIES = 25
+
+# Territories listed in the at-risk table
+TABLE_TERRITORIES = 10
+
+# Bounds of the scenario count input
+MIN_SCENARIOS = 100
+MAX_SCENARIOS = 20000
+
+DEFAULT_PARAMS = SimulationParams()
+
+
+def _control(label, control):
+    """Labelled simulation control"""
+    return html.Div([
+        html.Label(label, style={
+            'fontSize': '13px',
+            'color': '#555',
+            'fontWeight': '500',
+            'marginBottom': '4px',
+            'display': 'block'
+        }),
+        control
+    ])
+
+
+@cached_layout
+def _create_simulation_controls():
+    """Slice and scenario parameter controls; options only change when the store is reloaded"""
+    store = get_capacity_store()
+    cycles = store.categorical['cycle'].categories
+    activities = store.categorical['activity'].categories
+    areas = store.categorical['tm_area'].categories
+    return html.Div([
+        dbc.Row([
+            dbc.Col(_control("Cycle", dcc.Dropdown(
+                id='simulation-cycle-dropdown', options=cycles, value=DEFAULT_FILTER_VALUES['cycle'][0],
+                clearable=False)), width=2),
+            dbc.Col(_control("Activity", dcc.Dropdown(
+                id='simulation-activity-dropdown', options=activities, value=DEFAULT_FILTER_VALUES['activity'],
+                multi=True, placeholder="All activities")), width=3),
+            dbc.Col(_control("Area", dcc.Dropdown(
+                id='simulation-area-dropdown', options=areas, value=[], multi=True,
+                placeholder="All areas")), width=3),
+            dbc.Col(_control("Scenarios", dbc.Input(
+                id='simulation-scenarios-input', type='number', value=DEFAULT_PARAMS.scenarios,
+                min=MIN_SCENARIOS, max=MAX_SCENARIOS, step=100)), width=2),
+            dbc.Col(_control("Weeks left", dbc.Input(
+                id='simulation-horizon-input', type='number', value=DEFAULT_PARAMS.horizon_weeks,
+                min=1, max=52, step=1)), width=2),
+        ], className="g-3 mb-3"),
+        dbc.Row([
+            dbc.Col(_control("Weekly demand volatility", dcc.Slider(
+                id='simulation-volatility-slider', min=0.05, max=0.6, step=0.05,
+                value=DEFAULT_PARAMS.volatility, marks={0.1: '10%', 0.3: '30%', 0.5: '50%'})), width=4),
+            dbc.Col(_control("Demand growth", dcc.Slider(
+                id='simulation-growth-slider', min=-0.3, max=0.3, step=0.05,
+                value=DEFAULT_PARAMS.demand_growth, marks={-0.3: '-30%', 0: '0%', 0.3: '+30%'})), width=4),
+            dbc.Col(dbc.Button([html.I(className="fas fa-play me-2"), "Run Simulation"],
+                               id='simulation-run-button', n_clicks=0,
+                               style={'backgroundColor': '#1e3c72', 'border': 'none', 'width': '100%'}),
+                    width=2, className="d-flex align-items-end"),
+            dbc.Col(dbc.Button("Cancel", id='simulation-cancel-button', n_clicks=0, color="secondary",
+                               outline=True, disabled=True, style={'width': '100%'}),
+                    width=2, className="d-flex align-items-end"),
+        ], className="g-3"),
+        # Progress of the running simulation job
+        html.Div([
+            dbc.Progress(id='simulation-progress', value=0, striped=True, animated=True,
+                         style={'height': '6px'}, className="mt-3"),
+            html.Small(id='simulation-status', className="text-muted")
+        ]),
+        # ID of the simulation job this page shows, polled until the job ends
+        dcc.Store(id='simulation-job', data=None),
+        dcc.Interval(id='simulation-poll', interval=500, n_intervals=0, disabled=True)
+    ], className="filter-container mb-4", style={
+        'backgroundColor': 'white',
+        'padding': '24px',
+        'borderRadius': '8px',
+        'boxShadow': '0 1px 3px rgba(0,0,0,0.08)'
+    })
+
+
+def simulation_params(scenarios, horizon_weeks, volatility, demand_growth):
+    """SimulationParams from the page controls, clamped to their bounds"""
+    return DEFAULT_PARAMS._replace(
+        scenarios=min(max(int(scenarios or DEFAULT_PARAMS.scenarios), MIN_SCENARIOS), MAX_SCENARIOS),
+        horizon_weeks=min(max(int(horizon_weeks or DEFAULT_PARAMS.horizon_weeks), 1), 52),
+        volatility=float(volatility if volatility is not None else DEFAULT_PARAMS.volatility),
+        demand_growth=float(demand_growth or 0.0)
+    )
+
+
+def simulation_selection(cycle, activities, areas):
+    """Store selection {column: values} for the simulated slice"""
+    return {'cycle': [cycle] if cycle else [], 'activity': list(activities or []), 'tm_area': list(areas or [])}
+
+
+def simulation_job_key(selection, params, version):
+    """What makes two simulation submissions identical: slice, parameters and data version
+
+    ``version`` must be the same on every worker for the same data (base data
+    fingerprint, change log seq, activity stamp), not a per-process counter.
+    """
+    return (sorted((name, sorted(values)) for name, values in selection.items()), tuple(params), version)
+
+
+def create_simulation_figure(result):
+    """Fan chart of the simulated capacity % bands for the highest-median territories"""
+    top = result.ranked(CHART_TERRITORIES)
+    names = [result.territories[t].replace('TM - ', '', 1) for t in top.tolist()]
+    p5, p25, p50, p75, p95 = (result.bands[top, i].round(1).tolist() for i in range(len(PERCENTILES)))
+
+    fig = go.Figure()
+    band = dict(mode='lines', line=dict(width=0), hoverinfo='skip', showlegend=True)
+    fig.add_trace(go.Scatter(x=names, y=p95, name='P95', **dict(band, showlegend=False)))
+    fig.add_trace(go.Scatter(x=names, y=p5, name='P5 - P95', fill='tonexty', fillcolor='rgba(30, 60, 114, 0.15)', **band))
+    fig.add_trace(go.Scatter(x=names, y=p75, name='P75', **dict(band, showlegend=False)))
+    fig.add_trace(go.Scatter(x=names, y=p25, name='P25 - P75', fill='tonexty', fillcolor='rgba(30, 60, 114, 0.35)', **band))
+    fig.add_trace(go.Scatter(
+        x=names, y=p50, name='Median', mode='markers+lines', line=dict(color='#1e3c72', width=2),
+        customdata=list(zip(p5, p95)),
+        hovertemplate='<b>%{x}</b><br>Median: %{y}%<br>P5 - P95: %{customdata[0]}% - %{customdata[1]}%<extra></extra>'
+    ))
+    fig.add_hline(y=100, line_dash="dash", line_color="red",
+                  annotation_text="Capacity Limit", annotation_position="right")
+    fig.update_layout(
+        title='Simulated End-of-Cycle Capacity by Territory',
+        yaxis_title='Capacity %',
+        plot_bgcolor='white',
+        height=450,
+        margin=dict(l=40, r=20, t=60, b=120),
+        legend=dict(orientation='h', y=1.08, x=0)
+    )
+    return fig
+
+
+def create_simulation_summary(result):
+    """Run summary and the territories most likely to end over capacity"""
+    params = result.params
+    at_risk = sorted(range(len(result)), key=lambda t: -result.over_capacity[t])[:TABLE_TERRITORIES]
+    rows = [html.Tr([
+        html.Td(result.territories[t]),
+        html.Td(result.areas[t]),
+        html.Td(f"{result.bands[t, 0]:.0f}%"),
+        html.Td(f"{result.bands[t, 2]:.0f}%"),
+        html.Td(f"{result.bands[t, 4]:.0f}%"),
+        html.Td(f"{result.over_capacity[t]:.0%}",
+                className="text-danger" if result.over_capacity[t] >= 0.5 else None)
+    ]) for t in at_risk]
+    return html.Div([
+        html.P(f"{len(result)} territories x {params.scenarios:,} scenarios over {params.horizon_weeks} weeks "
+               f"in {result.elapsed:.2f}s", className="text-muted mb-2", style={'fontSize': '0.8rem'}),
+        dbc.Table([
+            html.Thead(html.Tr([html.Th(h) for h in ("Territory", "Area", "P5", "Median", "P95", "P(over 100%)")])),
+            html.Tbody(rows)
+        ], bordered=False, hover=True, size='sm', className="mb-0")
+    ])
+
+
+@cached_layout
 def create_capacity_layout():
     """Create the capacity simulation page layout"""
     return html.Div([
         html.H4("Capacity Simulation", className="mb-3"),
         html.P("Simulate and analyze capacity scenarios.", className="text-muted"),
-        html.Div("Capacity simulation content will be implemented here.", 
-                className="bg-white p-4 rounded shadow-sm card-animate")
-    ], className="capacity-page page-container", style={'paddingLeft': '60px', 'paddingTop': '20px', 'paddingRight': '20px'})
\ No newline at end of file
+        _create_simulation_controls(),
+        dbc.Row([
+            dbc.Col(html.Div([
+                dcc.Graph(id='simulation-graph', figure={}, config={'displayModeBar': False})
+            ], className="bg-white p-4 rounded shadow-sm card-animate"), width=8),
+            dbc.Col(html.Div([
+                html.H6("Most Likely Over Capacity", className="mb-3"),
+                html.Div("Run a simulation to see the territories at risk.", id='simulation-summary',
+                         className="text-muted")
+            ], className="bg-white p-4 rounded shadow-sm card-animate h-100"), width=4)
+        ], className="g-4")
+    ], className="capacity-page page-container", style={'paddingLeft': '60px', 'paddingTop': '20px', 'paddingRight': '20px'})
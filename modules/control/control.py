@@ -1,10 +1,121 @@
-from dash import html
+from dash import html, dcc
+import dash_ag_grid as dag
+import dash_bootstrap_components as dbc
+from components.filters.filters import DEFAULT_FILTER_VALUES
+from components.grid.grid_edits import CONTROL_COLUMNS
+from services.layout.layout_cache import cached_layout
+from services.store.capacity_store import get_capacity_store
 
+# Milliseconds between flushes of the coalesced cell edits to the server
+FLUSH_INTERVAL = 1000
+
+
+def _control(label, control):
+    """Labelled control table filter"""
+    return html.Div([
+        html.Label(label, style={
+            'fontSize': '13px',
+            'color': '#555',
+            'fontWeight': '500',
+            'marginBottom': '4px',
+            'display': 'block'
+        }),
+        control
+    ])
+
+
+@cached_layout
+def _create_control_filters():
+    """Slice controls; options only change when the store is reloaded"""
+    store = get_capacity_store()
+    return dbc.Row([
+        dbc.Col(_control("Cycle", dcc.Dropdown(
+            id='control-cycle-dropdown', options=store.categorical['cycle'].categories,
+            value=DEFAULT_FILTER_VALUES['cycle'][0], clearable=False)), width=3),
+        dbc.Col(_control("Activity", dcc.Dropdown(
+            id='control-activity-dropdown', options=store.categorical['activity'].categories,
+            value=DEFAULT_FILTER_VALUES['activity'][0], clearable=False)), width=3),
+        dbc.Col(_control("Area", dcc.Dropdown(
+            id='control-area-dropdown', options=store.categorical['tm_area'].categories, value=[],
+            multi=True, placeholder="All areas")), width=6),
+    ], className="g-3 mb-3")
+
+
+def control_selection(cycle, activity, areas):
+    """Store selection {column: values} for the rows shown in the control table"""
+    return {'cycle': [cycle] if cycle else [], 'activity': [activity] if activity else [],
+            'tm_area': list(areas or [])}
+
+
+def control_rows(store, rows):
+    """Control table row data for the given row positions"""
+    return store.records(rows, CONTROL_COLUMNS)
+
+
+def create_save_status(applied, rejected):
+    """Outcome of the last saved batch of edits"""
+    parts = [f"Saved {applied:,} change{'s' if applied != 1 else ''}"]
+    if rejected:
+        parts.append(f"{rejected:,} rejected (targets must be positive whole numbers)")
+    return html.Span("; ".join(parts), className="text-warning" if rejected else "text-success")
+
+
+def create_save_error(count, retrying):
+    """A batch of edits that could not be saved, and whether it is being retried"""
+    changes = f"{count:,} change{'s' if count != 1 else ''}"
+    if retrying:
+        return html.Span(f"Could not save {changes} yet; retrying", className="text-warning")
+    return html.Span(f"Could not save {changes}; reload the page to see the stored targets", className="text-danger")
+
+
+def _create_control_grid():
+    """Territory capacity grid with editable targets"""
+    number = {'filter': 'agNumberColumnFilter', 'width': 130, 'type': 'rightAligned'}
+    column_defs = [
+        {'field': 'tm_territory', 'headerName': 'Territory', 'width': 170, 'pinned': 'left'},
+        {'field': 'tm_area', 'headerName': 'Area', 'width': 130},
+        {'field': 'tm_region', 'headerName': 'Region', 'width': 150},
+        {'field': 'tm_division', 'headerName': 'Division', 'width': 150},
+        dict(number, field='capacity_target', headerName='Target', editable=True,
+             cellEditor='agNumberCellEditor', cellEditorParams={'min': 1, 'precision': 0},
+             cellStyle={'backgroundColor': '#f8fafc', 'fontWeight': '600'}),
+        dict(number, field='capacity_used', headerName='Used'),
+        dict(number, field='capacity_percent', headerName='Capacity %',
+             valueFormatter={'function': 'params.value + "%"'}),
+    ]
+    return dag.AgGrid(
+        id='control-grid',
+        columnDefs=column_defs,
+        defaultColDef={'sortable': True, 'filter': True, 'resizable': True},
+        dashGridOptions={
+            'stopEditingWhenCellsLoseFocus': True,
+            'undoRedoCellEditing': True,
+            'enterNavigatesVerticallyAfterEdit': True,
+            'animateRows': False,
+            'rowHeight': 36,
+            'headerHeight': 40
+        },
+        getRowId='params.data.id',
+        rowData=[],
+        className='ag-theme-alpine',
+        style={'height': '560px', 'width': '100%'}
+    )
+
+
+@cached_layout
 def create_control_layout():
     """Create the control table page layout"""
     return html.Div([
         html.H4("Control Table", className="mb-3"),
-        html.P("View and manage control settings.", className="text-muted"),
-        html.Div("Control table content will be implemented here.", 
-                className="bg-white p-4 rounded shadow-sm card-animate")
-    ], className="control-page page-container", style={'paddingLeft': '60px', 'paddingTop': '20px', 'paddingRight': '20px'})
\ No newline at end of file
+        html.P("Edit territory capacity targets. Changes are saved automatically in batches.", className="text-muted"),
+        html.Div([
+            _create_control_filters(),
+            _create_control_grid(),
+            html.Small(id='control-save-status', className="text-muted d-block mt-2"),
+            # Edits waiting to be sent (one per cell), the batch sent last and the last batch the server applied
+            dcc.Store(id='control-pending', data={}),
+            dcc.Store(id='control-batch', data=None),
+            dcc.Store(id='control-ack', data=None),
+            dcc.Interval(id='control-flush', interval=FLUSH_INTERVAL, n_intervals=0)
+        ], className="bg-white p-4 rounded shadow-sm card-animate")
+    ], className="control-page page-container", style={'paddingLeft': '60px', 'paddingTop': '20px', 'paddingRight': '20px'})
@@ -1,10 +1,98 @@
-from dash import html
+import plotly.graph_objects as go
+from dash import html, dcc
+import dash_bootstrap_components as dbc
+from components.filters.filters import DEFAULT_FILTER_VALUES
+from services.layout.layout_cache import cached_layout
+from services.store.capacity_store import get_capacity_store
 
+# Hierarchy levels pacing can be broken down by
+PACING_LEVELS = {'tm_area': 'Area', 'tm_region': 'Region', 'tm_division': 'Division', 'tm_territory': 'Territory'}
+
+# Nodes shown in the pacing breakdown, lowest pacing first
+BREAKDOWN_NODES = 20
+
+
+@cached_layout
+def _create_cycle_controls():
+    """Cycle and breakdown level controls; options only change when the store is reloaded"""
+    cycles = get_capacity_store().categorical['cycle'].categories
+    return dbc.Row([
+        dbc.Col(dcc.Dropdown(id='cycle-select-dropdown', options=cycles,
+                             value=DEFAULT_FILTER_VALUES['cycle'][0], clearable=False), width=3),
+        dbc.Col(dbc.RadioItems(id='cycle-level-radio', value='tm_region', inline=True,
+                               options=[{'label': label, 'value': level} for level, label in PACING_LEVELS.items()]),
+                width=9, className="d-flex align-items-center")
+    ], className="g-3 mb-4")
+
+
+def _stat_card(value, label):
+    return dbc.Col(html.Div([
+        html.H3(value, className="mb-1"),
+        html.P(label, className="text-muted mb-0")
+    ], className="bg-white p-3 rounded shadow-sm text-center"), md=4)
+
+
+def create_cycle_stats(activity, cycle):
+    """Cycle pacing, days of activity landed and the latest day"""
+    last_day = activity.last_day
+    return dbc.Row([
+        _stat_card(f"{activity.cycle_pacing(cycle)}%", f"{cycle} Pacing"),
+        _stat_card(f"{len(activity.partitions)}", "Days Loaded"),
+        _stat_card(last_day.strftime('%b %d, %Y') if last_day else "-", "Latest Activity"),
+    ], className="g-3 mb-4")
+
+
+def create_pacing_breakdown_figure(activity, cycle, level):
+    """Bar chart of pacing per node of a hierarchy level, lowest pacing first"""
+    labels, _, _, percents = activity.level_pacing(cycle, level)
+    ranked = sorted(zip(percents, labels))[:BREAKDOWN_NODES]
+    fig = go.Figure(go.Bar(
+        x=[percent for percent, _ in ranked],
+        y=[label.split(' - ', 1)[-1] for _, label in ranked],
+        orientation='h',
+        marker_color=['#ff9800' if percent < 50 else '#4caf50' for percent, _ in ranked],
+        text=[f'{percent}%' for percent, _ in ranked],
+        textposition='auto'
+    ))
+    fig.update_layout(
+        title=f'Pacing by {PACING_LEVELS[level]}',
+        xaxis_title='Pacing %',
+        yaxis=dict(autorange='reversed'),
+        plot_bgcolor='white',
+        height=max(300, 28 * len(ranked) + 100),
+        margin=dict(l=160, r=20, t=50, b=40)
+    )
+    return fig
+
+
+def create_pacing_trend_figure(activity, cycle):
+    """Cumulative pacing of a cycle over the landed days"""
+    days, pacing = activity.cycle_trend(cycle)
+    fig = go.Figure(go.Scatter(x=days, y=pacing, mode='lines', line=dict(color='#1e3c72', width=2),
+                               fill='tozeroy', fillcolor='rgba(30, 60, 114, 0.1)',
+                               hovertemplate='%{x|%b %d}: %{y}%<extra></extra>'))
+    fig.update_layout(
+        title='Cumulative Pacing',
+        yaxis_title='Pacing %',
+        plot_bgcolor='white',
+        height=300,
+        margin=dict(l=40, r=20, t=50, b=40)
+    )
+    return fig
+
+
+@cached_layout
 def create_cycle_layout():
     """Create the cycle management page layout"""
     return html.Div([
         html.H4("Cycle Management", className="mb-3"),
         html.P("Manage your trading cycles.", className="text-muted"),
-        html.Div("Cycle management content will be implemented here.", 
-                className="bg-white p-4 rounded shadow-sm card-animate")
-    ], className="cycle-page page-container", style={'paddingLeft': '60px', 'paddingTop': '20px', 'paddingRight': '20px'})
\ No newline at end of file
+        _create_cycle_controls(),
+        html.Div(id='cycle-stats'),
+        dbc.Row([
+            dbc.Col(html.Div(dcc.Graph(id='cycle-trend-graph', figure={}, config={'displayModeBar': False}),
+                             className="bg-white p-4 rounded shadow-sm card-animate"), md=6),
+            dbc.Col(html.Div(dcc.Graph(id='cycle-breakdown-graph', figure={}, config={'displayModeBar': False}),
+                             className="bg-white p-4 rounded shadow-sm card-animate"), md=6)
+        ], className="g-4")
+    ], className="cycle-page page-container", style={'paddingLeft': '60px', 'paddingTop': '20px', 'paddingRight': '20px'})
@@ -1,24 +1,90 @@
 from dash import html, dcc
 import dash_bootstrap_components as dbc
-from components.filters.filters import create_filters_section
+from components.filters.filters import create_filters_section, default_selection
 from components.map.map_component import create_choropleth_map, create_map_controls
 from components.grid.grid_component import create_capacity_grid
+from components.graph.graph_component import create_capacity_graph
+from services.layout.layout_cache import cached_layout
+from services.rollup.rollup_engine import get_rollup_engine
+
+@cached_layout
+def _create_filters_card():
+    """Filters section card; options only change when the store is reloaded"""
+    return html.Div([
+        create_filters_section()
+    ], className="filter-container mb-4", style={
+        'backgroundColor': 'white',
+        'padding': '24px',
+        'borderRadius': '8px',
+        'boxShadow': '0 1px 3px rgba(0,0,0,0.08)'
+    })
+
+
+@cached_layout
+def _create_map_header():
+    """Map title with the view buttons and the organize-by dropdown"""
+    view_buttons, organize_dropdown = create_map_controls()
+    return html.Div([
+        html.H5("By Map > North America", style={
+            'fontSize': '16px',
+            'fontWeight': '600',
+            'color': '#1e293b',
+            'marginBottom': '16px'
+        }),
+        
+        # Map controls
+        html.Div([
+            html.Div(view_buttons, className="me-3"),
+            html.Div([
+                html.Span("Organize data by: ", style={
+                    'fontSize': '14px',
+                    'color': '#64748b',
+                    'marginRight': '8px'
+                }),
+                organize_dropdown
+            ], style={'display': 'flex', 'alignItems': 'center'})
+        ], style={
+            'display': 'flex',
+            'alignItems': 'center',
+            'justifyContent': 'space-between',
+            'marginBottom': '16px'
+        }),
+    ], style={'marginBottom': '16px'})
+
+
+@cached_layout
+def _create_graph_container():
+    """Graph container (hidden by default); the chart is filled in by its callback"""
+    return html.Div(id='graph-container', children=[
+        create_capacity_graph()
+    ], style={'display': 'none'})
+
+
+@cached_layout
+def _create_grid_column():
+    """Grid column; the infinite row model requests its rows after render"""
+    return dbc.Col([
+        html.Div([
+            create_capacity_grid()
+        ], className="dashboard-card h-100")
+    ], width=6, className="mb-4")
+
 
 def create_overview_layout():
-    """Create the overview page layout"""
+    """Create the overview page layout
+    
+    Only the map carries data in the initial render; everything else is
+    built once per worker and shared.
+    """
+    
+    # State/area rollup for the default filter selection
+    rollup = get_rollup_engine().rollup(default_selection())
     
     layout = html.Div([
         # Main container with proper spacing
         html.Div([
             # Filters section
-            html.Div([
-                create_filters_section()
-            ], className="filter-container mb-4", style={
-                'backgroundColor': 'white',
-                'padding': '24px',
-                'borderRadius': '8px',
-                'boxShadow': '0 1px 3px rgba(0,0,0,0.08)'
-            }),
+            _create_filters_card(),
             
             # Map and Grid Row
             dbc.Row([
@@ -26,49 +92,20 @@ def create_overview_layout():
                 dbc.Col([
                     html.Div([
                         # Map Header
-                        html.Div([
-                            html.H5("By Map > North America", style={
-                                'fontSize': '16px',
-                                'fontWeight': '600',
-                                'color': '#1e293b',
-                                'marginBottom': '16px'
-                            }),
-                            
-                            # Map controls
-                            html.Div([
-                                html.Div(create_map_controls()[0], className="me-3"),
-                                html.Div([
-                                    html.Span("Organize data by: ", style={
-                                        'fontSize': '14px',
-                                        'color': '#64748b',
-                                        'marginRight': '8px'
-                                    }),
-                                    create_map_controls()[1]
-                                ], style={'display': 'flex', 'alignItems': 'center'})
-                            ], style={
-                                'display': 'flex',
-                                'alignItems': 'center',
-                                'justifyContent': 'space-between',
-                                'marginBottom': '16px'
-                            }),
-                        ], style={'marginBottom': '16px'}),
+                        _create_map_header(),
                         
                         # Map container
                         html.Div(id='map-container', children=[
-                            create_choropleth_map()
+                            create_choropleth_map(rollup)
                         ], className="map-wrapper"),
                         
                         # Graph container (hidden by default)
-                        html.Div(id='graph-container', style={'display': 'none'})
+                        _create_graph_container()
                     ], className="dashboard-card h-100")
                 ], width=6, className="mb-4"),
                 
                 # Grid Column
-                dbc.Col([
-                    html.Div([
-                        create_capacity_grid()
-                    ], className="dashboard-card h-100")
-                ], width=6, className="mb-4")
+                _create_grid_column()
             ], className="g-4")
         ], style={
             'paddingLeft': '60px',
@@ -80,4 +117,4 @@ def create_overview_layout():
         })
     ], className="overview-page page-enter")
     
-    return layout
\ No newline at end of file
+    return layout
@@ -0,0 +1,306 @@
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from services.hierarchy.hierarchy_index import get_hierarchy_index
+from services.store.capacity_store import NUMERIC_COLUMNS, get_capacity_store
+
+logger = logging.getLogger(__name__)
+
+# Folder of daily activity partitions, one YYYY-MM-DD.npz file per day with 'ids' and 'counts' arrays;
+# demo activity is generated when it is not set
+ACTIVITY_DATA_DIR = os.environ.get('ACTIVITY_DATA_DIR')
+
+# Seconds between scans of ACTIVITY_DATA_DIR for new or rewritten days
+REFRESH_INTERVAL = 60
+
+# Partition files modified less than this many seconds before a scan are left for the next one, so every
+# file older than a worker's stamp has landed there (see ActivityStore.stamp)
+REFRESH_SETTLE = 2.0
+
+# Ingests whose changed rows are remembered for clients catching up (see ActivityStore.changes_since)
+INGEST_HISTORY = 64
+
+# One day of activity: capacity store row positions and the activity count landed on each
+DayPartition = namedtuple('DayPartition', ['day', 'rows', 'counts'])
+
+
+def write_partition(day, ids, counts, directory=ACTIVITY_DATA_DIR):
+    """Write one day's activity (capacity row ids and counts) as a partition file"""
+    path = os.path.join(directory, f'{day.isoformat()}.npz')
+    # Written under a temporary name and renamed, so readers never see a partial file
+    partial = path + '.partial.npz'
+    np.savez(partial, ids=np.asarray(ids, dtype=np.int64), counts=np.asarray(counts, dtype=np.int32))
+    os.replace(partial, path)
+    return path
+
+
+class ActivityStore:
+    """Daily activity partitions with running cumulative totals
+
+    Cumulative activity is kept per capacity row (cycle x activity x
+    territory) and per cycle and hierarchy node on every level. Landing
+    a day - or replacing a day already landed - folds just that day's
+    rows into the totals, so pacing never recomputes from the start of
+    the cycle. Row pacing (cumulative activity / capacity target) is
+    written back to the capacity store's pacing_percent column. Cycle and
+    node targets, and row pacing, follow the store's capacity_target updates.
+    """
+
+    def __init__(self, store, hierarchy):
+        self.store = store
+        self.partitions = {}
+        # Modification time of the newest partition file landed. Every worker lands the same files, so
+        # the stamp means the same landed activity in all of them
+        self.stamp = 0.0
+        # (stamp, row positions) of the latest ingests, and the stamp before the oldest one kept
+        self._history = deque()
+        self._history_floor = 0.0
+        self.lock = threading.Lock()
+        self._seen_files = {}
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+
+        # Targets are read and the listener registered under the store lock, so no update is missed
+        with store.lock:
+            cycles = store.categorical['cycle']
+            self.cycle_codes = cycles.codes.astype(np.int64)
+            n_cycles = len(cycles.categories)
+            target = store.numeric['capacity_target'].astype(np.float64)
+            self.cumulative = np.zeros(len(store), dtype=np.float64)
+            self.cycle_target = np.bincount(self.cycle_codes, weights=target, minlength=n_cycles)
+            # Per-cycle activity of each landed day, for the cycle trend
+            self.daily = {}
+
+            # Hierarchy node of every row on each level, and cycle x node totals
+            self.levels = {}
+            for level in hierarchy.levels:
+                nodes = np.empty(len(store), dtype=np.int64)
+                nodes[level.row_order] = np.repeat(np.arange(len(level)), np.diff(level.row_offsets))
+                cells = self.cycle_codes * len(level) + nodes
+                self.levels[level.name] = {
+                    'level': level,
+                    'nodes': nodes,
+                    'activity': np.zeros((n_cycles, len(level))),
+                    'target': np.bincount(cells, weights=target, minlength=n_cycles * len(level)).reshape(n_cycles, -1),
+                }
+            # Imports and control edits change capacity_target; keep the cycle and node targets in step
+            store.subscribe(self._on_change)
+
+    def _on_change(self, change):
+        """Add a store RowChange's capacity_target deltas to the cycle and hierarchy node targets
+
+        The changed rows' pacing_percent is recomputed against their new
+        targets too. Listeners run while the store is written under its
+        lock, so the values are set in place rather than through update_rows.
+        """
+        if 'capacity_target' not in change.new:
+            return
+        rows = change.rows
+        delta = change.new['capacity_target'].astype(np.float64) - change.old['capacity_target']
+        cycles = self.cycle_codes[rows]
+        with self.lock:
+            np.add.at(self.cycle_target, cycles, delta)
+            for totals in self.levels.values():
+                np.add.at(totals['target'], (cycles, totals['nodes'][rows]), delta)
+            self.store.numeric['pacing_percent'][rows] = self.pacing(rows)
+
+    def _fold(self, partition, sign):
+        """Add (sign=1) or take out (sign=-1) one day's activity from every running total"""
+        rows, counts = partition.rows, sign * partition.counts.astype(np.float64)
+        np.add.at(self.cumulative, rows, counts)
+        cycles = self.cycle_codes[rows]
+        for totals in self.levels.values():
+            np.add.at(totals['activity'], (cycles, totals['nodes'][rows]), counts)
+        if sign > 0:
+            self.daily[partition.day] = np.bincount(cycles, weights=counts, minlength=len(self.cycle_target))
+        else:
+            self.daily.pop(partition.day, None)
+
+    def _partition(self, day, ids, counts):
+        """DayPartition for known capacity row ids, summing repeated ids"""
+        ids = np.asarray(ids, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        known = np.fromiter((self.store.positions.get(i, -1) for i in ids.tolist()), dtype=np.int64, count=len(ids))
+        if (known < 0).any():
+            logger.warning('Activity for %s: skipped %d rows with unknown ids', day, int((known < 0).sum()))
+        rows, inverse = np.unique(known[known >= 0], return_inverse=True)
+        return DayPartition(day, rows, np.bincount(inverse, weights=counts[known >= 0], minlength=len(rows)).astype(np.int32))
+
+    def ingest(self, days, stamp=0.0):
+        """Land days of activity, each as (day, capacity row ids, counts)
+
+        A day that was already landed is replaced: its old counts are taken
+        out of the totals before the new ones go in. Only the rows of the
+        given days are touched. ``stamp`` is the modification time of the
+        newest partition file landed. Returns the row positions whose pacing
+        changed.
+        """
+        touched = []
+        with self.lock:
+            for day, ids, counts in days:
+                partition = self._partition(day, ids, counts)
+                previous = self.partitions.get(day)
+                if previous is not None:
+                    self._fold(previous, -1)
+                    touched.append(previous.rows)
+                self._fold(partition, 1)
+                self.partitions[day] = partition
+                touched.append(partition.rows)
+            if not touched:
+                return np.empty(0, dtype=np.int64)
+            rows = np.unique(np.concatenate(touched))
+            self.stamp = max(self.stamp, stamp)
+            self._history.append((self.stamp, rows))
+            if len(self._history) > INGEST_HISTORY:
+                self._history_floor = self._history.popleft()[0]
+            percents = self.pacing(rows)
+        # Feed the store's pacing_percent (the grid's and row details' "YTD Pacing")
+        self.store.update_rows(self.store.ids[rows].tolist(), pacing_percent=percents)
+        return rows
+
+    def changes_since(self, stamp):
+        """Row positions whose pacing changed in ingests after ``stamp``, or None when they are no longer kept"""
+        with self.lock:
+            if stamp < self._history_floor:
+                return None
+            changed = [rows for ingest_stamp, rows in self._history if ingest_stamp > stamp]
+        return np.unique(np.concatenate(changed)) if changed else np.empty(0, dtype=np.int64)
+
+    def pacing(self, rows=None):
+        """Pacing % (cumulative activity / capacity target) of the given row positions"""
+        cumulative = self.cumulative if rows is None else self.cumulative[rows]
+        target = self.store.numeric['capacity_target'] if rows is None else self.store.numeric['capacity_target'][rows]
+        percents = np.round(cumulative * 100 / np.maximum(target, 1))
+        return np.clip(percents, 0, np.iinfo(NUMERIC_COLUMNS['pacing_percent']).max)
+
+    def level_pacing(self, cycle, level_name):
+        """(labels, activity, target, pacing %) per node of a hierarchy level for one cycle
+
+        Reads the running totals, so the cost is the number of nodes on the level.
+        """
+        code = self.store.categorical['cycle'].encode(cycle)
+        totals = self.levels[level_name]
+        if code < 0:
+            return [], [], [], []
+        with self.lock:
+            activity = totals['activity'][code].copy()
+            target = totals['target'][code].copy()
+        present = np.flatnonzero(target)
+        categories = self.store.categorical[level_name].categories
+        labels = [categories[c] for c in totals['level'].labels[present].tolist()]
+        percents = np.round(activity[present] * 100 / target[present]).astype(int)
+        return labels, activity[present].tolist(), target[present].tolist(), percents.tolist()
+
+    def cycle_trend(self, cycle):
+        """(days, cumulative pacing %) of one cycle over the landed days"""
+        code = self.store.categorical['cycle'].encode(cycle)
+        if code < 0:
+            return [], []
+        with self.lock:
+            target = self.cycle_target[code]
+            days = sorted(self.daily)
+            activity = np.array([self.daily[day][code] for day in days])
+        if not target:
+            return [], []
+        pacing = np.cumsum(activity) * 100 / target
+        return days, np.round(pacing, 1).tolist()
+
+    def weekly_activity(self, rows):
+        """(week starts, cumulative activity) of the given row positions at the end of each landed week
+
+        Activity is shaped (len(rows), weeks); weeks start on Monday.
+        """
+        local = np.full(len(self.store), -1, dtype=np.int64)
+        local[rows] = np.arange(len(rows))
+        with self.lock:
+            partitions = [self.partitions[day] for day in sorted(self.partitions)]
+        weeks = sorted({day - datetime.timedelta(days=day.weekday()) for day in (p.day for p in partitions)})
+        activity = np.zeros((len(rows), len(weeks)))
+        week_index = {week: n for n, week in enumerate(weeks)}
+        for partition in partitions:
+            positions = local[partition.rows]
+            present = positions >= 0
+            week = week_index[partition.day - datetime.timedelta(days=partition.day.weekday())]
+            np.add.at(activity[:, week], positions[present], partition.counts[present])
+        return weeks, np.cumsum(activity, axis=1)
+
+    def cycle_pacing(self, cycle):
+        """Overall pacing % of one cycle"""
+        code = self.store.categorical['cycle'].encode(cycle)
+        if code < 0:
+            return 0
+        with self.lock:
+            target = self.cycle_target[code]
+            activity = self.levels['tm_area']['activity'][code].sum()
+        return round(activity * 100 / target) if target else 0
+
+    @property
+    def last_day(self):
+        """Most recent day landed, or None"""
+        return max(self.partitions) if self.partitions else None
+
+    def refresh(self, directory=ACTIVITY_DATA_DIR):
+        """Land partition files that are new or rewritten since the last scan"""
+        self._last_refresh = time.time()
+        if not directory or not os.path.isdir(directory):
+            return np.empty(0, dtype=np.int64)
+        settled = self._last_refresh - REFRESH_SETTLE
+        days, stamp = [], 0.0
+        for name in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(name)
+            if ext != '.npz' or stem.endswith('.partial'):
+                continue
+            path = os.path.join(directory, name)
+            mtime = os.path.getmtime(path)
+            if self._seen_files.get(name) == mtime or mtime > settled:
+                continue
+            try:
+                day = datetime.date.fromisoformat(stem)
+            except ValueError:
+                continue
+            with np.load(path) as data:
+                days.append((day, data['ids'], data['counts']))
+            self._seen_files[name] = mtime
+            stamp = max(stamp, mtime)
+        return self.ingest(days, stamp) if days else np.empty(0, dtype=np.int64)
+
+    def maybe_refresh(self):
+        """Scan for new days at most every REFRESH_INTERVAL seconds; skipped while another thread scans"""
+        if time.time() - self._last_refresh > REFRESH_INTERVAL and self._refresh_lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def load_activity_store(store, hierarchy):
+    """Activity store folded from ACTIVITY_DATA_DIR, or from demo activity matching the store's pacing"""
+    activity = ActivityStore(store, hierarchy)
+    if ACTIVITY_DATA_DIR:
+        activity.refresh()
+    else:
+        from services.store.demo_data import generate_demo_activity
+        activity.ingest(generate_demo_activity(store.ids, store.numeric['capacity_target'],
+                                               store.numeric['pacing_percent']))
+    return activity
+
+
+def get_activity_store():
+    """Return this worker's activity store, landing new partition files at most every REFRESH_INTERVAL"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = load_activity_store(get_capacity_store(), get_hierarchy_index())
+    _store.maybe_refresh()
+    return _store
@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+# Local user store: {email: {'name': ..., 'password_hash': ...}} with precomputed hashes
+USER_STORE_PATH = os.environ.get('USER_STORE_PATH', os.path.join(os.path.dirname(__file__), 'users.json'))
+
+# Password checks run concurrently per worker; further logins wait in a queue of bounded depth.
+# Each pending login holds a request thread, so the queue stays below the worker's threads
+# (GUNICORN_THREADS, see gunicorn.conf.py) and at least one thread is always free for other callbacks.
+LOGIN_WORKERS = int(os.environ.get('LOGIN_WORKERS', 2))
+LOGIN_QUEUE_LIMIT = int(os.environ.get('LOGIN_QUEUE_LIMIT', max(1, int(os.environ.get('GUNICORN_THREADS', 4)) - 1)))
+
+# Longest a request thread waits for its check before the login is reported as busy
+LOGIN_TIMEOUT = 2.0
+
+# Number of recent logins the latency figures cover
+LATENCY_WINDOW = 256
+
+# Outcomes of CredentialBackend.verify
+LOGIN_OK = 'ok'
+LOGIN_INVALID = 'invalid'
+LOGIN_BUSY = 'busy'
+
+
+def load_users(path=USER_STORE_PATH):
+    """Users from the local store, keyed by lower-cased email"""
+    with open(path) as f:
+        users = json.load(f)
+    return {email.lower(): user for email, user in users.items()}
+
+
+def add_user(email, name, password, path=USER_STORE_PATH):
+    """Hash ``password`` once and save the user to the local store"""
+    users = load_users(path) if os.path.exists(path) else {}
+    users[email.lower()] = {'name': name, 'password_hash': generate_password_hash(password)}
+    with open(path, 'w') as f:
+        json.dump(users, f, indent=4)
+        f.write('\n')
+
+
+class CredentialBackend:
+    """Verifies logins against the local user store on a bounded thread pool
+
+    ``check_password_hash`` is a deliberately slow KDF. Running it on a
+    small pool caps the CPU a burst of logins can take from a worker.
+    A login's request thread waits at most LOGIN_TIMEOUT for its check,
+    and the queue is capped below the worker's thread count, so excess
+    logins fail fast with LOGIN_BUSY while other callbacks keep a thread.
+    """
+
+    def __init__(self, users, workers=LOGIN_WORKERS, queue_limit=LOGIN_QUEUE_LIMIT):
+        self.users = users
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counts = {LOGIN_OK: 0, LOGIN_INVALID: 0, LOGIN_BUSY: 0}
+        # Unknown emails are checked against a real hash too, so they take as long as known ones
+        self._decoy_hash = next(iter(users.values()))['password_hash'] if users else None
+
+    def _check(self, email, password):
+        """Password check, run on the pool"""
+        user = self.users.get(email)
+        if user is None:
+            if self._decoy_hash is not None:
+                check_password_hash(self._decoy_hash, password)
+            return None
+        return user if check_password_hash(user['password_hash'], password) else None
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def verify(self, email, password, timeout=LOGIN_TIMEOUT):
+        """(outcome, user) for a login attempt; user is the store entry on LOGIN_OK"""
+        start = time.perf_counter()
+        email = (email or '').strip().lower()
+        with self._lock:
+            if self._pending >= self.queue_limit:
+                self._counts[LOGIN_BUSY] += 1
+                depth = self._pending
+                future = None
+            else:
+                self._pending += 1
+                depth = self._pending
+                future = self._executor.submit(self._check, email, password or '')
+        if future is None:
+            logger.warning('Login rejected, verification queue full (depth %d)', depth)
+            return LOGIN_BUSY, None
+
+        # A check stays queued or running after a timeout, so it only leaves the count when it finishes
+        future.add_done_callback(self._release)
+        try:
+            user = future.result(timeout=timeout)
+            outcome = LOGIN_OK if user is not None else LOGIN_INVALID
+        except FutureTimeoutError:
+            user, outcome = None, LOGIN_BUSY
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._counts[outcome] += 1
+            self._latencies.append(elapsed)
+        logger.info('Login %s in %.0f ms (queue depth %d)', outcome, elapsed * 1000, depth)
+        return outcome, user
+
+    def stats(self):
+        """Login latency percentiles (ms), current queue depth and outcome counts"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {'queue_depth': self._pending, 'queue_limit': self.queue_limit, **self._counts}
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        if latencies:
+            stats.update(latency_p50_ms=percentile(0.5), latency_p95_ms=percentile(0.95),
+                         latency_max_ms=round(latencies[-1] * 1000, 1))
+        return stats
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_credential_backend():
+    """Return this worker's credential backend, reading the user store on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = CredentialBackend(load_users())
+    return _backend
+
+
+if __name__ == '__main__':
+    import argparse
+    import getpass
+
+    parser = argparse.ArgumentParser(description='Add or update a user in the local user store')
+    parser.add_argument('email')
+    parser.add_argument('name')
+    args = parser.parse_args()
+    add_user(args.email, args.name, getpass.getpass())
+    print(f'Saved {args.email} to {USER_STORE_PATH}')
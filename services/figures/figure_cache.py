@@ -0,0 +1,63 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+# Number of complete figures kept per worker
+FIGURE_CACHE_SIZE = 64
+
+
+def view_key(*parts):
+    """Short, JSON-safe key for a figure's view parameters and data version"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+class FigureCache:
+    """Serialized Plotly figures keyed by view parameters and data version
+
+    Skeletons - the parts of a figure that never depend on data, like the
+    colorscale, projection, hover template and layout - are serialized once
+    per view. Complete figures are the skeleton plus one trace's data arrays
+    and are kept in a small LRU so repeated renders reuse them.
+    """
+
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._skeletons = {}
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def skeleton(self, name, build):
+        """Serialized figure JSON from ``build()``, built once per name"""
+        with self._lock:
+            skeleton = self._skeletons.get(name)
+        if skeleton is None:
+            skeleton = json.loads(build().to_json())
+            with self._lock:
+                skeleton = self._skeletons.setdefault(name, skeleton)
+        return skeleton
+
+    def figure(self, name, build, key, trace_data):
+        """Complete figure: skeleton ``name`` with ``trace_data()`` set on its first trace"""
+        with self._lock:
+            figure = self._figures.get((name, key))
+            if figure is not None:
+                self._figures.move_to_end((name, key))
+                return figure
+
+        skeleton = self.skeleton(name, build)
+        trace = dict(skeleton['data'][0], **trace_data())
+        figure = {'data': [trace] + skeleton['data'][1:], 'layout': skeleton['layout']}
+        with self._lock:
+            self._figures[(name, key)] = figure
+            if len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+        return figure
+
+
+_cache = FigureCache()
+
+
+def get_figure_cache():
+    """Return this worker's figure cache"""
+    return _cache
@@ -0,0 +1,122 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from services.store.capacity_store import gather_groups, get_capacity_store, group_rows
+
+# Store columns behind the six overview filters
+FILTER_DIMENSIONS = ('activity', 'cycle', 'tm_area', 'tm_region', 'tm_division', 'tm_territory')
+
+# Dense bitmaps are kept per dimension up to this many bytes; above it (high-cardinality
+# columns like tm_territory) each value keeps a sorted posting list instead
+DENSE_BITMAP_BUDGET = 64 * 1024 * 1024
+
+# Number of recent selections whose results are kept
+RESULT_CACHE_SIZE = 32
+
+
+def selection_key(selection):
+    """Hashable, order-independent key for a filter selection"""
+    return tuple(sorted((name, tuple(sorted(values))) for name, values in selection.items() if values))
+
+
+class FilterDimension:
+    """Per-value bitsets for one filter column"""
+
+    def __init__(self, codes, size, n_rows):
+        self.n_rows = n_rows
+        n_bytes = (n_rows + 7) // 8
+        self.order, self.offsets = group_rows(codes, size)
+        if size * n_bytes <= DENSE_BITMAP_BUDGET:
+            # One packed bitset per distinct value
+            self.bitmaps = np.zeros((size, n_bytes), dtype=np.uint8)
+            mask = np.zeros(n_rows, dtype=bool)
+            for code in range(size):
+                rows = self.order[self.offsets[code]:self.offsets[code + 1]]
+                mask[rows] = True
+                self.bitmaps[code] = np.packbits(mask, bitorder='little')
+                mask[rows] = False
+        else:
+            self.bitmaps = None
+
+    def union(self, codes):
+        """Packed bitset of the rows carrying any of the given codes (OR)"""
+        if self.bitmaps is not None:
+            return np.bitwise_or.reduce(self.bitmaps[codes], axis=0)
+        # Sparse dimension: set bits from the posting lists of the selected values only
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[gather_groups(self.order, self.offsets, codes)] = True
+        return np.packbits(mask, bitorder='little')
+
+
+class FilterEngine:
+    """Bitmap-indexed evaluation of the overview's AND-of-ORs filter selections
+
+    Each dimension is ORed across its selected values and the dimensions
+    are ANDed together, all on packed bitsets. The resulting row positions
+    feed the grid, the map and the graph.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.dimensions = {
+            name: FilterDimension(store.categorical[name].codes, len(store.categorical[name].categories), len(store))
+            for name in FILTER_DIMENSIONS
+        }
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bitmap(self, selection):
+        """Packed bitset of the rows matching ``selection``, or None when nothing is selected"""
+        result = None
+        for name, values in selection.items():
+            if not values:
+                continue
+            codes = self.store.categorical[name].encode_many(values)
+            if not codes:
+                # Only unknown values selected: nothing can match
+                return np.zeros((len(self.store) + 7) // 8, dtype=np.uint8)
+            bits = self.dimensions[name].union(codes)
+            result = bits if result is None else np.bitwise_and(result, bits, out=result)
+        return result
+
+    def select(self, selection):
+        """Sorted row positions matching an AND-of-ORs selection {column: [values]}
+
+        Columns with an empty value list do not restrict the result.
+        """
+        # Results are keyed by the selection alone, not the store version: updates only touch
+        # numeric columns, never the codes the bitmaps index, so a cached result survives them
+        key = selection_key(selection)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        bits = self.bitmap(selection)
+        if bits is None:
+            rows = np.arange(len(self.store))
+        else:
+            rows = np.flatnonzero(np.unpackbits(bits, count=len(self.store), bitorder='little'))
+        rows.flags.writeable = False
+
+        with self._lock:
+            self._results[key] = rows
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return rows
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_filter_engine():
+    """Return this worker's filter engine, building its bitmaps on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = FilterEngine(get_capacity_store())
+    return _engine
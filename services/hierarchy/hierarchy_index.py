@@ -0,0 +1,141 @@
+import threading
+
+import numpy as np
+
+from services.store.capacity_store import gather_groups, get_capacity_store, group_rows
+
+# Hierarchy levels from the top down, named after the grid's tm_* fields
+LEVELS = ('tm_area', 'tm_region', 'tm_division', 'tm_territory')
+
+
+class HierarchyLevel:
+    """Nodes of one hierarchy level, one node per distinct path from the top level"""
+
+    def __init__(self, name, labels, parents, row_order, row_offsets):
+        self.name = name
+        # Category code of each node's own label
+        self.labels = labels
+        # Node id of each node's parent on the level above (-1 on the top level)
+        self.parents = parents
+        # Rows under each node, grouped CSR-style
+        self.row_order = row_order
+        self.row_offsets = row_offsets
+        # Child nodes on the level below and nodes per label, filled in by HierarchyIndex
+        self.child_order = None
+        self.child_offsets = None
+        self.label_order = None
+        self.label_offsets = None
+
+    def __len__(self):
+        return len(self.labels)
+
+    def rows(self, nodes):
+        """Row positions under the given nodes"""
+        return gather_groups(self.row_order, self.row_offsets, nodes)
+
+    def children(self, nodes):
+        """Node ids on the level below under the given nodes"""
+        return gather_groups(self.child_order, self.child_offsets, nodes)
+
+    def with_labels(self, codes):
+        """Node ids carrying any of the given label codes"""
+        return gather_groups(self.label_order, self.label_offsets, codes)
+
+
+class HierarchyIndex:
+    """Parent/child index over Area -> Region -> Division -> Territory
+
+    Built once from the capacity store so cascading filter options and the
+    matching rows resolve in time proportional to the result, not the table.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.levels = []
+        path = np.zeros(len(store), dtype=np.int64)
+        parent_nodes = None
+        for name in LEVELS:
+            column = store.categorical[name]
+            # Extend each row's path key with this level's code and number the distinct paths
+            path = path * (len(column.categories) + 1) + column.codes
+            node_paths, row_nodes = np.unique(path, return_inverse=True)
+            path = np.arange(len(node_paths), dtype=np.int64)[row_nodes]
+
+            # Any row of a node carries its label and its parent node
+            some_row = np.empty(len(node_paths), dtype=np.int64)
+            some_row[row_nodes] = np.arange(len(store))
+            labels = column.codes[some_row]
+            parents = parent_nodes[some_row] if parent_nodes is not None else np.full(len(node_paths), -1)
+
+            level = HierarchyLevel(name, labels, parents, *group_rows(row_nodes, len(node_paths)))
+            level.label_order, level.label_offsets = group_rows(labels, len(column.categories))
+            if self.levels:
+                above = self.levels[-1]
+                above.child_order, above.child_offsets = group_rows(parents, len(above))
+            self.levels.append(level)
+            parent_nodes = row_nodes
+
+        # Options shown when nothing above a level is selected
+        self._all_options = [self._labels_of(level, None) for level in self.levels]
+
+    def _labels_of(self, level, nodes):
+        """Sorted distinct label strings of the given nodes (all nodes when None)"""
+        labels = level.labels if nodes is None else level.labels[nodes]
+        categories = self.store.categorical[level.name].categories
+        # Codes are numbered in sorted category order
+        return [categories[c] for c in np.unique(labels).tolist()]
+
+    def resolve(self, selection, with_rows=False):
+        """Resolve multi-select values per level into options, valid values and, optionally, rows
+
+        ``selection`` maps level names to selected labels. Returns a dict with
+        'options' and 'values' per level. With ``with_rows`` it also holds
+        'rows' - the matching row positions, or None when no level restricts
+        the rows. Selected values that no longer fit under the levels above
+        are dropped.
+        """
+        options, values = {}, {}
+        active = None
+        selected_level, selected_nodes = None, None
+        for i, level in enumerate(self.levels):
+            if active is None:
+                candidates = None
+                options[level.name] = self._all_options[i]
+            else:
+                candidates = self.levels[i - 1].children(active)
+                options[level.name] = self._labels_of(level, candidates)
+
+            codes = self.store.categorical[level.name].encode_many(selection.get(level.name) or [])
+            chosen = None
+            if codes:
+                if candidates is None:
+                    chosen = level.with_labels(codes)
+                else:
+                    chosen = candidates[np.isin(level.labels[candidates], codes)]
+
+            if chosen is not None and len(chosen):
+                values[level.name] = self._labels_of(level, chosen)
+                active = chosen
+                selected_level, selected_nodes = level, chosen
+            else:
+                values[level.name] = []
+                active = candidates
+
+        result = {'options': options, 'values': values}
+        if with_rows:
+            result['rows'] = None if selected_level is None else np.sort(selected_level.rows(selected_nodes))
+        return result
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_hierarchy_index():
+    """Return this worker's hierarchy index, building it on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = HierarchyIndex(get_capacity_store())
+    return _index
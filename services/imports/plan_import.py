@@ -0,0 +1,258 @@
+import os
+import re
+import secrets
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from services.store.capacity_store import MAX_CAPACITY_PERCENT, NUMERIC_COLUMNS
+from services.store.change_log import get_change_log
+
+# Uploaded plan files wait here until their import job has read them
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'reynolds-uploads'))
+
+# Largest upload accepted, and the size of the pieces it is written to disk in
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 256 * 1024 * 1024))
+UPLOAD_BUFFER_BYTES = 1024 * 1024
+
+# Rows parsed, validated and applied at a time; bounds the import's memory whatever the file size
+CHUNK_ROWS = 20000
+
+# Row errors kept for the report; every error is still counted
+MAX_REPORTED_ERRORS = 200
+
+UPLOAD_EXTENSIONS = ('.csv', '.xlsx')
+
+# Plan file header names (lower-cased, spaces as underscores) and the field each one fills
+HEADER_ALIASES = {
+    'cycle': 'cycle',
+    'activity': 'activity',
+    'territory': 'territory',
+    'tm_territory': 'territory',
+    'planned': 'planned',
+    'planned_activity': 'planned',
+    'capacity_used': 'planned',
+    'target': 'target',
+    'capacity_target': 'target',
+}
+REQUIRED_FIELDS = ('cycle', 'activity', 'territory', 'planned')
+
+# Largest planned activity and target a row can hold
+MAX_PLANNED = int(np.iinfo(NUMERIC_COLUMNS['capacity_used']).max)
+MAX_TARGET = int(np.iinfo(NUMERIC_COLUMNS['capacity_target']).max)
+
+# What a plan row can be checked against: the store's categories and its sorted
+# (cycle, activity, territory) keys with the matching row ids and current targets, and the
+# fingerprint of the base data the row ids belong to
+PlanIndex = namedtuple('PlanIndex', ['cycles', 'activities', 'territories', 'keys', 'ids', 'targets', 'fingerprint'])
+
+
+def plan_index(store):
+    """PlanIndex of a capacity store; small enough to send to an import job"""
+    cycle, activity, territory = (store.categorical[name] for name in ('cycle', 'activity', 'tm_territory'))
+    keys = ((cycle.codes.astype(np.int64) * len(activity.categories) + activity.codes)
+            * len(territory.categories) + territory.codes)
+    order = np.argsort(keys, kind='stable')
+    return PlanIndex(cycle.categories, activity.categories, territory.categories, keys[order], store.ids[order],
+                     store.numeric['capacity_target'][order], store.fingerprint)
+
+
+def save_upload(stream, name, size=None):
+    """Stream an uploaded plan file to UPLOAD_DIR piece by piece; returns {'upload_id', 'name', 'size'}
+
+    Raises ValueError for unsupported or oversized files.
+    """
+    extension = os.path.splitext(name or '')[1].lower()
+    if extension not in UPLOAD_EXTENSIONS:
+        raise ValueError(f'Upload a {" or ".join(UPLOAD_EXTENSIONS)} file')
+    if size is not None and size > MAX_UPLOAD_BYTES:
+        raise ValueError(f'Files up to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB can be imported')
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    upload_id = secrets.token_hex(16) + extension
+    path = os.path.join(UPLOAD_DIR, upload_id)
+    written = 0
+    with open(path, 'wb') as f:
+        while True:
+            piece = stream.read(UPLOAD_BUFFER_BYTES)
+            if not piece:
+                break
+            written += len(piece)
+            if written > MAX_UPLOAD_BYTES:
+                f.close()
+                os.remove(path)
+                raise ValueError(f'Files up to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB can be imported')
+            f.write(piece)
+    return {'upload_id': upload_id, 'name': os.path.basename(name), 'size': written}
+
+
+def upload_path(upload_id):
+    """Path of a saved upload; upload IDs are checked so they cannot point outside UPLOAD_DIR"""
+    if not re.fullmatch(r'[0-9a-f]{32}\.(csv|xlsx)', upload_id or ''):
+        raise ValueError('Unknown upload')
+    return os.path.join(UPLOAD_DIR, upload_id)
+
+
+def _normalize_header(names):
+    """{file column: field} for the recognized columns; raises ValueError when a required one is missing"""
+    fields = {}
+    for name in names:
+        field = HEADER_ALIASES.get(re.sub(r'\s+', '_', str(name).strip().lower()))
+        if field is not None and field not in fields.values():
+            fields[name] = field
+    missing = [field for field in REQUIRED_FIELDS if field not in fields.values()]
+    if missing:
+        raise ValueError(f'Missing column{"s" if len(missing) > 1 else ""}: {", ".join(missing)}')
+    return fields
+
+
+def _read_csv_chunks(path):
+    """(chunk, fraction of the file read) per CHUNK_ROWS rows of a CSV file"""
+    size = max(os.path.getsize(path), 1)
+    with open(path, 'rb') as f:
+        reader = pd.read_csv(f, chunksize=CHUNK_ROWS, dtype=str, keep_default_na=False,
+                             skipinitialspace=True, encoding='utf-8-sig')
+        for chunk in reader:
+            yield chunk, min(f.tell() / size, 1.0)
+
+
+def _read_xlsx_chunks(path):
+    """(chunk, fraction of the sheet read) per CHUNK_ROWS rows of the first sheet of an Excel file"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Excel imports need openpyxl installed; upload a CSV file instead')
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        total = max((sheet.max_row or 1) - 1, 1)
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(value) if value is not None else '' for value in next(rows, [])]
+        batch, read = [], 0
+        for row in rows:
+            batch.append(['' if value is None else str(value) for value in row])
+            if len(batch) == CHUNK_ROWS:
+                read += len(batch)
+                yield pd.DataFrame(batch, columns=header), min(read / total, 1.0)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header), 1.0
+    finally:
+        workbook.close()
+
+
+def read_chunks(path):
+    """Plan file chunks as string DataFrames with their read progress"""
+    if path.endswith('.xlsx'):
+        return _read_xlsx_chunks(path)
+    return _read_csv_chunks(path)
+
+
+def _codes(values, categories):
+    """Category codes of stripped string values; -1 for values not in ``categories``"""
+    return pd.Categorical(values.str.strip(), categories=categories).codes.astype(np.int64)
+
+
+def validate_chunk(frame, fields, index, first_line):
+    """Check a chunk of plan rows against the store
+
+    Returns (ids, planned, target, errors): the capacity row ids, planned
+    activity and target (NaN where not given) of the valid rows, and
+    (file line, message) for every invalid row. A row is valid when its
+    territory is in the hierarchy, its activity and cycle exist, the
+    territory plans that activity in that cycle, its numbers are whole
+    numbers within the store's column ranges, and the capacity % they give
+    (against the current target when none is given) fits the store.
+    """
+    frame = frame.rename(columns=fields)
+    n = len(frame)
+    cycle = _codes(frame['cycle'], index.cycles)
+    activity = _codes(frame['activity'], index.activities)
+    territory = _codes(frame['territory'], index.territories)
+
+    keys = (cycle * len(index.activities) + activity) * len(index.territories) + territory
+    slots = np.minimum(np.searchsorted(index.keys, keys), len(index.keys) - 1)
+    planned_row = (index.keys[slots] == keys) & (cycle >= 0) & (activity >= 0) & (territory >= 0)
+
+    planned = pd.to_numeric(frame['planned'].str.strip(), errors='coerce').to_numpy(dtype=np.float64)
+    planned_ok = np.isfinite(planned) & (planned >= 0) & (planned == np.round(planned)) & (planned <= MAX_PLANNED)
+    if 'target' in frame:
+        target_text = frame['target'].str.strip()
+        target = pd.to_numeric(target_text, errors='coerce').to_numpy(dtype=np.float64)
+        # A blank target keeps the current one
+        target_ok = (target_text == '').to_numpy() | (np.isfinite(target) & (target > 0) & (target == np.round(target))
+                                                      & (target <= MAX_TARGET))
+    else:
+        target = np.full(n, np.nan)
+        target_ok = np.ones(n, dtype=bool)
+
+    # The derived capacity % has to fit the store too
+    effective_target = np.where(np.isnan(target), index.targets[slots], target)
+    with np.errstate(invalid='ignore'):
+        percent = np.round(planned * 100 / np.maximum(effective_target, 1))
+    percent_ok = ~(planned_ok & target_ok) | (percent <= MAX_CAPACITY_PERCENT)
+
+    valid = planned_row & planned_ok & target_ok & percent_ok
+    errors = []
+    for i in np.flatnonzero(~valid).tolist():
+        row = frame.iloc[i]
+        if territory[i] < 0:
+            message = f"Territory '{row['territory']}' is not in the hierarchy"
+        elif activity[i] < 0:
+            message = f"Unknown activity '{row['activity']}'"
+        elif cycle[i] < 0:
+            message = f"Unknown cycle '{row['cycle']}'"
+        elif not planned_row[i]:
+            message = f"'{row['activity']}' is not planned for {row['territory']} in {row['cycle']}"
+        elif not planned_ok[i]:
+            message = f"Planned activity '{row['planned']}' is not a whole number from 0 to {MAX_PLANNED:,}"
+        elif not target_ok[i]:
+            message = f"Target '{row['target']}' is not a whole number from 1 to {MAX_TARGET:,}"
+        else:
+            message = (f"Planned activity {int(planned[i]):,} against a target of {int(effective_target[i]):,} "
+                       f"is above the largest capacity of {MAX_CAPACITY_PERCENT:,}%")
+        errors.append((first_line + i, message))
+    return index.ids[slots[valid]], planned[valid], target[valid], errors
+
+
+def import_plan_job(progress, upload_id, index, source):
+    """Background job (see services/jobs) importing a saved plan upload chunk by chunk
+
+    Each chunk's valid rows are appended to the change log as one
+    transaction, which every worker's capacity store replays. Chunks
+    applied before a cancel stay applied. Returns the row, applied and
+    error counts with the first MAX_REPORTED_ERRORS errors.
+    """
+    path = upload_path(upload_id)
+    log = get_change_log()
+    rows = applied = error_count = 0
+    errors = []
+    try:
+        fields = None
+        for chunk, fraction in read_chunks(path):
+            if fields is None:
+                fields = _normalize_header(chunk.columns)
+            # Line 1 is the header
+            ids, planned, target, chunk_errors = validate_chunk(chunk, fields, index, rows + 2)
+            rows += len(chunk)
+            error_count += len(chunk_errors)
+            errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+            with_target = ~np.isnan(target)
+            batches = [(ids[~with_target], {'capacity_used': planned[~with_target].astype(np.int32)})]
+            if with_target.any():
+                batches.append((ids[with_target], {'capacity_used': planned[with_target].astype(np.int32),
+                                                   'capacity_target': target[with_target].astype(np.int32)}))
+            batches = [(batch_ids, values) for batch_ids, values in batches if len(batch_ids)]
+            if batches:
+                log.append_many(index.fingerprint, source, batches)
+            applied += len(ids)
+            progress(fraction, f'{rows:,} rows read, {applied:,} applied, {error_count:,} errors',
+                     {'errors': errors, 'error_count': error_count})
+        if fields is None:
+            raise ValueError('The file has no rows')
+    finally:
+        os.remove(path)
+    return {'rows': rows, 'applied': applied, 'error_count': error_count, 'errors': errors}
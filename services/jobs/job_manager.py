@@ -0,0 +1,254 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# SQLite file with the state of every job, shared by all workers and job processes on the machine
+JOBS_DB_PATH = os.environ.get('JOBS_DB_PATH', os.path.join(tempfile.gettempdir(), 'reynolds-jobs.sqlite3'))
+
+# Job processes per web worker
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+
+# Seconds a finished job's result is reused for identical submissions
+JOB_RESULT_TTL = 15 * 60
+
+# A running job's process touches its row this often; a row not touched for JOB_STALE_AFTER is a lost job
+JOB_HEARTBEAT = 5.0
+JOB_STALE_AFTER = 30.0
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    detail TEXT,
+    result TEXT,
+    error TEXT,
+    cancel INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    expires_at REAL
+)
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by its progress callback once the job is cancelled"""
+
+
+def job_key(name, *parts):
+    """Job ID for a job name and its parameters; identical submissions share it"""
+    return hashlib.sha1(repr((name,) + parts).encode()).hexdigest()[:20]
+
+
+class JobStore:
+    """Job rows in a local SQLite database, written by web workers and job processes alike"""
+
+    def __init__(self, path=JOBS_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute(_SCHEMA)
+
+    def _connect(self):
+        """This thread's connection, opened on first use (never shared across threads or processes)"""
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def claim(self, job_id, name):
+        """Queue ``job_id`` unless an identical job is active or has a fresh result; True when queued"""
+        now = time.time()
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute('SELECT status, updated_at, expires_at FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+            if row is not None:
+                status, updated_at, expires_at = row
+                if status in ACTIVE_STATES and now - updated_at < JOB_STALE_AFTER:
+                    return False
+                if status == JOB_DONE and expires_at > now:
+                    return False
+            db.execute('INSERT OR REPLACE INTO jobs (job_id, name, status, updated_at) VALUES (?, ?, ?, ?)',
+                       (job_id, name, JOB_QUEUED, now))
+            return True
+        finally:
+            db.execute('COMMIT')
+
+    def start(self, job_id):
+        """Mark a queued job running; False when it was cancelled while queued"""
+        cursor = self._connect().execute(
+            'UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ? AND status = ? AND cancel = 0',
+            (JOB_RUNNING, time.time(), job_id, JOB_QUEUED)
+        )
+        return cursor.rowcount == 1
+
+    def report(self, job_id, progress=None, message=None, detail=None):
+        """Record progress (or just a heartbeat) and return True once the job should stop"""
+        db = self._connect()
+        db.execute('UPDATE jobs SET progress = COALESCE(?, progress), message = COALESCE(?, message), '
+                   'detail = COALESCE(?, detail), updated_at = ? WHERE job_id = ?',
+                   (progress, message, None if detail is None else json.dumps(detail), time.time(), job_id))
+        row = db.execute('SELECT cancel FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return row is None or bool(row[0])
+
+    def finish(self, job_id, status, result=None, error=None):
+        """Record a job's outcome; results are kept for JOB_RESULT_TTL"""
+        now = time.time()
+        self._connect().execute(
+            'UPDATE jobs SET status = ?, progress = CASE WHEN ? THEN 1 ELSE progress END, result = ?, error = ?, '
+            'updated_at = ?, expires_at = ? WHERE job_id = ?',
+            (status, status == JOB_DONE, None if result is None else json.dumps(result), error,
+             now, now + JOB_RESULT_TTL, job_id)
+        )
+
+    def cancel(self, job_id):
+        """Ask a job to stop; a queued job is cancelled right away"""
+        db = self._connect()
+        db.execute('UPDATE jobs SET cancel = 1, updated_at = ? WHERE job_id = ? AND status IN (?, ?)',
+                   (time.time(), job_id) + ACTIVE_STATES)
+        db.execute('UPDATE jobs SET status = ?, expires_at = ? WHERE job_id = ? AND status = ?',
+                   (JOB_CANCELLED, time.time(), job_id, JOB_QUEUED))
+
+    def get(self, job_id):
+        """{'status', 'progress', 'message', 'detail', 'result', 'error'} of a job, or None when unknown
+
+        An active job whose process stopped sending heartbeats is reported as failed.
+        """
+        if not job_id:
+            return None
+        row = self._connect().execute(
+            'SELECT status, progress, message, detail, result, error, updated_at FROM jobs WHERE job_id = ?', (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, progress, message, detail, result, error, updated_at = row
+        if status in ACTIVE_STATES and time.time() - updated_at > JOB_STALE_AFTER:
+            status, error = JOB_FAILED, 'The job stopped responding'
+        return {'status': status, 'progress': progress, 'message': message,
+                'detail': None if detail is None else json.loads(detail),
+                'result': None if result is None else json.loads(result), 'error': error}
+
+    def sweep(self):
+        """Delete finished jobs whose results have expired"""
+        self._connect().execute('DELETE FROM jobs WHERE expires_at <= ?', (time.time(),))
+
+
+def _heartbeat(store, job_id, stop):
+    """Touch the job's row until ``stop`` is set, so a dead job process is noticed"""
+    while not stop.wait(JOB_HEARTBEAT):
+        store.report(job_id)
+
+
+def _run_job(path, job_id, func, args):
+    """Entry point of a job in a job process: run ``func(progress, *args)`` and record the outcome"""
+    store = JobStore(path)
+    if not store.start(job_id):
+        return
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(store, job_id, stop), daemon=True).start()
+
+    def progress(fraction, message=None, detail=None):
+        if store.report(job_id, fraction, message, detail):
+            raise JobCancelled()
+
+    try:
+        result = func(progress, *args)
+    except JobCancelled:
+        store.finish(job_id, JOB_CANCELLED)
+    except Exception as exc:
+        logger.exception('Job %s failed', job_id)
+        store.finish(job_id, JOB_FAILED, error=f'{type(exc).__name__}: {exc}')
+    else:
+        store.finish(job_id, JOB_DONE, result=result)
+    finally:
+        stop.set()
+
+
+class JobManager:
+    """Runs long jobs on a process pool outside the request threads
+
+    A job is a module-level function ``func(progress, *args)`` returning a
+    JSON-serializable result; ``progress(fraction, message, detail)``
+    reports how far it got (``detail`` is any JSON-serializable partial
+    output) and raises JobCancelled once the job is cancelled. Job state
+    lives in a JobStore, so any worker can report on or cancel a job that
+    another worker started, and identical submissions (same name and key)
+    share one job and its result.
+    """
+
+    def __init__(self, store, workers=JOB_WORKERS):
+        self.store = store
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self, reset=False):
+        with self._lock:
+            if self._pool is None or reset:
+                # Spawned, not forked: the web worker is multi-threaded
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def submit(self, name, key, func, *args):
+        """Start a job unless an identical one is running or recently finished; returns the job ID
+
+        ``key`` identifies the submission (e.g. the parameters and data
+        version) and must change whenever ``args`` would give a different
+        result.
+        """
+        job_id = job_key(name, key)
+        if self.store.claim(job_id, name):
+            self.store.sweep()
+            try:
+                self._executor().submit(_run_job, self.store.path, job_id, func, args)
+            except BrokenProcessPool:
+                # A job process died (e.g. killed for memory); start a fresh pool
+                self._executor(reset=True).submit(_run_job, self.store.path, job_id, func, args)
+        return job_id
+
+    def status(self, job_id):
+        """Current state of a job (see JobStore.get)"""
+        return self.store.get(job_id)
+
+    def cancel(self, job_id):
+        """Ask a job to stop; it ends as cancelled at its next progress report"""
+        if job_id:
+            self.store.cancel(job_id)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Return this worker's job manager, starting its process pool on first submission"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager(JobStore())
+    return _manager
@@ -0,0 +1,16 @@
+import functools
+
+
+def cached_layout(build):
+    """Build a static layout subtree once per worker and hand out the same tree after that
+
+    For builders whose output never depends on request or session data.
+    Components are only read when Dash serializes a response, so one tree
+    can be shared by every request; callers must not mutate it. Parts that
+    carry data (figures, user details) are built per request and placed
+    around or inside the cached parts by the caller. Filter options built
+    from the capacity store's categories are static too: the store is
+    loaded once per worker and updates never change its categories.
+    """
+    return functools.lru_cache(maxsize=None)(build)
+
@@ -0,0 +1,240 @@
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+# Database holding territories, cycles, activities and capacities: sqlite:///<path> or postgresql://...
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'reynolds.sqlite3'))
+
+# Rows sent per executemany call of a bulk write
+INSERT_BATCH_ROWS = 5000
+
+# Rows fetched per round trip when loading capacities
+FETCH_ROWS = 10000
+
+# Portable DDL: SQLite and PostgreSQL both accept it
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS cycles (
+        cycle_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )""",
+    """CREATE TABLE IF NOT EXISTS activities (
+        activity_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )""",
+    """CREATE TABLE IF NOT EXISTS territories (
+        territory_id INTEGER PRIMARY KEY,
+        area TEXT NOT NULL,
+        region TEXT NOT NULL,
+        division TEXT NOT NULL,
+        name TEXT NOT NULL UNIQUE,
+        state TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS capacities (
+        row_id BIGINT PRIMARY KEY,
+        cycle_id INTEGER NOT NULL REFERENCES cycles (cycle_id),
+        activity_id INTEGER NOT NULL REFERENCES activities (activity_id),
+        territory_id INTEGER NOT NULL REFERENCES territories (territory_id),
+        capacity_target INTEGER NOT NULL,
+        capacity_used INTEGER NOT NULL,
+        capacity_percent SMALLINT NOT NULL,
+        pacing_percent SMALLINT NOT NULL,
+        UNIQUE (cycle_id, activity_id, territory_id)
+    )""",
+    'CREATE INDEX IF NOT EXISTS capacities_territory ON capacities (territory_id)',
+    'CREATE INDEX IF NOT EXISTS territories_hierarchy ON territories (area, region, division)',
+)
+
+# Statements are fixed strings with placeholders, so each connection prepares them once
+_CYCLE_IDS = 'SELECT name, cycle_id FROM cycles'
+_ACTIVITY_IDS = 'SELECT name, activity_id FROM activities'
+_TERRITORY_IDS = 'SELECT name, territory_id FROM territories'
+_INSERT_CYCLE = 'INSERT INTO cycles (cycle_id, name) VALUES (?, ?) ON CONFLICT (name) DO NOTHING'
+_INSERT_ACTIVITY = 'INSERT INTO activities (activity_id, name) VALUES (?, ?) ON CONFLICT (name) DO NOTHING'
+_INSERT_TERRITORY = (
+    'INSERT INTO territories (territory_id, area, region, division, name, state) VALUES (?, ?, ?, ?, ?, ?) '
+    'ON CONFLICT (name) DO UPDATE SET area = excluded.area, region = excluded.region, '
+    'division = excluded.division, state = excluded.state'
+)
+_UPSERT_CAPACITY = (
+    'INSERT INTO capacities (row_id, cycle_id, activity_id, territory_id, capacity_target, capacity_used, '
+    'capacity_percent, pacing_percent) VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+    'ON CONFLICT (row_id) DO UPDATE SET capacity_target = excluded.capacity_target, '
+    'capacity_used = excluded.capacity_used, capacity_percent = excluded.capacity_percent, '
+    'pacing_percent = excluded.pacing_percent'
+)
+_LOAD_CAPACITIES = (
+    'SELECT c.row_id, cy.name, a.name, t.area, t.region, t.division, t.name, t.state, '
+    'c.capacity_target, c.capacity_used, c.capacity_percent, c.pacing_percent '
+    'FROM capacities c JOIN cycles cy ON cy.cycle_id = c.cycle_id '
+    'JOIN activities a ON a.activity_id = c.activity_id JOIN territories t ON t.territory_id = c.territory_id '
+    'ORDER BY c.row_id'
+)
+
+# Store columns in the order _LOAD_CAPACITIES selects them
+_LOAD_COLUMNS = ('id', 'cycle', 'activity', 'tm_area', 'tm_region', 'tm_division', 'tm_territory', 'state',
+                 'capacity_target', 'capacity_used', 'capacity_percent', 'pacing_percent')
+
+
+class SQLiteBackend:
+    """Local SQLite file; runs anywhere with no database service"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        db = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, cached_statements=256)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('PRAGMA foreign_keys=ON')
+        return db
+
+    def sql(self, statement):
+        return statement
+
+
+class PostgresBackend:
+    """PostgreSQL through psycopg2 (optional dependency)"""
+
+    def __init__(self, url):
+        try:
+            import psycopg2
+        except ImportError:
+            raise ValueError('PostgreSQL databases need psycopg2 installed; use a sqlite:/// URL instead')
+        self._psycopg2 = psycopg2
+        self.url = url
+
+    def connect(self):
+        db = self._psycopg2.connect(self.url)
+        # Transactions are opened explicitly, as with SQLite
+        db.autocommit = True
+        return db
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def sql(statement):
+        return statement.replace('?', '%s')
+
+
+def backend_for(url):
+    """Backend for a database URL"""
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):])
+    if url.startswith(('postgres://', 'postgresql://')):
+        return PostgresBackend(url)
+    raise ValueError(f'Unsupported database URL: {url.split(":", 1)[0]}')
+
+
+class Repository:
+    """Territories, cycles, activities and capacities in a SQL database
+
+    The capacity store is loaded from it (see
+    services/store/capacity_store.load_capacity_store) and serves every
+    read from memory afterwards, so the repository only bulk-loads and
+    bulk-saves: writes go through batched executemany calls inside one
+    transaction.
+    """
+
+    def __init__(self, url=DATABASE_URL):
+        self.backend = backend_for(url)
+        with self.transaction() as cursor:
+            for statement in _SCHEMA:
+                cursor.execute(statement)
+
+    @contextmanager
+    def connection(self):
+        """Open connection, closed when the block exits"""
+        db = self.backend.connect()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def transaction(self):
+        """Cursor on a new connection inside one transaction, committed unless an exception escapes"""
+        with self.connection() as db:
+            cursor = db.cursor()
+            cursor.execute('BEGIN')
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+
+    def _execute_many(self, cursor, statement, rows):
+        statement = self.backend.sql(statement)
+        for start in range(0, len(rows), INSERT_BATCH_ROWS):
+            cursor.executemany(statement, rows[start:start + INSERT_BATCH_ROWS])
+
+    def save_columns(self, columns):
+        """Upsert capacity rows given as store columns (see CapacityStore) in one transaction
+
+        Cycles, activities and territories are added as they first appear.
+        """
+        ids = np.asarray(columns['id'], dtype=np.int64)
+        with self.transaction() as cursor:
+            dimensions = {}
+            for name, select, insert in (('cycle', _CYCLE_IDS, _INSERT_CYCLE),
+                                         ('activity', _ACTIVITY_IDS, _INSERT_ACTIVITY)):
+                cursor.execute(self.backend.sql(select))
+                known = dict(cursor.fetchall())
+                new = sorted(set(map(str, columns[name])) - set(known))
+                start = max(known.values(), default=0) + 1
+                self._execute_many(cursor, insert, [(start + n, value) for n, value in enumerate(new)])
+                cursor.execute(self.backend.sql(select))
+                dimensions[name] = dict(cursor.fetchall())
+
+            cursor.execute(self.backend.sql(_TERRITORY_IDS))
+            known = dict(cursor.fetchall())
+            territories = {}
+            for row in zip(*(map(str, columns[name]) for name in
+                             ('tm_area', 'tm_region', 'tm_division', 'tm_territory', 'state'))):
+                territories.setdefault(row[3], row)
+            start = max(known.values(), default=0) + 1
+            new = [name for name in territories if name not in known]
+            known.update((name, start + n) for n, name in enumerate(new))
+            self._execute_many(cursor, _INSERT_TERRITORY,
+                               [(known[name],) + territories[name] for name in territories])
+
+            cycle_ids, activity_ids = dimensions['cycle'], dimensions['activity']
+            rows = list(zip(
+                ids.tolist(),
+                [cycle_ids[str(v)] for v in columns['cycle']],
+                [activity_ids[str(v)] for v in columns['activity']],
+                [known[str(v)] for v in columns['tm_territory']],
+                *(np.asarray(columns[name]).astype(np.int64).tolist()
+                  for name in ('capacity_target', 'capacity_used', 'capacity_percent', 'pacing_percent'))
+            ))
+            self._execute_many(cursor, _UPSERT_CAPACITY, rows)
+        return len(rows)
+
+    def load_columns(self):
+        """Every capacity row as store columns, fetched FETCH_ROWS at a time"""
+        parts = {name: [] for name in _LOAD_COLUMNS}
+        with self.connection() as db:
+            cursor = db.cursor()
+            cursor.execute(self.backend.sql(_LOAD_CAPACITIES))
+            while True:
+                rows = cursor.fetchmany(FETCH_ROWS)
+                if not rows:
+                    break
+                for name, values in zip(_LOAD_COLUMNS, zip(*rows)):
+                    parts[name].extend(values)
+        return {name: np.asarray(values) for name, values in parts.items()}
+
+
+if __name__ == '__main__':
+    import argparse
+    from services.store.demo_data import generate_demo_columns
+
+    parser = argparse.ArgumentParser(description='Create the capacity tables and load the demo data into them')
+    parser.add_argument('--url', default=DATABASE_URL)
+    parser.add_argument('--scale', type=int, default=1, help='copies of each demo territory')
+    args = parser.parse_args()
+    saved = Repository(args.url).save_columns(generate_demo_columns(scale=args.scale))
+    print(f'Saved {saved:,} capacity rows to {args.url}')
@@ -0,0 +1,145 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from services.store.capacity_store import get_capacity_store
+
+# Hierarchy levels of the cube, top down
+CUBE_LEVELS = ('tm_area', 'tm_region', 'tm_division', 'tm_territory')
+
+# Totals of one cube cell
+CubeCell = namedtuple('CubeCell', ['used', 'target', 'percent'])
+
+
+def _percent(used, target):
+    return int(round(used * 100 / target)) if target else 0
+
+
+class RollupCube:
+    """Materialized capacity totals over (cycle, activity, hierarchy node) at every hierarchy level
+
+    Each level holds used/target arrays shaped (cycles + 1, activities + 1,
+    nodes), a level's nodes being the category codes of its column. The
+    extra last cycle and activity index hold the totals over all cycles or
+    all activities, so any cell, slice or margin is read by indexing. A
+    store update adds the changed rows' deltas to their ancestor cells
+    only: one node per level in each of the four (cycle, activity) margins.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.cycle = store.categorical['cycle']
+        self.activity = store.categorical['activity']
+        self.used = {}
+        self.target = {}
+        # Parent node (code of the level above) of every node, and the children of every node
+        self.parents = {}
+        self.children = {}
+        self._lock = threading.Lock()
+        with store.lock:
+            self._build()
+            self.version = store.version
+            store.subscribe(self._on_change)
+
+    def _build(self):
+        store = self.store
+        n_cycles, n_activities = len(self.cycle.categories), len(self.activity.categories)
+        slices = self.cycle.codes.astype(np.int64) * n_activities + self.activity.codes
+        for upper, level in zip((None,) + CUBE_LEVELS, CUBE_LEVELS):
+            codes = store.categorical[level].codes
+            n_nodes = len(store.categorical[level].categories)
+            keys = slices * n_nodes + codes
+            for name, totals in (('capacity_used', self.used), ('capacity_target', self.target)):
+                counts = np.bincount(keys, weights=store.numeric[name], minlength=n_cycles * n_activities * n_nodes)
+                cube = np.zeros((n_cycles + 1, n_activities + 1, n_nodes), dtype=np.int64)
+                cube[:n_cycles, :n_activities] = np.rint(counts).astype(np.int64).reshape(n_cycles, n_activities, n_nodes)
+                cube[n_cycles, :n_activities] = cube[:n_cycles, :n_activities].sum(axis=0)
+                cube[:, n_activities] = cube[:, :n_activities].sum(axis=1)
+                totals[level] = cube
+            if upper is not None:
+                parents = np.full(n_nodes, -1, dtype=np.int64)
+                parents[codes] = store.categorical[upper].codes
+                self.parents[level] = parents
+                order = np.argsort(parents, kind='stable')
+                bounds = np.searchsorted(parents[order], np.arange(len(store.categorical[upper].categories) + 1))
+                self.children[upper] = [order[bounds[p]:bounds[p + 1]] for p in range(len(bounds) - 1)]
+
+    def _on_change(self, change):
+        """Add a store RowChange's deltas to the ancestor cells of the changed rows"""
+        if 'capacity_used' not in change.new and 'capacity_target' not in change.new:
+            return
+        rows = change.rows
+        cycles, activities = self.cycle.codes[rows], self.activity.codes[rows]
+        all_cycles = np.full(len(rows), len(self.cycle.categories))
+        all_activities = np.full(len(rows), len(self.activity.categories))
+        margins = ((cycles, activities), (all_cycles, activities), (cycles, all_activities),
+                   (all_cycles, all_activities))
+        with self._lock:
+            for name, totals in (('capacity_used', self.used), ('capacity_target', self.target)):
+                if name not in change.new:
+                    continue
+                delta = change.new[name].astype(np.int64) - change.old[name]
+                for level in CUBE_LEVELS:
+                    nodes = self.store.categorical[level].codes[rows]
+                    for cycle_index, activity_index in margins:
+                        np.add.at(totals[level], (cycle_index, activity_index, nodes), delta)
+            self.version = change.version
+
+    def _slice_index(self, cycle, activity):
+        """Cube (cycle, activity) index; None selects the all-cycles/all-activities margin"""
+        cycle_index = len(self.cycle.categories) if cycle is None else self.cycle.lookup[cycle]
+        activity_index = len(self.activity.categories) if activity is None else self.activity.lookup[activity]
+        return cycle_index, activity_index
+
+    def _cell(self, level, code, cycle_index, activity_index):
+        with self._lock:
+            used = int(self.used[level][cycle_index, activity_index, code])
+            target = int(self.target[level][cycle_index, activity_index, code])
+        return CubeCell(used, target, _percent(used, target))
+
+    def cell(self, level, node, cycle=None, activity=None):
+        """CubeCell of one hierarchy node (by name) in a cycle/activity slice; raises KeyError for unknown names"""
+        return self._cell(level, self.store.categorical[level].lookup[node], *self._slice_index(cycle, activity))
+
+    def path(self, territory, cycle=None, activity=None):
+        """{level: (node name, CubeCell)} for a territory and each of its ancestors"""
+        indexes = self._slice_index(cycle, activity)
+        code = self.store.categorical['tm_territory'].lookup[territory]
+        path = {}
+        for level, upper in zip(CUBE_LEVELS[::-1], CUBE_LEVELS[-2::-1] + (None,)):
+            path[level] = (self.store.categorical[level].categories[code], self._cell(level, code, *indexes))
+            if upper is not None:
+                code = int(self.parents[level][code])
+        return {level: path[level] for level in CUBE_LEVELS}
+
+    def level_totals(self, level, cycle=None, activity=None, parent=None):
+        """(names, used, target, percents) of a level's nodes that have any target, optionally under one parent"""
+        cycle_index, activity_index = self._slice_index(cycle, activity)
+        with self._lock:
+            used = self.used[level][cycle_index, activity_index].copy()
+            target = self.target[level][cycle_index, activity_index].copy()
+        if parent is not None and level != CUBE_LEVELS[0]:
+            upper = CUBE_LEVELS[CUBE_LEVELS.index(level) - 1]
+            nodes = self.children[upper][self.store.categorical[upper].lookup[parent]]
+        else:
+            nodes = np.arange(len(used))
+        nodes = nodes[target[nodes] > 0]
+        categories = self.store.categorical[level].categories
+        percents = np.round(used[nodes] * 100 / target[nodes]).astype(int)
+        return ([categories[n] for n in nodes.tolist()], used[nodes].tolist(), target[nodes].tolist(),
+                percents.tolist())
+
+
+_cube = None
+_cube_lock = threading.Lock()
+
+
+def get_rollup_cube():
+    """Return this worker's rollup cube, built on first use and kept current by store updates"""
+    global _cube
+    if _cube is None:
+        with _cube_lock:
+            if _cube is None:
+                _cube = RollupCube(get_capacity_store())
+    return _cube
@@ -0,0 +1,149 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from services.filters.filter_engine import get_filter_engine, selection_key
+from services.store.capacity_store import get_capacity_store
+
+# Number of filter selections whose rollups are kept and maintained incrementally
+ROLLUP_CACHE_SIZE = 32
+
+
+class Rollup:
+    """Capacity totals for one set of rows, as a state x area matrix
+
+    Both the state-level and the area-level aggregates are margins of the
+    same matrix, so one group-by pass over the rows yields both.
+    """
+
+    def __init__(self, store, rows, used, target):
+        self.store = store
+        # Sorted row positions the totals cover, for incremental maintenance
+        self.rows = rows
+        self.used = used
+        self.target = target
+        # Selection key and the store version the totals last changed at
+        self.key = None
+        self.version = store.version
+
+    @staticmethod
+    def cell_keys(store, rows):
+        """Flat state x area cell index of each row"""
+        n_areas = len(store.categorical['tm_area'].categories)
+        states = store.categorical['state'].codes[rows].astype(np.int64)
+        return states * n_areas + store.categorical['tm_area'].codes[rows]
+
+    @classmethod
+    def compute(cls, store, rows):
+        """Aggregate capacity_used/capacity_target of ``rows`` in one bincount pass"""
+        shape = (len(store.categorical['state'].categories), len(store.categorical['tm_area'].categories))
+        keys = cls.cell_keys(store, rows)
+        size = shape[0] * shape[1]
+        used = np.bincount(keys, weights=store.numeric['capacity_used'][rows], minlength=size)
+        target = np.bincount(keys, weights=store.numeric['capacity_target'][rows], minlength=size)
+        return cls(store, rows, used.reshape(shape), target.reshape(shape))
+
+    def apply(self, change):
+        """Fold a store RowChange into the totals, touching only the changed rows"""
+        if 'capacity_used' not in change.new and 'capacity_target' not in change.new:
+            return
+        if len(self.rows) == 0:
+            return
+        # Changed rows that belong to this rollup's selection
+        slots = np.searchsorted(self.rows, change.rows)
+        inside = (slots < len(self.rows)) & (self.rows[np.minimum(slots, len(self.rows) - 1)] == change.rows)
+        if not inside.any():
+            return
+        self.version = change.version
+        keys = self.cell_keys(self.store, change.rows[inside])
+        for name, totals in (('capacity_used', self.used), ('capacity_target', self.target)):
+            if name in change.new:
+                delta = change.new[name][inside].astype(np.float64) - change.old[name][inside]
+                np.add.at(totals.reshape(-1), keys, delta)
+
+    def _percents(self, used, target, column):
+        """(labels, percents) for the groups of ``column`` that have any target"""
+        present = np.flatnonzero(target)
+        percents = np.round(used[present] * 100 / target[present]).astype(int)
+        categories = self.store.categorical[column].categories
+        return [categories[c] for c in present.tolist()], percents.tolist()
+
+    def by_state(self):
+        """Capacity-weighted capacity % per state"""
+        return self._percents(self.used.sum(axis=1), self.target.sum(axis=1), 'state')
+
+    def by_area(self):
+        """Capacity-weighted capacity % per area"""
+        return self._percents(self.used.sum(axis=0), self.target.sum(axis=0), 'tm_area')
+
+    def state_view(self, organize_by='state'):
+        """Per-state map values: (states, percents, hover labels)
+
+        'state' colors each state by its own capacity %; 'area' colors it by
+        the capacity % of the area holding most of its target. Cost is
+        O(states x areas), independent of the number of rows.
+        """
+        state_target = self.target.sum(axis=1)
+        present = np.flatnonzero(state_target)
+        states = [self.store.categorical['state'].categories[c] for c in present.tolist()]
+        if organize_by == 'area':
+            area_used, area_target = self.used.sum(axis=0), self.target.sum(axis=0)
+            area_percent = area_used * 100 / np.maximum(area_target, 1)
+            areas = self.target[present].argmax(axis=1)
+            percents = np.round(area_percent[areas]).astype(int).tolist()
+            area_names = self.store.categorical['tm_area'].categories
+            labels = [f'{state} ({area_names[a]})' for state, a in zip(states, areas.tolist())]
+            return states, percents, labels
+        percents = np.round(self.used.sum(axis=1)[present] * 100 / state_target[present]).astype(int).tolist()
+        return states, percents, states
+
+
+class RollupEngine:
+    """State/area rollups per filter selection, kept current as the store changes"""
+
+    def __init__(self, store, filter_engine):
+        self.store = store
+        self.filter_engine = filter_engine
+        self._rollups = OrderedDict()
+        self._lock = threading.Lock()
+        store.subscribe(self._on_change)
+
+    def rollup(self, selection):
+        """Rollup of the rows matching a filter selection"""
+        key = selection_key(selection)
+        with self._lock:
+            rollup = self._rollups.get(key)
+            if rollup is not None:
+                self._rollups.move_to_end(key)
+                return rollup
+
+        rows = self.filter_engine.select(selection)
+        # Compute under the store lock so no update lands between the pass and caching
+        with self.store.lock, self._lock:
+            rollup = Rollup.compute(self.store, rows)
+            rollup.key = key
+            self._rollups[key] = rollup
+            if len(self._rollups) > ROLLUP_CACHE_SIZE:
+                self._rollups.popitem(last=False)
+        return rollup
+
+    def _on_change(self, change):
+        """Update every cached rollup with only the changed territories"""
+        with self._lock:
+            for rollup in self._rollups.values():
+                rollup.apply(change)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_rollup_engine():
+    """Return this worker's rollup engine"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RollupEngine(get_capacity_store(), get_filter_engine())
+    return _engine
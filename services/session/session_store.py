@@ -0,0 +1,122 @@
+import json
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+
+# SQLite file shared by every worker on the machine
+SESSION_DB_PATH = os.environ.get('SESSION_DB_PATH', os.path.join(tempfile.gettempdir(), 'reynolds-sessions.sqlite3'))
+
+# Idle time after which a session expires; reads extend it
+SESSION_TTL = int(os.environ.get('SESSION_TTL', 8 * 60 * 60))
+
+# Fraction of the TTL left below which a read extends the session (reads above it write nothing)
+SESSION_RENEW_FRACTION = 0.5
+
+# Seconds between sweeps that delete expired sessions
+SWEEP_INTERVAL = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    sid TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+class SessionStore:
+    """Server-side session data keyed by an opaque session ID
+
+    The client only holds the ID; the data lives in a local SQLite database
+    that all gunicorn workers share, so it costs nothing on callback
+    requests however much it grows. Sessions expire after ``ttl`` idle
+    seconds and expired rows are swept periodically.
+    """
+
+    def __init__(self, path=SESSION_DB_PATH, ttl=SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        with self._connect() as db:
+            db.execute(_SCHEMA)
+
+    def _connect(self):
+        """This thread's connection, opened on first use (never shared across threads or forks)"""
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def create(self, data):
+        """Store ``data`` under a new session ID and return the ID"""
+        sid = secrets.token_urlsafe(32)
+        self._connect().execute(
+            'INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)',
+            (sid, json.dumps(data), time.time() + self.ttl)
+        )
+        self._maybe_sweep()
+        return sid
+
+    def get(self, sid):
+        """Session data for ``sid``, or None when unknown or expired
+
+        Extends the session's TTL once less than SESSION_RENEW_FRACTION of it
+        is left, so most reads stay read-only and do not contend for the
+        database's write lock.
+        """
+        if not sid:
+            return None
+        now = time.time()
+        db = self._connect()
+        row = db.execute('SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?',
+                         (sid, now)).fetchone()
+        if row is None:
+            return None
+        if row[1] - now < self.ttl * SESSION_RENEW_FRACTION:
+            db.execute('UPDATE sessions SET expires_at = ? WHERE sid = ?', (now + self.ttl, sid))
+        return json.loads(row[0])
+
+    def delete(self, sid):
+        """End a session"""
+        if sid:
+            self._connect().execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+    def sweep(self):
+        """Delete every expired session"""
+        self._last_sweep = time.time()
+        self._connect().execute('DELETE FROM sessions WHERE expires_at <= ?', (self._last_sweep,))
+
+    def _maybe_sweep(self):
+        if time.time() - self._last_sweep > SWEEP_INTERVAL:
+            self.sweep()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Return this worker's handle on the shared session store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore()
+    return _store
+
+
+def session_id(session_data):
+    """Opaque session ID held by the client's session-data store"""
+    return session_data.get('sid') if isinstance(session_data, dict) else None
+
+
+def current_session(session_data):
+    """Server-side data of the client's session, or None when signed out or expired"""
+    return get_session_store().get(session_id(session_data))
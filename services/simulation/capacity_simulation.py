@@ -0,0 +1,213 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Percentiles of end-of-cycle capacity % reported per territory, low to high
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Territory x scenario cells simulated at once; bounds a task's working set to a few arrays of this size
+BLOCK_CELLS = 1_000_000
+
+# Processes the simulation's area blocks are spread across; 0 or 1 runs it in the calling thread
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', 0))
+
+# Scenario parameters:
+# - scenarios: number of demand paths per territory
+# - horizon_weeks: weeks left in the cycle
+# - volatility: standard deviation of a week's log demand
+# - area_correlation: share of the weekly shock variance common to all territories of an area
+# - demand_growth: expected change of the remaining planned demand (0.1 = +10%)
+# - seed: makes runs reproducible
+SimulationParams = namedtuple('SimulationParams', ['scenarios', 'horizon_weeks', 'volatility',
+                                                   'area_correlation', 'demand_growth', 'seed'],
+                              defaults=[2000, 13, 0.25, 0.5, 0.0, 7])
+
+# Per-territory simulation inputs: names, area codes and demand totals
+TerritoryInputs = namedtuple('TerritoryInputs', ['territories', 'areas', 'area_codes', 'realized', 'remaining', 'target'])
+
+# Per-territory inputs of one block of an area's territories, as sent to a worker process
+AreaTask = namedtuple('AreaTask', ['area', 'block', 'realized', 'remaining', 'target', 'params'])
+
+
+class SimulationResult:
+    """Percentile bands of end-of-cycle capacity % per territory
+
+    ``bands`` has one row per territory and one column per PERCENTILES
+    entry; ``over_capacity`` is the share of scenarios ending above 100%.
+    """
+
+    def __init__(self, territories, areas, bands, over_capacity, expected, params, elapsed):
+        self.territories = territories
+        self.areas = areas
+        self.bands = bands
+        self.over_capacity = over_capacity
+        self.expected = expected
+        self.params = params
+        self.elapsed = elapsed
+
+    def __len__(self):
+        return len(self.territories)
+
+    def band(self, percentile):
+        """Capacity % at one of the PERCENTILES for every territory"""
+        return self.bands[:, PERCENTILES.index(percentile)]
+
+    def to_dict(self):
+        """JSON-serializable form, e.g. for a background job's result"""
+        return {
+            'territories': self.territories,
+            'areas': self.areas,
+            'bands': self.bands.round(2).tolist(),
+            'over_capacity': self.over_capacity.round(4).tolist(),
+            'expected': self.expected.round(2).tolist(),
+            'params': self.params._asdict(),
+            'elapsed': self.elapsed,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a result from to_dict()"""
+        return cls(data['territories'], data['areas'],
+                   np.array(data['bands'], dtype=np.float64).reshape(-1, len(PERCENTILES)),
+                   np.array(data['over_capacity'], dtype=np.float64),
+                   np.array(data['expected'], dtype=np.float64),
+                   SimulationParams(**data['params']), data['elapsed'])
+
+    def ranked(self, limit=None):
+        """Territory positions ordered by median end-of-cycle capacity %, highest first"""
+        order = np.argsort(-self.band(50), kind='stable')
+        return order if limit is None else order[:limit]
+
+
+def territory_inputs(store, rows):
+    """Aggregate store rows into one TerritoryInputs entry per territory
+
+    The pacing share of each row's planned demand (capacity_used) is
+    already realized; the rest is what the scenarios vary.
+    """
+    territory_codes = store.categorical['tm_territory'].codes[rows]
+    territories, first, inverse = np.unique(territory_codes, return_index=True, return_inverse=True)
+    area_codes = store.categorical['tm_area'].codes[rows][first]
+    used = store.numeric['capacity_used'][rows].astype(np.float64)
+    realized = used * np.clip(store.numeric['pacing_percent'][rows], 0, 100) / 100
+    size = len(territories)
+    territory_names = store.categorical['tm_territory'].categories
+    area_names = store.categorical['tm_area'].categories
+    return TerritoryInputs([territory_names[c] for c in territories.tolist()],
+                           [area_names[c] for c in area_codes.tolist()],
+                           area_codes.astype(np.int64),
+                           np.bincount(inverse, weights=realized, minlength=size),
+                           np.bincount(inverse, weights=used - realized, minlength=size),
+                           np.bincount(inverse, weights=store.numeric['capacity_target'][rows], minlength=size))
+
+
+def simulate_area(task):
+    """Simulate one block of an area's territories; returns (bands, over-capacity share, mean) per territory
+
+    Each week's demand is the planned weekly demand times a lognormal shock
+    with mean 1. The shock mixes a component shared by the whole area with
+    one per territory, so territories of an area move together. A block
+    holds about BLOCK_CELLS territory x scenario cells, and the loop runs
+    only over the weeks of the horizon.
+    """
+    params = task.params
+    scenarios, weeks, sigma = params.scenarios, params.horizon_weeks, params.volatility
+    # Seeded per area and block, so bands do not depend on which other areas are simulated;
+    # every block of an area draws the same area shocks
+    area_rng = np.random.default_rng(np.random.SeedSequence(params.seed, spawn_key=(int(task.area), 0)))
+    area_shocks = area_rng.standard_normal((weeks, scenarios)) * np.sqrt(params.area_correlation)
+    rng = np.random.default_rng(np.random.SeedSequence(params.seed, spawn_key=(int(task.area), task.block + 1)))
+    own_scale = np.sqrt(1.0 - params.area_correlation)
+
+    multiplier = np.zeros((len(task.target), scenarios))
+    shock = np.empty_like(multiplier)
+    for week in range(weeks):
+        rng.standard_normal(out=shock)
+        shock *= own_scale
+        shock += area_shocks[week]
+        shock *= sigma
+        shock -= sigma * sigma / 2
+        multiplier += np.exp(shock, out=shock)
+    # Average weekly multiplier times the remaining plan, on top of what is already realized
+    weekly_plan = task.remaining * (1.0 + params.demand_growth) / max(weeks, 1)
+    multiplier *= weekly_plan[:, None]
+    multiplier += task.realized[:, None]
+    multiplier *= (100.0 / np.maximum(task.target, 1))[:, None]
+    return (np.percentile(multiplier, PERCENTILES, axis=1).T, (multiplier > 100).mean(axis=1),
+            multiplier.mean(axis=1))
+
+
+def simulate(inputs, params=SimulationParams(), workers=None, progress=None):
+    """Monte Carlo end-of-cycle capacity % for the territories in ``inputs``
+
+    The work is split into tasks of one block of an area's territories, run
+    on the simulation process pool when one is configured.
+    ``progress(fraction, message)`` is called as blocks complete and may
+    raise to stop the run; blocks not started yet are then cancelled.
+    """
+    start = time.perf_counter()
+    areas = inputs.area_codes
+    order = np.argsort(areas, kind='stable')
+    bounds = np.flatnonzero(np.diff(areas[order])) + 1
+    size = max(1, BLOCK_CELLS // params.scenarios)
+    groups = []
+    tasks = []
+    for area_rows in (np.split(order, bounds) if len(order) else []):
+        for block, first in enumerate(range(0, len(area_rows), size)):
+            group = area_rows[first:first + size]
+            groups.append(group)
+            tasks.append(AreaTask(areas[group[0]], block, inputs.realized[group], inputs.remaining[group],
+                                  inputs.target[group], params))
+
+    pool = get_simulation_pool(workers)
+    futures = [pool.submit(simulate_area, task) for task in tasks] if pool is not None and len(tasks) > 1 else []
+    outputs = (future.result() for future in futures) if futures else map(simulate_area, tasks)
+
+    n = len(inputs.territories)
+    bands = np.empty((n, len(PERCENTILES)))
+    over = np.empty(n)
+    expected = np.empty(n)
+    try:
+        for done, (group, (group_bands, group_over, group_expected)) in enumerate(zip(groups, outputs), 1):
+            bands[group], over[group], expected[group] = group_bands, group_over, group_expected
+            if progress is not None:
+                progress(done / len(groups), f'Simulated {inputs.areas[group[0]]}')
+    finally:
+        for future in futures:
+            future.cancel()
+
+    return SimulationResult(inputs.territories, inputs.areas, bands, over, expected, params,
+                            time.perf_counter() - start)
+
+
+def run_simulation(store, rows, params=SimulationParams(), workers=None):
+    """Simulate the territories of the given store rows; rows of one territory (several activities, say) are pooled"""
+    return simulate(territory_inputs(store, rows), params, workers)
+
+
+def simulation_job(progress, inputs, params):
+    """Background job (see services/jobs) running a simulation; returns the result as a dict"""
+    return simulate(inputs, params, progress=progress).to_dict()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_simulation_pool(workers=None):
+    """Return this worker's simulation process pool, or None when simulations run in-process"""
+    global _pool
+    workers = SIMULATION_WORKERS if workers is None else workers
+    if workers <= 1:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawned, not forked: the gunicorn worker is multi-threaded, and the children only need NumPy
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
@@ -0,0 +1,69 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 'lazy' defers page modules and data services to first use; 'eager' imports them at startup
+STARTUP_MODE = os.environ.get('STARTUP_MODE', 'lazy')
+
+_modules = {}
+_load_times = {}
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name):
+        self.__name = name
+        self.__module = None
+
+    def load(self):
+        """Import the module now (a no-op after the first call) and return it"""
+        module = self.__module
+        if module is None:
+            start = time.perf_counter()
+            # The import system's per-module locks make concurrent first loads safe
+            module = importlib.import_module(self.__name)
+            elapsed = time.perf_counter() - start
+            with _lock:
+                if self.__module is None:
+                    self.__module = module
+                    _load_times[self.__name] = elapsed
+                    logger.info('Loaded %s in %.1f ms', self.__name, elapsed * 1000)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.__module is not None else 'not loaded'
+        return f'<lazy module {self.__name!r} ({state})>'
+
+
+def lazy_import(name):
+    """Module ``name``, imported on first use in lazy startup mode and right away in eager mode"""
+    with _lock:
+        module = _modules.get(name)
+        if module is None:
+            module = _modules[name] = LazyModule(name)
+    if STARTUP_MODE == 'eager':
+        module.load()
+    return module
+
+
+def preload():
+    """Import every module registered through lazy_import, e.g. before forking workers"""
+    with _lock:
+        modules = list(_modules.values())
+    for module in modules:
+        module.load()
+
+
+def load_times():
+    """Seconds each lazily imported module took on its first load, by module name"""
+    with _lock:
+        return dict(_load_times)
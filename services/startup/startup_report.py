@@ -0,0 +1,84 @@
+"""Startup timing report: where worker import time goes
+
+Run from the project root:
+
+    python -m services.startup.startup_report [--mode lazy|eager] [--top 15]
+
+Imports ``main`` in a fresh interpreter under ``python -X importtime`` and
+prints the import time per top-level package and the slowest first-party
+modules, then the cost of each deferred module on its first use.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# Top-level packages that belong to this app
+FIRST_PARTY = ('main', 'components', 'modules', 'services')
+
+# Loads every deferred module, like the first visits to the dashboard pages do
+_DEFERRED_SCRIPT = (
+    "import json, main\n"
+    "from services.startup.lazy_imports import load_times, preload\n"
+    "preload()\n"
+    "print(json.dumps(load_times()))\n"
+)
+
+
+def parse_importtime(output):
+    """(module, self microseconds, cumulative microseconds) per line of -X importtime output"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def run_python(args, mode):
+    """Run the project's interpreter in a fresh process with STARTUP_MODE set"""
+    env = dict(os.environ, STARTUP_MODE=mode)
+    return subprocess.run([sys.executable] + args, capture_output=True, text=True, env=env, check=True)
+
+
+def startup_report(mode='lazy', top=15):
+    """Report lines for importing ``main`` in the given startup mode"""
+    entries = parse_importtime(run_python(['-X', 'importtime', '-c', 'import main'], mode).stderr)
+    total_us = sum(self_us for _, self_us, _ in entries)
+
+    # Self times add up to the total, so grouping them splits it without double counting
+    by_package = defaultdict(int)
+    for name, self_us, _ in entries:
+        by_package[name.split('.')[0]] += self_us
+
+    lines = [f'Import of main ({mode} mode): {total_us / 1000:.1f} ms, {len(entries)} modules', '',
+             'By top-level package (self time):']
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f'  {self_us / 1000:9.1f} ms  {self_us * 100 / total_us:5.1f}%  {package}')
+
+    lines += ['', 'Slowest first-party modules (cumulative):']
+    own = [entry for entry in entries if entry[0].split('.')[0] in FIRST_PARTY]
+    for name, _, cumulative_us in sorted(own, key=lambda entry: -entry[2])[:top]:
+        lines.append(f'  {cumulative_us / 1000:9.1f} ms  {name}')
+
+    if mode == 'lazy':
+        deferred = json.loads(run_python(['-c', _DEFERRED_SCRIPT], mode).stdout.strip().splitlines()[-1])
+        lines += ['', 'Deferred to first use:']
+        for name, seconds in deferred.items():
+            lines.append(f'  {seconds * 1000:9.1f} ms  {name}')
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=('lazy', 'eager'), default='lazy')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+    print('\n'.join(startup_report(args.mode, args.top)))
+
+
+if __name__ == '__main__':
+    main()
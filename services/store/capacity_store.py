@@ -0,0 +1,312 @@
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# String columns kept as integer codes into a shared dictionary
+CATEGORICAL_COLUMNS = ('cycle', 'activity', 'tm_area', 'tm_region', 'tm_division', 'tm_territory', 'state')
+
+# Numeric columns and the dtype they are stored with
+NUMERIC_COLUMNS = {
+    'capacity_target': np.int32,
+    'capacity_used': np.int32,
+    'capacity_percent': np.int16,
+    'pacing_percent': np.int16,
+}
+
+# Largest capacity % the store can hold; larger derived values are capped, never wrapped
+MAX_CAPACITY_PERCENT = int(np.iinfo(NUMERIC_COLUMNS['capacity_percent']).max)
+
+# A batch of numeric updates: row positions plus old and new values per changed column
+RowChange = namedtuple('RowChange', ['version', 'rows', 'old', 'new'])
+
+# Seconds between checks of the shared change log for updates logged by other workers and jobs
+CHANGE_SYNC_INTERVAL = 1.0
+
+# Columns sent to the capacity grid
+GRID_COLUMNS = ('id', 'tm_area', 'tm_region', 'tm_division', 'tm_territory',
+                'capacity_percent', 'pacing_percent')
+
+
+def group_rows(keys, size):
+    """CSR grouping of positions by key: (order, offsets) so group k is order[offsets[k]:offsets[k + 1]]"""
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return order, offsets
+
+
+def gather_groups(order, offsets, groups):
+    """Concatenate the members of the given CSR groups"""
+    if len(groups) == 0:
+        return np.empty(0, dtype=order.dtype)
+    return np.concatenate([order[offsets[g]:offsets[g + 1]] for g in np.asarray(groups).tolist()])
+
+
+def _code_dtype(size):
+    """Smallest signed integer dtype able to hold ``size`` codes plus -1"""
+    return np.int16 if size < np.iinfo(np.int16).max else np.int32
+
+
+class CategoricalColumn:
+    """Dictionary-encoded string column: integer codes into a list of categories"""
+
+    __slots__ = ('codes', 'categories', 'lookup')
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = list(categories)
+        self.lookup = {value: code for code, value in enumerate(self.categories)}
+
+    @classmethod
+    def from_values(cls, values):
+        """Encode a sequence of strings, numbering categories in sorted order"""
+        categories, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+        return cls(codes.astype(_code_dtype(len(categories))), categories.tolist())
+
+    def __len__(self):
+        return len(self.codes)
+
+    def encode(self, value):
+        """Code for a category, or -1 when the value is unknown"""
+        return self.lookup.get(value, -1)
+
+    def encode_many(self, values):
+        """Codes for the known categories among ``values``"""
+        return [self.lookup[v] for v in values if v in self.lookup]
+
+    def decode(self, rows=None):
+        """Category strings for the given row positions (all rows by default)"""
+        codes = self.codes if rows is None else self.codes[rows]
+        categories = self.categories
+        return [categories[c] for c in codes.tolist()]
+
+
+class CapacityStore:
+    """Array-backed, read-mostly table of territory capacity rows
+
+    Each worker loads the store once (see get_capacity_store) and every
+    component queries it instead of rebuilding its own lists or frames.
+    """
+
+    def __init__(self, columns, source=''):
+        self.ids = np.asarray(columns['id'], dtype=np.int64)
+        self.categorical = {name: CategoricalColumn.from_values(columns[name]) for name in CATEGORICAL_COLUMNS}
+        self.numeric = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+        self.positions = {row_id: position for position, row_id in enumerate(self.ids.tolist())}
+        # Identifies the base data (its source and content) that change log batches are logged against
+        self.fingerprint = self._fingerprint(source)
+        self.version = 0
+        # Last change log batch applied (see sync_changes)
+        self.change_seq = 0
+        self._last_sync = 0.0
+        self._sync_lock = threading.Lock()
+        self._listeners = []
+        # Held while writing; take it to read several columns consistently
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df, source=''):
+        """Build a store from a pandas DataFrame with the store's columns"""
+        columns = {name: df[name].to_numpy() for name in ('id',) + CATEGORICAL_COLUMNS + tuple(NUMERIC_COLUMNS)}
+        return cls(columns, source)
+
+    def _fingerprint(self, source):
+        """Hash of the data source and every column as loaded"""
+        digest = hashlib.sha1(source.encode())
+        digest.update(self.ids.tobytes())
+        for name in CATEGORICAL_COLUMNS:
+            digest.update(self.categorical[name].codes.tobytes())
+            digest.update('\0'.join(map(str, self.categorical[name].categories)).encode())
+        for name in NUMERIC_COLUMNS:
+            digest.update(self.numeric[name].tobytes())
+        return digest.hexdigest()[:16]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the column arrays"""
+        arrays = [self.ids] + [c.codes for c in self.categorical.values()] + list(self.numeric.values())
+        return sum(a.nbytes for a in arrays)
+
+    def column(self, name):
+        """Raw array for a column: codes for categorical columns, values otherwise"""
+        if name == 'id':
+            return self.ids
+        if name in self.categorical:
+            return self.categorical[name].codes
+        return self.numeric[name]
+
+    def rows_for(self, ids):
+        """Row positions for a list of row ids, skipping unknown ids"""
+        return np.array([self.positions[i] for i in ids if i in self.positions], dtype=np.int64)
+
+    def subscribe(self, listener):
+        """Call ``listener(change)`` with a RowChange after every update"""
+        self._listeners.append(listener)
+
+    def update_rows(self, ids, **values):
+        """Overwrite numeric columns for the given row ids and bump the store version
+
+        ``values`` maps numeric column names to one new value per id. Unknown
+        ids are skipped. capacity_percent follows capacity_used/capacity_target
+        unless it is given explicitly. Returns the RowChange, or None when no
+        known id was given.
+        """
+        # Last value wins when an id is given more than once
+        known = {}
+        for n, row_id in enumerate(ids):
+            position = self.positions.get(row_id)
+            if position is not None:
+                known[position] = n
+        if not known:
+            return None
+        rows = np.fromiter(known.keys(), dtype=np.int64, count=len(known))
+        picks = np.fromiter(known.values(), dtype=np.int64, count=len(known))
+
+        with self.lock:
+            new = {name: np.asarray(v)[picks].astype(NUMERIC_COLUMNS[name]) for name, v in values.items()}
+            if 'capacity_percent' not in new and ({'capacity_used', 'capacity_target'} & set(new)):
+                used = new.get('capacity_used', self.numeric['capacity_used'][rows])
+                target = new.get('capacity_target', self.numeric['capacity_target'][rows])
+                percent = np.round(used.astype(np.float64) * 100 / np.maximum(target, 1))
+                new['capacity_percent'] = np.minimum(percent, MAX_CAPACITY_PERCENT).astype(
+                    NUMERIC_COLUMNS['capacity_percent'])
+            old = {name: self.numeric[name][rows].copy() for name in new}
+            for name, column_values in new.items():
+                self.numeric[name][rows] = column_values
+            self.version += 1
+            change = RowChange(self.version, rows, old, new)
+            for listener in self._listeners:
+                listener(change)
+        return change
+
+    def capacity_by(self, name, rows=None):
+        """Capacity-weighted capacity % per category of ``name`` over the given rows
+
+        Returns (labels, percents) for the categories that have any target.
+        """
+        column = self.categorical[name]
+        codes = column.codes if rows is None else column.codes[rows]
+        used = self.numeric['capacity_used'] if rows is None else self.numeric['capacity_used'][rows]
+        target = self.numeric['capacity_target'] if rows is None else self.numeric['capacity_target'][rows]
+        size = len(column.categories)
+        used_sum = np.bincount(codes, weights=used, minlength=size)
+        target_sum = np.bincount(codes, weights=target, minlength=size)
+        present = np.flatnonzero(target_sum)
+        percents = np.round(used_sum[present] * 100 / target_sum[present]).astype(int)
+        return [column.categories[c] for c in present.tolist()], percents.tolist()
+
+    def records(self, rows=None, columns=GRID_COLUMNS):
+        """Materialize rows as a list of dicts, decoding categorical columns"""
+        if rows is None:
+            rows = np.arange(len(self))
+        values = {}
+        for name in columns:
+            if name in self.categorical:
+                values[name] = self.categorical[name].decode(rows)
+            else:
+                values[name] = self.column(name)[rows].tolist()
+        return [dict(zip(values, row)) for row in zip(*values.values())]
+
+    def dictionary(self, rows, columns=GRID_COLUMNS):
+        """{column: {code: category}} for the codes the given rows use in each categorical column"""
+        return {name: {code: self.categorical[name].categories[code]
+                       for code in np.unique(self.categorical[name].codes[rows]).tolist()}
+                for name in columns if name in self.categorical}
+
+    def record(self, row_id, columns=GRID_COLUMNS):
+        """Single row as a dict, or None for an unknown id"""
+        position = self.positions.get(row_id)
+        if position is None:
+            return None
+        return self.records(np.array([position]), columns)[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def load_capacity_store(path=None):
+    """Load capacity rows from a CSV/Parquet file or a database URL, or the demo data when no path is set"""
+    path = path or os.environ.get('CAPACITY_DATA_PATH')
+    if not path:
+        from services.store.demo_data import generate_demo_columns
+        return CapacityStore(generate_demo_columns(), 'demo')
+    if '://' in path:
+        from services.repository.repository import Repository
+        return CapacityStore(Repository(path).load_columns(), path)
+
+    import pandas as pd
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    return CapacityStore.from_frame(df, path)
+
+
+def sync_changes(store, force=False):
+    """Apply the change log batches ``store`` has not applied yet, in order; returns how many were applied
+
+    Skipped when another thread is syncing, or (unless ``force``) when the
+    last check was less than CHANGE_SYNC_INTERVAL ago.
+    """
+    if not force and time.time() - store._last_sync < CHANGE_SYNC_INTERVAL:
+        return 0
+    if not store._sync_lock.acquire(blocking=force):
+        return 0
+    try:
+        from services.store.change_log import get_change_log
+        store._last_sync = time.time()
+        applied = 0
+        for seq, ids, values in get_change_log().since(store.change_seq, store.fingerprint):
+            store.update_rows(ids.tolist(), **values)
+            store.change_seq = seq
+            applied += 1
+        return applied
+    finally:
+        store._sync_lock.release()
+
+
+def logged_changes(store, seq):
+    """(row positions, changed columns) of the change log batches after ``seq`` that ``store`` has applied
+
+    Seqs are the same in every worker, so a client can catch up on any of
+    them. Returns (None, None) when batches after ``seq`` were already
+    dropped from the log.
+    """
+    from services.store.change_log import get_change_log
+    log = get_change_log()
+    if seq < log.trimmed_seq():
+        return None, None
+    applied = store.change_seq
+    ids, columns = [], set()
+    for batch_seq, batch_ids, values in log.since(seq, store.fingerprint):
+        if batch_seq > applied:
+            break
+        ids.append(batch_ids)
+        columns.update(values)
+    if not ids:
+        return np.empty(0, dtype=np.int64), ()
+    return np.unique(store.rows_for(np.concatenate(ids).tolist())), tuple(sorted(columns))
+
+
+def get_capacity_store():
+    """Return this worker's capacity store, loading it on first use and applying logged changes"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = load_capacity_store()
+                from services.store.change_log import get_change_log
+                # Changes logged against other base data would land on unrelated rows
+                get_change_log().reset(store.fingerprint)
+                sync_changes(store, force=True)
+                _store = store
+    sync_changes(_store)
+    return _store
@@ -0,0 +1,142 @@
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# SQLite file of capacity row changes, shared by every worker and job process on the machine
+CHANGE_LOG_PATH = os.environ.get('CHANGE_LOG_PATH', os.path.join(tempfile.gettempdir(), 'reynolds-changes.sqlite3'))
+
+# Seconds a change is kept; workers starting later load the base data plus the changes still logged
+CHANGE_RETENTION = 7 * 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL,
+    source TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trimmed (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    seq INTEGER NOT NULL
+)
+"""
+
+
+def _pack(ids, values):
+    """npz bytes holding the row ids and one array per changed column"""
+    buffer = io.BytesIO()
+    np.savez(buffer, ids=np.asarray(ids, dtype=np.int64), **{name: np.asarray(v) for name, v in values.items()})
+    return buffer.getvalue()
+
+
+def _unpack(columns, payload):
+    with np.load(io.BytesIO(payload)) as data:
+        return data['ids'], {name: data[name] for name in json.loads(columns)}
+
+
+class ChangeLog:
+    """Append-only log of capacity row updates, replayed by every worker's store
+
+    Each worker holds its own copy of the capacity store. Writers (edits,
+    imports running in job processes) append batches of row updates here
+    instead of changing one worker's copy, and every store applies the
+    batches it has not seen yet in sequence order (see
+    services/store/capacity_store.sync_changes).
+
+    Row ids only mean something for the base data they were logged
+    against, so every batch carries the fingerprint of that data (see
+    CapacityStore.fingerprint) and is only replayed onto a store with the
+    same fingerprint. A store loading different base data resets the log.
+    """
+
+    def __init__(self, path=CHANGE_LOG_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as db:
+            columns = [column[1] for column in db.execute('PRAGMA table_info(changes)')]
+            # Batches logged without a fingerprint cannot be matched to any base data
+            if columns and 'fingerprint' not in columns:
+                db.execute('DROP TABLE changes')
+            db.executescript(_SCHEMA)
+
+    def _connect(self):
+        """This thread's connection, opened on first use (never shared across threads or processes)"""
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def reset(self, fingerprint):
+        """Drop every batch logged against base data other than ``fingerprint``; returns how many were dropped"""
+        return self._connect().execute('DELETE FROM changes WHERE fingerprint != ?', (fingerprint,)).rowcount
+
+    def append(self, fingerprint, source, ids, **values):
+        """Log one batch of row updates (numeric columns, one value per id) as one transaction; returns its seq"""
+        return self.append_many(fingerprint, source, [(ids, values)])[-1]
+
+    def append_many(self, fingerprint, source, batches):
+        """Log several (ids, {column: values}) batches against base data ``fingerprint`` atomically; returns their seqs"""
+        db = self._connect()
+        now = time.time()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            seqs = [db.execute('INSERT INTO changes (fingerprint, source, columns, payload, created_at) '
+                               'VALUES (?, ?, ?, ?, ?)',
+                               (fingerprint, source, json.dumps(sorted(values)), _pack(ids, values), now)).lastrowid
+                    for ids, values in batches]
+            # Remember how far batches were dropped, so a reader that is further behind knows it cannot catch up
+            trimmed = db.execute('SELECT MAX(seq) FROM changes WHERE created_at < ?',
+                                 (now - CHANGE_RETENTION,)).fetchone()[0]
+            if trimmed is not None:
+                db.execute('DELETE FROM changes WHERE seq <= ?', (trimmed,))
+                db.execute('INSERT INTO trimmed (id, seq) VALUES (0, ?) '
+                           'ON CONFLICT (id) DO UPDATE SET seq = MAX(seq, excluded.seq)', (trimmed,))
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return seqs
+
+    def last_seq(self):
+        """Sequence number of the latest logged batch (0 when empty)"""
+        row = self._connect().execute('SELECT MAX(seq) FROM changes').fetchone()
+        return row[0] or 0
+
+    def trimmed_seq(self):
+        """Sequence number of the latest batch dropped after CHANGE_RETENTION (0 when none was)"""
+        row = self._connect().execute('SELECT seq FROM trimmed').fetchone()
+        return row[0] if row else 0
+
+    def since(self, seq, fingerprint):
+        """(seq, ids, {column: values}) of every batch logged against ``fingerprint`` after ``seq``, in order"""
+        rows = self._connect().execute(
+            'SELECT seq, columns, payload FROM changes WHERE seq > ? AND fingerprint = ? ORDER BY seq',
+            (seq, fingerprint)
+        ).fetchall()
+        for batch_seq, columns, payload in rows:
+            yield (batch_seq,) + _unpack(columns, payload)
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_change_log():
+    """Return this process's handle on the shared change log"""
+    global _log
+    if _log is None:
+        with _log_lock:
+            if _log is None:
+                _log = ChangeLog()
+    return _log
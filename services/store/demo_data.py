@@ -0,0 +1,171 @@
+import numpy as np
+
+# Filter values offered on the overview page
+ACTIVITIES = ["Trade Planning", "Trade Execution", "Trade Analysis", "Risk Management",
+              "Portfolio Optimization", "Market Research", "Client Management", "Compliance"]
+CYCLES = ["Cycle 1", "Cycle 2", "Cycle 3", "Cycle 4", "Cycle 5", "Q1 2024", "Q2 2024", "Q3 2024"]
+
+# Slice that carries the reference capacities below unchanged
+BASE_CYCLE = "Cycle 3"
+BASE_ACTIVITY = "Trade Planning"
+
+# Named territories: (area, region, division, territory, state, capacity %, pacing %)
+TERRITORIES = [
+    ('AW - WESTERN AREA', 'SDR - LOS ANGELES REGION', 'DM - San Francisco CA', 'TM - San Francisco CA', 'CA', 110, 42),
+    ('AW - WESTERN AREA', 'SDR - LOS ANGELES REGION', 'DM - Santa Rosa CA', 'TM - Eureka CA', 'CA', 98, 42),
+    ('AW - WESTERN AREA', 'SDR - LOS ANGELES REGION', 'DM - San Francisco CA', 'TM - Livermore CA', 'CA', 120, 82),
+    ('AW - WESTERN AREA', 'SDR - LOS ANGELES REGION', 'DM - Los Angeles CA', 'TM - Hollywood CA', 'CA', 87, 42),
+    ('AW - WESTERN AREA', 'SDR - LOS ANGELES REGION', 'DM - Santa Rosa CA', 'TM - La Mesa CA', 'CA', 87, 42),
+    ('AW - WESTERN AREA', 'SDR - LOS ANGELES REGION', 'DM - San Diego CA', 'TM - El Cajon CA', 'CA', 110, 42),
+    ('AW - WESTERN AREA', 'SDR - HOUSTON REGION', 'DM - Bakersfield CA', 'TM - Escondido CA', 'CA', 110, 42),
+    ('AW - WESTERN AREA', 'SDR - HOUSTON REGION', 'DM - Houston North TX', 'TM - Lancaster CA', 'CA', 87, 42),
+    ('AW - WESTERN AREA', 'SDR - HOUSTON REGION', 'DM - Sacramento CA', 'TM - Houston TX', 'TX', 87, 42),
+]
+
+# One statewide territory for every other state: state -> (area, region, name, capacity %)
+STATE_TERRITORIES = {
+    'OR': ('AW - WESTERN AREA', 'SDR - PACIFIC REGION', 'Oregon', 96),
+    'WA': ('AW - WESTERN AREA', 'SDR - PACIFIC REGION', 'Washington', 94),
+    'AK': ('AW - WESTERN AREA', 'SDR - PACIFIC REGION', 'Alaska', 45),
+    'HI': ('AW - WESTERN AREA', 'SDR - PACIFIC REGION', 'Hawaii', 92),
+    'NV': ('AW - WESTERN AREA', 'SDR - MOUNTAIN REGION', 'Nevada', 45),
+    'AZ': ('AW - WESTERN AREA', 'SDR - MOUNTAIN REGION', 'Arizona', 85),
+    'CO': ('AW - WESTERN AREA', 'SDR - MOUNTAIN REGION', 'Colorado', 82),
+    'NM': ('AW - WESTERN AREA', 'SDR - MOUNTAIN REGION', 'New Mexico', 78),
+    'UT': ('AW - WESTERN AREA', 'SDR - MOUNTAIN REGION', 'Utah', 80),
+    'ID': ('AW - WESTERN AREA', 'SDR - MOUNTAIN REGION', 'Idaho', 48),
+    'MT': ('AW - WESTERN AREA', 'SDR - MOUNTAIN REGION', 'Montana', 83),
+    'WY': ('AW - WESTERN AREA', 'SDR - MOUNTAIN REGION', 'Wyoming', 52),
+    'ND': ('AC - CENTRAL AREA', 'SDR - PLAINS REGION', 'North Dakota', 89),
+    'SD': ('AC - CENTRAL AREA', 'SDR - PLAINS REGION', 'South Dakota', 55),
+    'NE': ('AC - CENTRAL AREA', 'SDR - PLAINS REGION', 'Nebraska', 58),
+    'KS': ('AC - CENTRAL AREA', 'SDR - PLAINS REGION', 'Kansas', 60),
+    'OK': ('AC - CENTRAL AREA', 'SDR - PLAINS REGION', 'Oklahoma', 86),
+    'MN': ('AC - CENTRAL AREA', 'SDR - PLAINS REGION', 'Minnesota', 91),
+    'IA': ('AC - CENTRAL AREA', 'SDR - PLAINS REGION', 'Iowa', 57),
+    'MO': ('AC - CENTRAL AREA', 'SDR - PLAINS REGION', 'Missouri', 85),
+    'WI': ('AC - CENTRAL AREA', 'SDR - GREAT LAKES REGION', 'Wisconsin', 90),
+    'IL': ('AC - CENTRAL AREA', 'SDR - GREAT LAKES REGION', 'Illinois', 92),
+    'IN': ('AC - CENTRAL AREA', 'SDR - GREAT LAKES REGION', 'Indiana', 88),
+    'MI': ('AC - CENTRAL AREA', 'SDR - GREAT LAKES REGION', 'Michigan', 89),
+    'OH': ('AC - CENTRAL AREA', 'SDR - GREAT LAKES REGION', 'Ohio', 87),
+    'AR': ('AC - CENTRAL AREA', 'SDR - SOUTH CENTRAL REGION', 'Arkansas', 62),
+    'LA': ('AC - CENTRAL AREA', 'SDR - SOUTH CENTRAL REGION', 'Louisiana', 88),
+    'MS': ('AC - CENTRAL AREA', 'SDR - SOUTH CENTRAL REGION', 'Mississippi', 65),
+    'AL': ('AC - CENTRAL AREA', 'SDR - SOUTH CENTRAL REGION', 'Alabama', 68),
+    'TN': ('AC - CENTRAL AREA', 'SDR - SOUTH CENTRAL REGION', 'Tennessee', 70),
+    'KY': ('AC - CENTRAL AREA', 'SDR - SOUTH CENTRAL REGION', 'Kentucky', 72),
+    'FL': ('AE - EASTERN AREA', 'SDR - SOUTHEAST REGION', 'Florida', 92),
+    'GA': ('AE - EASTERN AREA', 'SDR - SOUTHEAST REGION', 'Georgia', 91),
+    'SC': ('AE - EASTERN AREA', 'SDR - SOUTHEAST REGION', 'South Carolina', 80),
+    'NC': ('AE - EASTERN AREA', 'SDR - SOUTHEAST REGION', 'North Carolina', 82),
+    'VA': ('AE - EASTERN AREA', 'SDR - SOUTHEAST REGION', 'Virginia', 78),
+    'WV': ('AE - EASTERN AREA', 'SDR - SOUTHEAST REGION', 'West Virginia', 75),
+    'NY': ('AE - EASTERN AREA', 'SDR - MID-ATLANTIC REGION', 'New York', 87),
+    'PA': ('AE - EASTERN AREA', 'SDR - MID-ATLANTIC REGION', 'Pennsylvania', 86),
+    'MD': ('AE - EASTERN AREA', 'SDR - MID-ATLANTIC REGION', 'Maryland', 84),
+    'DE': ('AE - EASTERN AREA', 'SDR - MID-ATLANTIC REGION', 'Delaware', 82),
+    'NJ': ('AE - EASTERN AREA', 'SDR - MID-ATLANTIC REGION', 'New Jersey', 88),
+    'CT': ('AE - EASTERN AREA', 'SDR - NEW ENGLAND REGION', 'Connecticut', 85),
+    'RI': ('AE - EASTERN AREA', 'SDR - NEW ENGLAND REGION', 'Rhode Island', 83),
+    'MA': ('AE - EASTERN AREA', 'SDR - NEW ENGLAND REGION', 'Massachusetts', 89),
+    'VT': ('AE - EASTERN AREA', 'SDR - NEW ENGLAND REGION', 'Vermont', 87),
+    'NH': ('AE - EASTERN AREA', 'SDR - NEW ENGLAND REGION', 'New Hampshire', 86),
+    'ME': ('AE - EASTERN AREA', 'SDR - NEW ENGLAND REGION', 'Maine', 88),
+}
+
+
+def _demo_territories():
+    """List every demo territory as (area, region, division, territory, state, capacity %, pacing %)"""
+    territories = list(TERRITORIES)
+    for state, (area, region, name, capacity) in STATE_TERRITORIES.items():
+        territories.append((area, region, f'DM - {name}', f'TM - {name}', state, capacity, 42))
+    return territories
+
+
+def generate_demo_columns(scale=1, seed=7):
+    """Generate demo capacity data as columns, one row per cycle x activity x territory
+
+    The (BASE_CYCLE, BASE_ACTIVITY) slice carries the reference capacities
+    unchanged; other slices are seeded variations of them. ``scale`` repeats
+    each territory under numbered copies to produce large benchmark tables.
+    """
+    rng = np.random.default_rng(seed)
+    territories = _demo_territories()
+    if scale > 1:
+        territories = territories + [
+            (area, region, f'{division} #{copy}', f'{territory} #{copy}', state, capacity, pacing)
+            for copy in range(2, scale + 1)
+            for area, region, division, territory, state, capacity, pacing in territories
+        ]
+
+    n_territories = len(territories)
+    area, region, division, territory, state, base_capacity, base_pacing = map(list, zip(*territories))
+    base_capacity = np.array(base_capacity, dtype=np.int32)
+    base_pacing = np.array(base_pacing, dtype=np.int32)
+    targets = rng.integers(800, 2400, size=n_territories).astype(np.int32)
+
+    # The reference slice comes first so its rows keep ids 1..9 like the original sample grid
+    slices = [(BASE_CYCLE, BASE_ACTIVITY)] + [
+        (cycle, activity) for cycle in CYCLES for activity in ACTIVITIES
+        if (cycle, activity) != (BASE_CYCLE, BASE_ACTIVITY)
+    ]
+
+    data = {key: [] for key in ('cycle', 'activity', 'tm_area', 'tm_region', 'tm_division',
+                                'tm_territory', 'state')}
+    capacity_parts, pacing_parts = [], []
+    for cycle, activity in slices:
+        if (cycle, activity) == (BASE_CYCLE, BASE_ACTIVITY):
+            capacity, pacing = base_capacity, base_pacing
+        else:
+            capacity = np.clip(base_capacity + rng.integers(-15, 16, size=n_territories), 20, 140)
+            pacing = np.clip(base_pacing + rng.integers(-20, 41, size=n_territories), 0, 100)
+        capacity_parts.append(capacity)
+        pacing_parts.append(pacing)
+        data['cycle'] += [cycle] * n_territories
+        data['activity'] += [activity] * n_territories
+        data['tm_area'] += area
+        data['tm_region'] += region
+        data['tm_division'] += division
+        data['tm_territory'] += territory
+        data['state'] += state
+
+    capacity = np.concatenate(capacity_parts)
+    target = np.tile(targets, len(slices))
+    data.update({
+        'id': np.arange(1, len(capacity) + 1, dtype=np.int64),
+        'capacity_target': target,
+        'capacity_used': (target * capacity // 100).astype(np.int32),
+        'capacity_percent': capacity.astype(np.int16),
+        'pacing_percent': np.concatenate(pacing_parts).astype(np.int16),
+    })
+    return data
+
+
+def generate_demo_activity(ids, targets, pacing, days=60, end=None, seed=11):
+    """Generate daily activity partitions whose running totals reach the given pacing
+
+    Returns [(day, ids, counts)] for the ``days`` days ending at ``end``
+    (yesterday by default). Each row's total activity, target x pacing %,
+    is spread over the days with a shared, noisy daily profile.
+    """
+    import datetime
+
+    rng = np.random.default_rng(seed)
+    end = end or datetime.date.today() - datetime.timedelta(days=1)
+    totals = np.round(np.asarray(targets, dtype=np.float64) * np.asarray(pacing) / 100).astype(np.int64)
+    # Share of each row's activity landing on each day: weekday-heavy, with per-day noise
+    weights = np.array([0.3 if (end - datetime.timedelta(days=days - 1 - d)).weekday() >= 5 else 1.0
+                        for d in range(days)]) * rng.uniform(0.7, 1.3, size=days)
+    cumulative_share = np.cumsum(weights) / weights.sum()
+
+    partitions = []
+    reached = np.zeros(len(totals), dtype=np.int64)
+    for d in range(days):
+        target_so_far = np.round(totals * cumulative_share[d]).astype(np.int64)
+        counts = target_so_far - reached
+        reached = target_so_far
+        active = np.flatnonzero(counts)
+        day = end - datetime.timedelta(days=days - 1 - d)
+        partitions.append((day, np.asarray(ids)[active], counts[active].astype(np.int32)))
+    return partitions
@@ -0,0 +1,139 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from services.activity.activity_store import get_activity_store
+from services.hierarchy.hierarchy_index import LEVELS
+from services.store.capacity_store import GRID_COLUMNS, get_capacity_store, group_rows
+
+# Territory details kept per worker
+TERRITORY_CACHE_SIZE = 128
+
+# Columns of the territory's rows kept in its detail
+DETAIL_COLUMNS = GRID_COLUMNS + ('cycle', 'activity')
+
+# Summary and history of one territory:
+#   hierarchy - {level: name} of the territory and its ancestors
+#   records   - {row id: record} of the territory's rows (one per cycle and activity)
+#   cycles    - cycle names in the trend order
+#   capacity  - {activity: capacity % per cycle}, None where the activity has no target in a cycle;
+#               key None holds the territory's totals over all activities
+#   weeks     - ISO dates of the weeks with landed activity
+#   pacing    - {row id: cumulative pacing % at the end of each week}
+TerritoryDetail = namedtuple('TerritoryDetail', ['hierarchy', 'records', 'cycles', 'capacity', 'weeks', 'pacing'])
+
+
+def _percents(used, target):
+    return [int(round(u * 100 / t)) if t else None for u, t in zip(used.tolist(), target.tolist())]
+
+
+class TerritoryDetails:
+    """Per-territory summaries and compact history series, built once and kept until the territory changes
+
+    Details are keyed by the territory's category code in a small LRU. A
+    store update drops the details of the territories its rows belong to
+    (new activity reaches the store as pacing_percent updates), so cached
+    details never outlive the data they were built from.
+    """
+
+    def __init__(self, store, activity, maxsize=TERRITORY_CACHE_SIZE):
+        self.store = store
+        self.activity = activity
+        self.maxsize = maxsize
+        self.territory = store.categorical['tm_territory']
+        self.order, self.offsets = group_rows(self.territory.codes, len(self.territory.categories))
+        self._details = OrderedDict()
+        # Bumped on every invalidation, so a detail built from older data is not cached
+        self._stamps = np.zeros(len(self.territory.categories), dtype=np.int64)
+        self._lock = threading.Lock()
+        store.subscribe(self._on_change)
+
+    def _on_change(self, change):
+        codes = np.unique(self.territory.codes[change.rows]).tolist()
+        with self._lock:
+            self._stamps[codes] += 1
+            for code in codes:
+                self._details.pop(code, None)
+
+    def _build(self, code):
+        store = self.store
+        rows = self.order[self.offsets[code]:self.offsets[code + 1]]
+        with store.lock:
+            records = store.records(rows, DETAIL_COLUMNS)
+            used = store.numeric['capacity_used'][rows].astype(np.float64)
+            target = store.numeric['capacity_target'][rows].astype(np.float64)
+        first = records[0] if records else {}
+        hierarchy = {level: first.get(level, '') for level in LEVELS}
+
+        # Capacity trend over cycles, per activity and over all activities
+        cycle = store.categorical['cycle']
+        activity = store.categorical['activity']
+        cycle_codes = cycle.codes[rows]
+        present = np.unique(cycle_codes)
+        n_cycles = len(cycle.categories)
+        capacity = {None: _percents(np.bincount(cycle_codes, used, n_cycles)[present],
+                                    np.bincount(cycle_codes, target, n_cycles)[present])}
+        activity_codes = activity.codes[rows]
+        for activity_code in np.unique(activity_codes).tolist():
+            mask = activity_codes == activity_code
+            capacity[activity.categories[activity_code]] = _percents(
+                np.bincount(cycle_codes[mask], used[mask], n_cycles)[present],
+                np.bincount(cycle_codes[mask], target[mask], n_cycles)[present])
+
+        # Pacing by week: cumulative activity over each row's target
+        weeks, cumulative = self.activity.weekly_activity(rows)
+        pacing = np.round(cumulative * 100 / np.maximum(target, 1)[:, None]).astype(int).tolist()
+        return TerritoryDetail(
+            hierarchy=hierarchy,
+            records={record['id']: record for record in records},
+            cycles=[cycle.categories[c] for c in present.tolist()],
+            capacity=capacity,
+            weeks=[week.isoformat() for week in weeks],
+            pacing={record['id']: series for record, series in zip(records, pacing)}
+        )
+
+    def detail(self, code):
+        """TerritoryDetail of a territory by category code, built on first use"""
+        with self._lock:
+            detail = self._details.get(code)
+            if detail is not None:
+                self._details.move_to_end(code)
+                return detail
+            stamp = self._stamps[code]
+
+        detail = self._build(code)
+        with self._lock:
+            # Changed while being built: serve it once, build again next time
+            if self._stamps[code] == stamp:
+                self._details[code] = detail
+                if len(self._details) > self.maxsize:
+                    self._details.popitem(last=False)
+        return detail
+
+    def for_row(self, row_id):
+        """(TerritoryDetail, record) for the territory of a capacity row id, or (None, None) for an unknown id"""
+        position = self.store.positions.get(row_id)
+        if position is None:
+            return None, None
+        detail = self.detail(int(self.territory.codes[position]))
+        return detail, detail.records.get(row_id)
+
+    def preload(self):
+        """Build the details of up to ``maxsize`` territories ahead of the first selection"""
+        for code in range(min(len(self.territory.categories), self.maxsize)):
+            self.detail(code)
+
+
+_details = None
+_details_lock = threading.Lock()
+
+
+def get_territory_details():
+    """Return this worker's territory details, invalidated by store updates"""
+    global _details
+    if _details is None:
+        with _details_lock:
+            if _details is None:
+                _details = TerritoryDetails(get_capacity_store(), get_activity_store())
+    return _details
@@ -0,0 +1,48 @@
+import functools
+import hashlib
+import os
+
+from flask import request
+
+# The app's assets_folder, served under ASSETS_URL_PATH
+ASSETS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'static')
+ASSETS_URL_PATH = '/assets/'
+
+# Fingerprinted URLs never change content, so browsers may keep them for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Query parameters carrying a fingerprint: 'v' from asset_url(), 'm' from Dash's own asset links
+FINGERPRINT_PARAMS = ('v', 'm')
+
+
+@functools.lru_cache(maxsize=None)
+def _fingerprint(path, mtime):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def asset_url(name):
+    """URL of an asset with a content-hash fingerprint, e.g. /assets/logo.png?v=3f2a9c01b7de"""
+    path = os.path.join(ASSETS_FOLDER, name)
+    try:
+        version = _fingerprint(path, os.path.getmtime(path))
+    except OSError:
+        # Missing file: plain URL, which is served (or 404s) without long-lived caching
+        return ASSETS_URL_PATH + name
+    return f'{ASSETS_URL_PATH}{name}?v={version}'
+
+
+def init_asset_caching(server):
+    """Serve fingerprinted assets and Dash's versioned bundles as immutable"""
+
+    @server.after_request
+    def cache_fingerprinted(response):
+        if response.status_code not in (200, 304):
+            return response
+        path = request.path
+        if path.startswith(ASSETS_URL_PATH) and any(request.args.get(p) for p in FINGERPRINT_PARAMS):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        elif path.startswith('/_dash-component-suites/') and 'max-age' in (response.headers.get('Cache-Control') or ''):
+            # Dash embeds the package version and mtime in these file names
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -0,0 +1,167 @@
+"""Build the self-hosted Bootstrap theme and Font Awesome icon subset
+
+Run from the project root whenever icons are added or removed:
+
+    python -m services.web.build_assets [--source-dir DIR]
+
+Scans main.py, components/, modules/ and static/clientside.js for ``fa-*``
+icon classes. Writes to static/vendor/ (served from the app's own
+assets_folder):
+
+- ``bootstrap.min.css``: the Bootstrap theme.
+- ``fontawesome-subset.css``: the base icon rules and one rule per used
+  icon.
+- ``fa-solid-900.woff2``: the solid webfont cut down to the used glyphs.
+  This needs fontTools (``pip install fonttools brotli``). Without it, the
+  full ``fa-solid-900.ttf`` is shipped instead.
+
+Upstream files are downloaded from jsDelivr, or read from ``--source-dir``
+when it holds files of the same names (for builds without internet
+access).
+"""
+import argparse
+import hashlib
+import io
+import os
+import re
+import urllib.request
+
+from services.web.assets import ASSETS_FOLDER
+
+BOOTSTRAP_VERSION = '5.3.8'
+FONT_AWESOME_VERSION = '6.0.0'
+
+SOURCES = {
+    'bootstrap.min.css': f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/css/bootstrap.min.css',
+    'all.min.css': f'https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@{FONT_AWESOME_VERSION}/css/all.min.css',
+    'fa-solid-900.ttf': f'https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@{FONT_AWESOME_VERSION}/webfonts/fa-solid-900.ttf',
+}
+
+PROJECT_ROOT = os.path.dirname(ASSETS_FOLDER)
+VENDOR_DIR = os.path.join(ASSETS_FOLDER, 'vendor')
+
+# Files and folders whose icon classes make up the subset
+SCAN_PATHS = ('main.py', 'components', 'modules', os.path.join('static', 'clientside.js'))
+SCAN_EXTENSIONS = ('.py', '.js')
+
+# Style classes: only the solid style ships with the subset
+SOLID_CLASSES = {'fa', 'fas', 'fa-solid'}
+UNSUPPORTED_STYLES = {'far', 'fa-regular', 'fab', 'fa-brands'}
+
+_CLASS_TOKEN = re.compile(r'(?<![\w-])(fa[srb]?(?:-[a-z0-9]+)*)(?![\w-])')
+_ICON_RULE = re.compile(r'([^{}]+)\{\s*content:\s*"\\([0-9a-fA-F]+)";?\s*\}')
+_ICON_SELECTOR = re.compile(r'\.(fa-[a-z0-9-]+)::?before')
+
+_BASE_CSS = (
+    '@font-face{{font-family:"Font Awesome 6 Free";font-style:normal;font-weight:900;font-display:block;'
+    'src:url({font}) format("{format}")}}\n'
+    '.fa,.fas,.fa-solid{{-moz-osx-font-smoothing:grayscale;-webkit-font-smoothing:antialiased;'
+    'display:var(--fa-display,inline-block);font-style:normal;font-variant:normal;line-height:1;'
+    'text-rendering:auto;font-family:"Font Awesome 6 Free";font-weight:900}}\n'
+)
+
+
+def fetch(name, source_dir=None):
+    """Bytes of an upstream file, from ``source_dir`` when it has it, otherwise from the CDN"""
+    if source_dir and os.path.exists(os.path.join(source_dir, name)):
+        with open(os.path.join(source_dir, name), 'rb') as f:
+            return f.read()
+    with urllib.request.urlopen(SOURCES[name], timeout=30) as response:
+        return response.read()
+
+
+def used_classes():
+    """Every fa-* style or icon class token in the scanned sources"""
+    classes = set()
+    for scan_path in SCAN_PATHS:
+        path = os.path.join(PROJECT_ROOT, scan_path)
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = [os.path.join(root, name) for root, _, names in os.walk(path)
+                     for name in names if name.endswith(SCAN_EXTENSIONS)]
+        for file_path in files:
+            with open(file_path, encoding='utf-8') as f:
+                classes.update(_CLASS_TOKEN.findall(f.read()))
+    return classes
+
+
+def icon_codepoints(css):
+    """{icon class: codepoint} for every icon (and alias) in Font Awesome's CSS"""
+    icons = {}
+    for selectors, codepoint in _ICON_RULE.findall(css):
+        for name in _ICON_SELECTOR.findall(selectors):
+            icons[name] = int(codepoint, 16)
+    return icons
+
+
+def subset_font(font, codepoints):
+    """(file name, CSS format, bytes): a woff2 font cut down to ``codepoints``, or the full TrueType font without fontTools"""
+    try:
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+    except ImportError:
+        print('fontTools not installed: shipping the full solid webfont')
+        return 'fa-solid-900.ttf', 'truetype', font
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = []
+    face = TTFont(io.BytesIO(font))
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(face)
+    out = io.BytesIO()
+    face.flavor = 'woff2'
+    face.save(out)
+    return 'fa-solid-900.woff2', 'woff2', out.getvalue()
+
+
+def build(source_dir=None):
+    """Write the vendor assets and return {file name: size in bytes}"""
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+
+    classes = used_classes()
+    unsupported = classes & UNSUPPORTED_STYLES
+    if unsupported:
+        raise SystemExit(f'Only solid icons are bundled; found {", ".join(sorted(unsupported))}')
+
+    icons = icon_codepoints(fetch('all.min.css', source_dir).decode('utf-8'))
+    used = sorted(name for name in classes if name in icons)
+    unknown = sorted(classes - set(icons) - SOLID_CLASSES)
+    if unknown:
+        print(f'Ignoring classes that are not Font Awesome {FONT_AWESOME_VERSION} icons: {", ".join(unknown)}')
+
+    font_name, font_format, font = subset_font(fetch('fa-solid-900.ttf', source_dir),
+                                               sorted({icons[name] for name in used}))
+    version = hashlib.sha1(font).hexdigest()[:12]
+    css = [f'/*! Font Awesome Free {FONT_AWESOME_VERSION} subset (https://fontawesome.com, License: '
+           'https://fontawesome.com/license/free) - generated by services/web/build_assets.py, do not edit */\n',
+           _BASE_CSS.format(font=f'{font_name}?v={version}', format=font_format)]
+    css += [f'.{name}::before{{content:"\\{icons[name]:x}"}}\n' for name in used]
+
+    # No source map is shipped, so drop the reference to it
+    bootstrap = re.sub(rb'/\*# sourceMappingURL=[^*]*\*/\s*$', b'', fetch('bootstrap.min.css', source_dir))
+
+    outputs = {
+        'bootstrap.min.css': bootstrap,
+        'fontawesome-subset.css': ''.join(css).encode('utf-8'),
+        font_name: font,
+    }
+    for name, data in outputs.items():
+        with open(os.path.join(VENDOR_DIR, name), 'wb') as f:
+            f.write(data)
+    print(f'{len(used)} icons: {", ".join(used)}')
+    return {name: len(data) for name, data in outputs.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source-dir', help='directory with upstream files to use instead of downloading them')
+    args = parser.parse_args()
+    for name, size in build(args.source_dir).items():
+        print(f'  {size / 1024:8.1f} KB  static/vendor/{name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import gzip
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Responses smaller than this go out as they are; compression would not pay for itself
+COMPRESS_MIN_SIZE = 1024
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/css',
+    'text/html',
+    'text/plain',
+    'text/csv',
+    'image/svg+xml',
+}
+
+# Fast settings for per-request payloads, stronger ones for static files compressed once
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 9
+
+# Compressed bodies of long-cached static files kept per worker
+STATIC_CACHE_SIZE = 128
+
+
+def _negotiate():
+    """Best encoding the client accepts: 'br', 'gzip' or None"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding, static):
+    if encoding == 'br':
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL)
+
+
+class ResponseCompressor:
+    """gzip/brotli compression of a Flask server's responses above a size threshold
+
+    Callback responses (figure JSON, grid row blocks) and the index and
+    layout are compressed per request. Static files served with a
+    long-lived Cache-Control are compressed once per worker and reused.
+    """
+
+    def __init__(self, min_size=COMPRESS_MIN_SIZE):
+        self.min_size = min_size
+        self._static = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, server):
+        server.after_request(self.compress_response)
+
+    def compress_response(self, response):
+        # Generator responses (streamed exports) are left alone; files are read below
+        if (response.status_code != 200
+                or (response.is_streamed and not response.direct_passthrough)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = _negotiate()
+        if encoding is None:
+            return response
+
+        # File responses are passed straight through by default; read them to compress
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        static = 'max-age' in (response.headers.get('Cache-Control') or '') and request.method == 'GET'
+        if static:
+            key = (request.full_path, encoding, len(data))
+            with self._lock:
+                body = self._static.get(key)
+            if body is None:
+                body = _compress(data, encoding, static=True)
+                with self._lock:
+                    self._static[key] = body
+                    if len(self._static) > STATIC_CACHE_SIZE:
+                        self._static.popitem(last=False)
+        else:
+            body = _compress(data, encoding, static=False)
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        # The compressed body differs from the identity one, so its validator is only weakly equal
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,239 @@
+/* Clientside callbacks for Reynolds Trade Capacity Manager
+ *
+ * Pure UI state changes that run in the browser and never reach the
+ * server. Registered from main.py through server_free_callback().
+ */
+
+const SIDEBAR_WIDTH = '280px';
+
+function triggeredId() {
+    const triggered = window.dash_clientside.callback_context.triggered;
+    if (!triggered || !triggered.length) {
+        return null;
+    }
+    return triggered[0].prop_id.split('.')[0];
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    ui: {
+        // Show/hide the password on the login form
+        togglePassword: function(n_clicks, current_type) {
+            if (n_clicks) {
+                if (current_type === 'password') {
+                    return ['text', 'fas fa-eye-slash'];
+                }
+                return ['password', 'fas fa-eye'];
+            }
+            return [current_type, 'fas fa-eye'];
+        },
+
+        // Clear the alert once the alert interval has fired
+        autoHideAlert: function(n_intervals, alert_data) {
+            if (n_intervals && alert_data) {
+                return [null, true, 0];
+            }
+            throw window.dash_clientside.PreventUpdate;
+        },
+
+        // Slide the sidebar in on odd hamburger clicks and out on even ones
+        toggleSidebar: function(n_clicks) {
+            const isOpen = Boolean(n_clicks) && n_clicks % 2 === 1;
+
+            const sidebarStyle = {
+                position: 'fixed',
+                top: '0',
+                left: isOpen ? '0' : '-' + SIDEBAR_WIDTH,
+                width: SIDEBAR_WIDTH,
+                height: '100vh',
+                backgroundColor: 'white',
+                boxShadow: '2px 0 5px rgba(0,0,0,0.1)',
+                transition: 'left 0.3s ease',
+                zIndex: '1050',
+                display: 'flex',
+                flexDirection: 'column'
+            };
+
+            const mainStyle = {
+                marginLeft: isOpen ? SIDEBAR_WIDTH : '0',
+                transition: 'margin-left 0.3s ease'
+            };
+
+            const overlayStyle = {
+                position: 'fixed',
+                top: '0',
+                left: '0',
+                width: '100vw',
+                height: '100vh',
+                backgroundColor: isOpen ? 'rgba(0, 0, 0, 0.5)' : 'rgba(0, 0, 0, 0)',
+                zIndex: '999',
+                pointerEvents: isOpen ? 'auto' : 'none',
+                transition: 'background-color 0.3s ease'
+            };
+
+            return [sidebarStyle, mainStyle, overlayStyle, {isOpen: isOpen}];
+        },
+
+        // Close the sidebar when the overlay is clicked
+        closeSidebarOnOverlay: function(overlay_clicks, hamburger_clicks, sidebar_state) {
+            if (overlay_clicks && sidebar_state && sidebar_state.isOpen) {
+                // Increment hamburger clicks to close sidebar
+                return (hamburger_clicks || 0) + 1;
+            }
+            throw window.dash_clientside.PreventUpdate;
+        },
+
+        // Switch between the map and the graph view
+        toggleViewMode: function(map_clicks, graph_clicks, organize_value) {
+            const buttonId = triggeredId();
+            if (buttonId === null) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+
+            const dropdownStyle = {width: '120px', fontSize: '0.8rem', display: 'inline-block'};
+            if (buttonId === 'btn-graph' && organize_value !== 'area') {
+                return [{display: 'none'}, {display: 'block', minHeight: '400px'}, true, false, dropdownStyle];
+            }
+            return [{display: 'block'}, {display: 'none'}, false, true, dropdownStyle];
+        },
+
+        // Drop the grid's cached row blocks so it re-requests them for new filters
+        purgeGridCache: function() {
+            const api = dash_ag_grid.getApi('capacity-grid');
+            if (api) {
+                api.purgeInfiniteCache();
+            }
+            return window.dash_clientside.no_update;
+        },
+
+        // Pause or resume the grid's live refresh
+        toggleLiveRefresh: function(live) {
+            return !live;
+        },
+
+        // Id of the first selected row (null when none); unchanged ids do not reach the server
+        selectedRowId: function(selected_rows, current_id) {
+            const id = selected_rows && selected_rows.length ? selected_rows[0].id : null;
+            if (id === undefined || id === current_id) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            return id;
+        },
+
+        // Hand an encoded row block to the grid once its dictionary is known to the valueGetters
+        receiveRowsBlock: function(block) {
+            if (!block) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            return {rowData: window.dashAgGridFunctions.decodeBlock(block), rowCount: block.rowCount};
+        },
+
+        // Apply a live refresh delta to the rows the grid has loaded, keeping scroll and selection
+        applyGridDelta: function(delta) {
+            const api = dash_ag_grid.getApi('capacity-grid');
+            if (!api || !delta) {
+                return window.dash_clientside.no_update;
+            }
+            // Rows may move in or out of a sorted or filtered view: reload the blocks in place
+            const ordered = Object.keys(api.getFilterModel() || {}).concat(
+                api.getColumnState().filter(function(c) { return c.sort; }).map(function(c) { return c.colId; })
+            );
+            const columns = delta.changed || [];
+            if (delta.refresh || ordered.some(function(c) { return columns.indexOf(c) >= 0; })) {
+                api.refreshInfiniteCache();
+                return window.dash_clientside.no_update;
+            }
+            const update = window.dashAgGridFunctions.decodeBlock(delta);
+            if (api.getGridOption('rowModelType') !== 'infinite') {
+                api.applyTransaction({update: update});
+                return window.dash_clientside.no_update;
+            }
+            const nodes = [];
+            update.forEach(function(row) {
+                const node = api.getRowNode(String(row.id));
+                if (node) {
+                    node.setData(row);
+                    nodes.push(node);
+                }
+            });
+            if (nodes.length) {
+                api.flashCells({rowNodes: nodes, columns: columns});
+            }
+            return window.dash_clientside.no_update;
+        },
+
+        // Download the grid's current view, streamed by the export route in the picked format
+        exportGrid: function(export_clicks, session_data) {
+            const triggered = window.dash_clientside.callback_context.triggered;
+            const api = dash_ag_grid.getApi('capacity-grid');
+            if (!triggered || !triggered.length || !triggered[0].value || !api) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            // Menu items have pattern-matching ids: {type: 'capacity-grid-export', format}
+            const exportFormat = JSON.parse(triggered[0].prop_id.split('.')[0]).format;
+            const filters = Array.prototype.slice.call(arguments, 2);
+            const view = {
+                filterModel: api.getFilterModel() || {},
+                sortModel: api.getColumnState().filter(function(c) { return c.sort; })
+                    .sort(function(a, b) { return (a.sortIndex || 0) - (b.sortIndex || 0); })
+                    .map(function(c) { return {colId: c.colId, sort: c.sort}; }),
+                filters: filters
+            };
+            // A form post lets the browser write the download to disk as it arrives
+            const form = document.createElement('form');
+            form.method = 'POST';
+            form.action = '/_export/grid';
+            form.target = '_blank';
+            [['sid', (session_data && session_data.sid) || ''],
+             ['format', exportFormat],
+             ['view', JSON.stringify(view)]].forEach(function(field) {
+                const input = document.createElement('input');
+                input.type = 'hidden';
+                input.name = field[0];
+                input.value = field[1];
+                form.appendChild(input);
+            });
+            document.body.appendChild(form);
+            form.submit();
+            form.remove();
+            return window.dash_clientside.no_update;
+        },
+
+        // Coalesce control table cell edits, one pending edit per cell (the latest value wins)
+        queueCellEdits: function(changes, pending) {
+            if (!changes) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            const queued = Object.assign({}, pending);
+            (Array.isArray(changes) ? changes : [changes]).forEach(function(change) {
+                const id = change.data && change.data.id;
+                if (id === undefined || !change.colId) {
+                    return;
+                }
+                queued[id + ':' + change.colId] = {id: id, field: change.colId, value: change.value};
+            });
+            return queued;
+        },
+
+        // Queue the edits of a batch the server could not save again; newer pending edits of a cell win
+        requeueCellEdits: function(ack, pending) {
+            if (!ack || !ack.retry || !ack.retry.length) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            const queued = {};
+            ack.retry.forEach(function(edit) {
+                queued[edit.id + ':' + edit.field] = edit;
+            });
+            return Object.assign(queued, pending);
+        },
+
+        // Send the pending edits as one batch once the previous batch has been acknowledged
+        flushCellEdits: function(n_intervals, pending, batch, ack) {
+            const keys = Object.keys(pending || {});
+            if (!keys.length || (batch && (!ack || batch.seq !== ack.seq))) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            const seq = (batch ? batch.seq : 0) + 1;
+            return [{seq: seq, edits: keys.map(function(key) { return pending[key]; })}, {}];
+        }
+    }
+});
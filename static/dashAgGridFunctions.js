@@ -0,0 +1,44 @@
+/* AG Grid functions for Reynolds Trade Capacity Manager
+ *
+ * Row blocks arrive column by column, with the hierarchy columns as
+ * integer codes plus a dictionary of the codes they use (see
+ * components/grid/grid_query.py). Row objects are rebuilt and the
+ * dictionaries merged here as blocks arrive, and the grid's valueGetters
+ * decode codes for display.
+ */
+
+var dagfuncs = window.dashAgGridFunctions = window.dashAgGridFunctions || {};
+
+// {column: {code: string}}; codes are the store's, so they mean the same in every block
+const gridDictionaries = {};
+
+// Merge a block's dictionary into the known codes
+dagfuncs.registerDictionary = function(dictionary) {
+    Object.keys(dictionary || {}).forEach(function(column) {
+        gridDictionaries[column] = Object.assign(gridDictionaries[column] || {}, dictionary[column]);
+    });
+};
+
+// Row objects of an encoded block: {columns: {column: values}, dictionary: {...}}; registers its dictionary
+dagfuncs.decodeBlock = function(block) {
+    dagfuncs.registerDictionary(block.dictionary);
+    const names = Object.keys(block.columns);
+    const count = names.length ? block.columns[names[0]].length : 0;
+    const rows = new Array(count);
+    for (let i = 0; i < count; i++) {
+        const row = {};
+        names.forEach(function(name) { row[name] = block.columns[name][i]; });
+        rows[i] = row;
+    }
+    return rows;
+};
+
+// Display string of a dictionary-encoded cell; values already sent as strings pass through
+dagfuncs.decodeCategory = function(params, column) {
+    const value = params.data ? params.data[column] : undefined;
+    if (typeof value !== 'number') {
+        return value;
+    }
+    const dictionary = gridDictionaries[column];
+    return dictionary && dictionary[value] !== undefined ? dictionary[value] : value;
+};
@@ -0,0 +1,38 @@
+/* Clientside upload callbacks for Reynolds Trade Capacity Manager
+ *
+ * Files picked in a dcc.Upload are POSTed as raw bytes to a streaming
+ * upload route instead of travelling base64-encoded through a callback,
+ * so the server writes them to disk piece by piece.
+ */
+
+const ACTIVITY_UPLOAD_URL = '/_upload/activities';
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    uploads: {
+        // Send the picked activity plan to the upload route; returns its upload info and clears the picker
+        postActivityPlan: async function(contents, filename, session_data) {
+            if (!contents) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            const body = await (await fetch(contents)).blob();
+            const response = await fetch(
+                ACTIVITY_UPLOAD_URL + '?name=' + encodeURIComponent(filename || ''),
+                {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/octet-stream',
+                        'X-Session-Id': (session_data && session_data.sid) || ''
+                    },
+                    body: body
+                }
+            );
+            let upload;
+            try {
+                upload = await response.json();
+            } catch (e) {
+                upload = {error: 'Upload failed (' + response.status + ')'};
+            }
+            return [upload, null];
+        }
+    }
+});
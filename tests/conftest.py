@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from services.store import change_log as change_log_module
+from services.store.capacity_store import CapacityStore
+from services.store.demo_data import generate_demo_columns
+
+
+@pytest.fixture
+def columns():
+    return generate_demo_columns()
+
+
+@pytest.fixture
+def store(columns):
+    return CapacityStore(columns, 'demo')
+
+
+@pytest.fixture
+def change_log(tmp_path, monkeypatch):
+    """This process's change log, pointed at a temporary file"""
+    log = change_log_module.ChangeLog(str(tmp_path / 'changes.sqlite3'))
+    monkeypatch.setattr(change_log_module, '_log', log)
+    return log
+
+
+def random_updates(store, seed, size=200):
+    """Row ids and new capacity_used/capacity_target values for a random sample of rows"""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(store), size=size, replace=False)
+    return (store.ids[rows].tolist(), rng.integers(0, 5000, size=size), rng.integers(1, 5000, size=size))
@@ -0,0 +1,142 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from conftest import random_updates
+from services.activity import activity_store
+from services.activity.activity_store import ActivityStore, write_partition
+from services.hierarchy.hierarchy_index import HierarchyIndex
+
+DAY = datetime.date(2024, 3, 4)
+
+
+@pytest.fixture
+def hierarchy(store):
+    return HierarchyIndex(store)
+
+
+def days_of_activity(store, seed, days=4):
+    rng = np.random.default_rng(seed)
+    return [(DAY + datetime.timedelta(days=d), store.ids[rows], rng.integers(1, 20, size=len(rows)))
+            for d, rows in enumerate(rng.choice(len(store), size=(days, 300)))]
+
+
+def assert_same_totals(activity, rebuilt):
+    np.testing.assert_allclose(activity.cumulative, rebuilt.cumulative)
+    np.testing.assert_allclose(activity.cycle_target, rebuilt.cycle_target)
+    for name, totals in activity.levels.items():
+        np.testing.assert_allclose(totals['activity'], rebuilt.levels[name]['activity'])
+        np.testing.assert_allclose(totals['target'], rebuilt.levels[name]['target'])
+
+
+def test_ingest_folds_repeated_ids(store, hierarchy):
+    activity = ActivityStore(store, hierarchy)
+    ids = store.ids[[0, 0, 1]]
+    rows = activity.ingest([(DAY, np.append(ids, -5), [3, 4, 5, 9])])
+    assert rows.tolist() == [0, 1]
+    assert activity.cumulative[:2].tolist() == [7, 5]
+    np.testing.assert_array_equal(store.numeric['pacing_percent'][:2], activity.pacing(np.array([0, 1])))
+
+
+def test_replacing_a_day_matches_a_rebuild(store, hierarchy):
+    activity = ActivityStore(store, hierarchy)
+    days = days_of_activity(store, 1)
+    activity.ingest(days)
+    replaced = days_of_activity(store, 2)[:2]
+    activity.ingest(replaced)
+
+    rebuilt = ActivityStore(store, hierarchy)
+    rebuilt.ingest(replaced + days[2:])
+    assert_same_totals(activity, rebuilt)
+    assert sorted(activity.daily) == sorted(rebuilt.daily)
+
+
+def test_targets_follow_store_updates(store, hierarchy):
+    activity = ActivityStore(store, hierarchy)
+    activity.ingest(days_of_activity(store, 3))
+    for seed in range(3):
+        ids, used, target = random_updates(store, seed)
+        store.update_rows(ids, capacity_used=used, capacity_target=target)
+
+    rebuilt = ActivityStore(store, hierarchy)
+    rebuilt.ingest(days_of_activity(store, 3))
+    assert_same_totals(activity, rebuilt)
+    cycle = store.categorical['cycle'].categories[0]
+    assert activity.level_pacing(cycle, 'tm_area') == rebuilt.level_pacing(cycle, 'tm_area')
+    assert activity.cycle_pacing(cycle) == rebuilt.cycle_pacing(cycle)
+
+
+def test_level_pacing_matches_a_scan(store, hierarchy):
+    activity = ActivityStore(store, hierarchy)
+    activity.ingest(days_of_activity(store, 4))
+    cycle = store.categorical['cycle'].categories[1]
+    labels, counts, targets, _ = activity.level_pacing(cycle, 'tm_region')
+
+    regions = np.asarray(store.categorical['tm_region'].decode())
+    in_cycle = np.asarray(store.categorical['cycle'].decode()) == cycle
+    for label, count, target in zip(labels, counts, targets):
+        mask = in_cycle & (regions == label)
+        assert count == activity.cumulative[mask].sum()
+        assert target == store.numeric['capacity_target'][mask].sum()
+
+
+def test_weekly_activity_is_cumulative(store, hierarchy):
+    activity = ActivityStore(store, hierarchy)
+    days = days_of_activity(store, 5, days=10)
+    activity.ingest(days)
+    rows = np.arange(20)
+    weeks, cumulative = activity.weekly_activity(rows)
+    assert weeks == [DAY, DAY + datetime.timedelta(days=7)]
+    np.testing.assert_allclose(cumulative[:, -1], activity.cumulative[rows])
+
+
+def write_settled(directory, day, ids, counts, mtime):
+    """Partition file written ``mtime`` seconds after the epoch, long settled"""
+    path = write_partition(day, ids, counts, directory=str(directory))
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_refresh_lands_new_and_rewritten_files(store, hierarchy, tmp_path):
+    activity = ActivityStore(store, hierarchy)
+    write_settled(tmp_path, DAY, store.ids[:2], [1, 2], 1000)
+    assert activity.refresh(str(tmp_path)).tolist() == [0, 1]
+    assert len(activity.refresh(str(tmp_path))) == 0
+    assert activity.stamp == 1000
+
+    write_settled(tmp_path, DAY, store.ids[:1], [10], 1001)
+    activity.refresh(str(tmp_path))
+    assert activity.cumulative[:2].tolist() == [10, 0]
+    assert activity.last_day == DAY
+    assert activity.stamp == 1001
+
+
+def test_refresh_leaves_files_still_being_written(store, hierarchy, tmp_path):
+    activity = ActivityStore(store, hierarchy)
+    write_partition(DAY, store.ids[:2], [1, 2], directory=str(tmp_path))
+    assert len(activity.refresh(str(tmp_path))) == 0
+    assert activity.stamp == 0
+
+
+def test_changes_since_a_stamp(store, hierarchy, tmp_path, monkeypatch):
+    monkeypatch.setattr(activity_store, 'INGEST_HISTORY', 2)
+    activity = ActivityStore(store, hierarchy)
+    for n, rows in enumerate(([0, 1], [1, 2], [5])):
+        write_settled(tmp_path, DAY + datetime.timedelta(days=n), store.ids[rows], [1] * len(rows), 1000 + n)
+        activity.refresh(str(tmp_path))
+
+    assert activity.changes_since(1002).tolist() == []
+    assert activity.changes_since(1001).tolist() == [5]
+    assert activity.changes_since(1000).tolist() == [1, 2, 5]
+    # The first ingest is no longer kept
+    assert activity.changes_since(999) is None
+
+
+def test_target_edits_recompute_stored_pacing(store, hierarchy):
+    activity = ActivityStore(store, hierarchy)
+    activity.ingest(days_of_activity(store, 6))
+    rows = np.arange(5)
+    store.update_rows(store.ids[rows].tolist(), capacity_target=store.numeric['capacity_target'][rows] * 4)
+    np.testing.assert_array_equal(store.numeric['pacing_percent'][rows], activity.pacing(rows))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from services.simulation import capacity_simulation
+from services.simulation.capacity_simulation import (PERCENTILES, SimulationParams, SimulationResult, simulate,
+                                                     territory_inputs)
+
+PARAMS = SimulationParams(scenarios=200, horizon_weeks=4)
+
+
+@pytest.fixture
+def inputs(store):
+    return territory_inputs(store, np.arange(len(store)))
+
+
+def test_inputs_pool_rows_per_territory(store, inputs):
+    assert inputs.territories == store.categorical['tm_territory'].categories
+    np.testing.assert_allclose(inputs.target.sum(), store.numeric['capacity_target'].sum())
+    np.testing.assert_allclose(inputs.realized + inputs.remaining,
+                               np.bincount(store.categorical['tm_territory'].codes,
+                                           weights=store.numeric['capacity_used']))
+
+
+def test_simulation_is_reproducible(inputs):
+    first = simulate(inputs, PARAMS)
+    second = simulate(inputs, PARAMS)
+    np.testing.assert_array_equal(first.bands, second.bands)
+    assert first.bands.shape == (len(inputs.territories), len(PERCENTILES))
+    assert (np.diff(first.bands, axis=1) >= 0).all()
+    assert not np.array_equal(simulate(inputs, PARAMS._replace(seed=8)).bands, first.bands)
+
+
+def test_areas_split_into_blocks(inputs, monkeypatch):
+    whole = simulate(inputs, PARAMS)
+    monkeypatch.setattr(capacity_simulation, 'BLOCK_CELLS', PARAMS.scenarios * 7)
+    progress = []
+    blocked = simulate(inputs, PARAMS, progress=lambda fraction, message: progress.append(fraction))
+    # Blocks draw their own territory shocks, so only the distribution is the same
+    np.testing.assert_allclose(blocked.bands[:, 2].mean(), whole.bands[:, 2].mean(), rtol=0.02)
+    assert len(progress) == sum(-(-n // 7) for n in np.bincount(inputs.area_codes) if n)
+    assert progress[-1] == 1.0
+
+
+def test_progress_can_stop_the_run(inputs):
+    def stop(fraction, message):
+        raise RuntimeError('cancelled')
+
+    with pytest.raises(RuntimeError):
+        simulate(inputs, PARAMS, progress=stop)
+
+
+def test_result_round_trips_as_a_dict(inputs):
+    result = simulate(inputs, PARAMS)
+    restored = SimulationResult.from_dict(result.to_dict())
+    np.testing.assert_allclose(restored.bands, result.bands, atol=0.005)
+    assert restored.params == PARAMS
+    assert restored.ranked(3).tolist() == result.ranked(3).tolist()
@@ -0,0 +1,120 @@
+import numpy as np
+
+from services.store.capacity_store import MAX_CAPACITY_PERCENT, CapacityStore, logged_changes, sync_changes
+from services.store.demo_data import generate_demo_columns
+
+
+def test_categorical_codes_follow_sorted_categories(store, columns):
+    for name in ('cycle', 'tm_area', 'tm_territory'):
+        column = store.categorical[name]
+        assert column.categories == sorted(column.categories)
+        assert column.decode() == [str(v) for v in columns[name]]
+
+
+def test_update_rows_derives_capacity_percent(store):
+    row_id = int(store.ids[0])
+    change = store.update_rows([row_id], capacity_used=[150], capacity_target=[200])
+
+    assert change.version == store.version == 1
+    assert change.new['capacity_percent'].tolist() == [75]
+    record = store.record(row_id, ('capacity_used', 'capacity_target', 'capacity_percent'))
+    assert record == {'capacity_used': 150, 'capacity_target': 200, 'capacity_percent': 75}
+
+
+def test_update_rows_skips_unknown_ids_and_keeps_last_value(store):
+    row_id = int(store.ids[3])
+    assert store.update_rows([-1], capacity_target=[10]) is None
+    change = store.update_rows([row_id, -1, row_id], capacity_target=[10, 20, 30])
+    assert change.rows.tolist() == [3]
+    assert store.numeric['capacity_target'][3] == 30
+
+
+def test_listeners_receive_old_and_new_values(store):
+    changes = []
+    store.subscribe(changes.append)
+    before = int(store.numeric['capacity_target'][5])
+    store.update_rows([int(store.ids[5])], capacity_target=[before + 7])
+    assert changes[0].old['capacity_target'].tolist() == [before]
+    assert changes[0].new['capacity_target'].tolist() == [before + 7]
+
+
+def test_capacity_by_matches_groupby(store):
+    labels, percents = store.capacity_by('tm_area')
+    area = np.asarray(store.categorical['tm_area'].decode())
+    for label, percent in zip(labels, percents):
+        mask = area == label
+        used = store.numeric['capacity_used'][mask].sum()
+        target = store.numeric['capacity_target'][mask].sum()
+        assert percent == round(used * 100 / target)
+
+
+def test_update_rows_caps_capacity_percent(store):
+    row_id = int(store.ids[0])
+    store.update_rows([row_id], capacity_used=[2_000_000], capacity_target=[1])
+    assert store.record(row_id, ('capacity_percent',))['capacity_percent'] == MAX_CAPACITY_PERCENT
+
+
+def test_fingerprint_tracks_source_and_content(columns, store):
+    assert CapacityStore(columns, 'demo').fingerprint == store.fingerprint
+    assert CapacityStore(columns, 'other').fingerprint != store.fingerprint
+    columns['capacity_target'] = np.asarray(columns['capacity_target']).copy()
+    columns['capacity_target'][0] += 1
+    assert CapacityStore(columns, 'demo').fingerprint != store.fingerprint
+
+
+def test_fingerprint_ignores_updates(store):
+    fingerprint = store.fingerprint
+    store.update_rows([int(store.ids[0])], capacity_target=[1])
+    assert store.fingerprint == fingerprint
+
+
+def test_sync_changes_replays_the_change_log(store, change_log):
+    ids = store.ids[[0, 1]]
+    change_log.append(store.fingerprint, 'test', ids, capacity_target=np.array([11, 12], dtype=np.int32))
+    change_log.append('elsewhere', 'test', ids, capacity_target=np.array([99, 99], dtype=np.int32))
+
+    assert sync_changes(store, force=True) == 1
+    assert store.numeric['capacity_target'][:2].tolist() == [11, 12]
+    assert store.change_seq == 1
+    assert sync_changes(store, force=True) == 0
+
+    # Another worker's copy of the same base data catches up with the same batches
+    other = CapacityStore(generate_demo_columns(), 'demo')
+    assert sync_changes(other, force=True) == 1
+    assert other.numeric['capacity_target'][:2].tolist() == [11, 12]
+
+
+def test_logged_changes(store, change_log):
+    change_log.append(store.fingerprint, 'test', store.ids[[1, 2]], capacity_target=np.array([5, 6]))
+    change_log.append(store.fingerprint, 'test', store.ids[[2, 9]], pacing_percent=np.array([1, 2]))
+    change_log.append('other data', 'test', store.ids[[4]], pacing_percent=np.array([1]))
+
+    # Only batches the store has applied count
+    rows, columns = logged_changes(store, 0)
+    assert (len(rows), columns) == (0, ())
+    sync_changes(store, force=True)
+    rows, columns = logged_changes(store, 0)
+    assert rows.tolist() == [1, 2, 9]
+    assert columns == ('capacity_target', 'pacing_percent')
+    rows, columns = logged_changes(store, 1)
+    assert rows.tolist() == [2, 9] and columns == ('pacing_percent',)
+
+
+def test_logged_changes_past_the_retention(store, change_log, monkeypatch):
+    change_log.append(store.fingerprint, 'test', store.ids[[1]], capacity_target=np.array([5]))
+    monkeypatch.setattr('services.store.change_log.CHANGE_RETENTION', -1)
+    change_log.append(store.fingerprint, 'test', store.ids[[2]], capacity_target=np.array([6]))
+    sync_changes(store, force=True)
+    assert change_log.trimmed_seq() == 2
+    # Seqs from before the trim call for a reload
+    assert logged_changes(store, 0) == (None, None)
+    assert len(logged_changes(store, 2)[0]) == 0
+
+
+def test_dictionary_holds_only_used_codes(store):
+    rows = np.array([0, 1])
+    dictionary = store.dictionary(rows)
+    for name, entries in dictionary.items():
+        column = store.categorical[name]
+        assert set(entries) == set(column.codes[rows].tolist())
+        assert all(column.categories[code] == value for code, value in entries.items())
@@ -0,0 +1,54 @@
+import sqlite3
+
+import numpy as np
+
+from services.store.change_log import ChangeLog
+
+
+def test_append_and_since(change_log):
+    first = change_log.append('a', 'edit', [1, 2], capacity_target=np.array([10, 20]))
+    seqs = change_log.append_many('a', 'import', [([3], {'capacity_used': np.array([5])}),
+                                                  ([4], {'capacity_target': np.array([6])})])
+    assert seqs == [first + 1, first + 2]
+    assert change_log.last_seq() == first + 2
+
+    batches = list(change_log.since(first, 'a'))
+    assert [seq for seq, _, _ in batches] == seqs
+    seq, ids, values = batches[0]
+    assert ids.tolist() == [3]
+    assert list(values) == ['capacity_used'] and values['capacity_used'].tolist() == [5]
+
+
+def test_since_filters_by_fingerprint(change_log):
+    change_log.append('a', 'edit', [1], capacity_target=np.array([10]))
+    change_log.append('b', 'edit', [1], capacity_target=np.array([20]))
+    assert [values['capacity_target'].tolist() for _, _, values in change_log.since(0, 'b')] == [[20]]
+
+
+def test_reset_drops_other_fingerprints(change_log):
+    change_log.append('a', 'edit', [1], capacity_target=np.array([10]))
+    change_log.append('b', 'edit', [1], capacity_target=np.array([20]))
+    assert change_log.reset('b') == 1
+    assert list(change_log.since(0, 'a')) == []
+    assert len(list(change_log.since(0, 'b'))) == 1
+
+
+def test_append_many_is_atomic(change_log):
+    batches = [([1], {'capacity_target': np.array([10])}), (['not an id'], {'capacity_target': np.array([20])})]
+    try:
+        change_log.append_many('a', 'edit', batches)
+    except Exception:
+        pass
+    assert change_log.last_seq() == 0
+
+
+def test_log_without_fingerprints_is_dropped(tmp_path):
+    path = str(tmp_path / 'changes.sqlite3')
+    with sqlite3.connect(path) as db:
+        db.execute('CREATE TABLE changes (seq INTEGER PRIMARY KEY, source TEXT, columns TEXT, payload BLOB, '
+                   'created_at REAL)')
+        db.execute("INSERT INTO changes VALUES (1, 'edit', '[]', x'', 0)")
+    log = ChangeLog(path)
+    assert log.last_seq() == 0
+    log.append('a', 'edit', [1], capacity_target=np.array([10]))
+    assert log.last_seq() == 1
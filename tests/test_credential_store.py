@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+
+import pytest
+
+from services.auth import credential_store
+from services.auth.credential_store import (LOGIN_BUSY, LOGIN_INVALID, LOGIN_OK, CredentialBackend, add_user,
+                                            load_users)
+
+
+@pytest.fixture(scope='module')
+def users(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('users') / 'users.json')
+    add_user('Ana@Example.com', 'Ana', 'secret', path)
+    return load_users(path)
+
+
+def test_users_are_keyed_by_lower_case_email(users):
+    assert list(users) == ['ana@example.com']
+    assert users['ana@example.com']['password_hash'] != 'secret'
+
+
+def test_verify(users):
+    backend = CredentialBackend(users, workers=1)
+    outcome, user = backend.verify(' ANA@example.com ', 'secret')
+    assert outcome == LOGIN_OK and user['name'] == 'Ana'
+    assert backend.verify('ana@example.com', 'wrong') == (LOGIN_INVALID, None)
+    assert backend.verify('bob@example.com', 'secret') == (LOGIN_INVALID, None)
+    stats = backend.stats()
+    assert (stats[LOGIN_OK], stats[LOGIN_INVALID], stats['queue_depth']) == (1, 2, 0)
+    assert 'latency_p95_ms' in stats
+
+
+def test_full_queue_fails_fast(users):
+    backend = CredentialBackend(users, workers=1, queue_limit=0)
+    assert backend.verify('ana@example.com', 'secret') == (LOGIN_BUSY, None)
+    assert backend.stats()[LOGIN_BUSY] == 1
+
+
+def test_timed_out_check_stays_counted_until_it_finishes(users):
+    backend = CredentialBackend(users, workers=1)
+    release = threading.Event()
+    check = backend._check
+    backend._check = lambda email, password: release.wait() and check(email, password)
+
+    assert backend.verify('ana@example.com', 'secret', timeout=0.01) == (LOGIN_BUSY, None)
+    assert backend.stats()['queue_depth'] == 1
+    release.set()
+    backend._executor.shutdown(wait=True)
+    assert backend.stats()['queue_depth'] == 0
+
+
+def test_logins_past_the_queue_limit_do_not_wait(users):
+    backend = CredentialBackend(users, workers=1, queue_limit=1)
+    release = threading.Event()
+    backend._check = lambda email, password: release.wait()
+
+    assert backend.verify('ana@example.com', 'secret', timeout=0.01) == (LOGIN_BUSY, None)
+    start = time.perf_counter()
+    assert backend.verify('ana@example.com', 'secret', timeout=5) == (LOGIN_BUSY, None)
+    assert time.perf_counter() - start < 1
+    release.set()
+    backend._executor.shutdown(wait=True)
+
+
+def test_queue_leaves_a_request_thread_free():
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+    assert credential_store.LOGIN_QUEUE_LIMIT < threads or threads == 1
+    assert credential_store.LOGIN_TIMEOUT <= 2
@@ -0,0 +1,29 @@
+import plotly.graph_objects as go
+
+from services.figures.figure_cache import FigureCache, view_key
+
+
+def build():
+    build.calls += 1
+    return go.Figure(go.Bar(x=[], y=[], marker_color='red'), layout={'title': 'Capacity'})
+
+
+build.calls = 0
+
+
+def test_skeleton_is_built_once_per_name():
+    cache = FigureCache()
+    first = cache.figure('bar', build, view_key('a', 1), lambda: {'x': ['A'], 'y': [1]})
+    second = cache.figure('bar', build, view_key('a', 2), lambda: {'x': ['B'], 'y': [2]})
+    assert build.calls == 1
+    assert first['data'][0]['x'] == ['A'] and second['data'][0]['x'] == ['B']
+    assert first['data'][0]['marker'] == {'color': 'red'}
+    assert first['layout'] is second['layout']
+
+
+def test_figures_are_kept_in_an_lru():
+    cache = FigureCache(maxsize=2)
+    figures = [cache.figure('bar', build, key, lambda: {'y': [key]}) for key in ('a', 'b')]
+    assert cache.figure('bar', build, 'a', lambda: {'y': ['new']}) is figures[0]
+    cache.figure('bar', build, 'c', lambda: {'y': ['c']})
+    assert cache.figure('bar', build, 'b', lambda: {'y': ['new']})['data'][0]['y'] == ['new']
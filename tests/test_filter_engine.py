@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from services.filters import filter_engine
+from services.filters.filter_engine import FilterEngine
+
+
+def naive_select(store, selection):
+    mask = np.ones(len(store), dtype=bool)
+    for name, values in selection.items():
+        if values:
+            mask &= np.isin(np.asarray(store.categorical[name].decode()), values)
+    return np.flatnonzero(mask)
+
+
+@pytest.fixture(params=[False, True], ids=['dense', 'sparse'])
+def engine(request, store, monkeypatch):
+    if request.param:
+        # Posting lists instead of bitmaps for every dimension
+        monkeypatch.setattr(filter_engine, 'DENSE_BITMAP_BUDGET', 0)
+    return FilterEngine(store)
+
+
+def test_select_matches_naive_mask(engine, store):
+    categories = {name: store.categorical[name].categories for name in filter_engine.FILTER_DIMENSIONS}
+    selections = [
+        {},
+        {'cycle': [categories['cycle'][0]]},
+        {'cycle': categories['cycle'][:3], 'activity': categories['activity'][1:3]},
+        {'tm_area': [categories['tm_area'][0]], 'tm_territory': categories['tm_territory'][:40]},
+        {'tm_region': categories['tm_region'][2:5], 'activity': [], 'cycle': [categories['cycle'][-1]]},
+    ]
+    for selection in selections:
+        np.testing.assert_array_equal(engine.select(selection), naive_select(store, selection))
+
+
+def test_unknown_values_match_nothing(engine, store):
+    assert len(engine.select({'cycle': ['No such cycle']})) == 0
+    cycle = store.categorical['cycle'].categories[0]
+    np.testing.assert_array_equal(engine.select({'cycle': [cycle, 'No such cycle']}),
+                                  naive_select(store, {'cycle': [cycle]}))
+
+
+def test_results_are_cached_by_selection(engine, store):
+    cycles = store.categorical['cycle'].categories
+    first = engine.select({'cycle': cycles[:2]})
+    assert engine.select({'cycle': cycles[1::-1], 'activity': []}) is first
+    assert not first.flags.writeable
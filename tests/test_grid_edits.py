@@ -0,0 +1,47 @@
+from components.grid.grid_edits import MAX_BATCH_EDITS, apply_edit_batch, validate_edits
+
+
+def edit(row_id, value, field='capacity_target'):
+    return {'id': row_id, 'field': field, 'value': value}
+
+
+def test_validate_edits(store):
+    a, b, c = store.ids[:3].tolist()
+    updates, rejected = validate_edits(store, [
+        edit(a, '250'), edit(b, 0), edit(c, 12.5), edit(-1, 10), edit('x', 10),
+        edit(a, 300), edit(c, 7), edit(b, 5, field='capacity_used'),
+    ])
+    # Later edits win, an accepted edit clears an earlier rejection and unknown rows are dropped
+    assert updates == {'capacity_target': {a: 300, c: 7}}
+    assert rejected == {b}
+
+
+def test_validate_edits_rejects_out_of_range(store):
+    row_id = int(store.ids[0])
+    for value in (None, 'abc', float('nan'), float('inf'), 2 ** 31, -3):
+        assert validate_edits(store, [edit(row_id, value)]) == ({}, {row_id})
+
+
+def test_batches_are_capped(store):
+    row_id = int(store.ids[0])
+    edits = [edit(row_id, 1)] * MAX_BATCH_EDITS + [edit(row_id, 2)]
+    assert validate_edits(store, edits)[0] == {'capacity_target': {row_id: 1}}
+
+
+def test_apply_edit_batch(store, change_log):
+    a, b = store.ids[:2].tolist()
+    used = int(store.numeric['capacity_used'][0])
+    original = int(store.numeric['capacity_target'][1])
+    transaction, applied, rejected = apply_edit_batch(store, [edit(a, used * 2), edit(b, 0)], 'edit')
+
+    assert (applied, rejected) == (1, 1)
+    assert change_log.last_seq() == 1
+    rows = {row['id']: row for row in transaction['update']}
+    assert rows[a]['capacity_target'] == used * 2 and rows[a]['capacity_percent'] == 50
+    assert rows[b]['capacity_target'] == original
+
+
+def test_rejected_batch_logs_nothing(store, change_log):
+    apply_edit_batch(store, [edit(int(store.ids[0]), -1)], 'edit')
+    assert change_log.last_seq() == 0
+    assert store.version == 0
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from components.grid.grid_export import export_view
+
+
+def test_export_view(store):
+    filters = [['Trade Planning'], None, None, None, None, None]
+    view = {'filters': filters, 'filterModel': {'capacity_percent': {'type': 'greaterThan', 'filter': 80}},
+            'sortModel': [{'colId': 'tm_area', 'sort': 'desc'}]}
+    assert export_view(store, json.dumps(view)) == (filters, view['filterModel'], view['sortModel'])
+    assert export_view(store, None) == ([None] * 6, {}, [])
+
+
+@pytest.mark.parametrize('view', [
+    '[]',
+    '{"filters": {"activity": []}}',
+    '{"filters": [[], []]}',
+    '{"filters": [[{}], null, null, null, null, null]}',
+    '{"filterModel": []}',
+    '{"filterModel": {"tm_area": "Area 1"}}',
+    '{"filterModel": {"tm_area": {"operator": "OR", "conditions": {}}}}',
+    '{"filterModel": {"capacity_percent": {"type": "greaterThan", "filter": "80"}}}',
+    '{"sortModel": {"colId": "id"}}',
+    '{"sortModel": [{"colId": ["id"]}]}',
+    'not json',
+])
+def test_malformed_export_views(store, view):
+    with pytest.raises(ValueError):
+        export_view(store, view)
@@ -0,0 +1,136 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from components.grid.grid_query import MAX_DELTA_ROWS, data_version, get_rows_block, get_rows_delta
+from services.activity.activity_store import ActivityStore
+from services.hierarchy.hierarchy_index import HierarchyIndex
+from services.store import change_log as change_log_module
+from services.store.capacity_store import GRID_COLUMNS, CapacityStore, sync_changes
+from services.store.change_log import get_change_log
+from services.store.demo_data import generate_demo_columns
+
+
+def decode(block):
+    """Row dicts of a block, as static/dashAgGridFunctions.js rebuilds them"""
+    dictionary = block['dictionary']
+    rows = [dict(zip(block['columns'], values)) for values in zip(*block['columns'].values())]
+    for row in rows:
+        for name, entries in dictionary.items():
+            row[name] = entries[row[name]]
+    return rows
+
+
+def test_block_round_trips_the_records(store):
+    block = get_rows_block(store, {'startRow': 10, 'endRow': 30})
+    assert block['rowCount'] == len(store)
+    assert list(block['columns']) == list(GRID_COLUMNS)
+    assert decode(block) == store.records(np.arange(10, 30))
+
+
+def test_block_filter_and_sort(store):
+    area = store.categorical['tm_area'].categories[0]
+    request = {
+        'startRow': 0, 'endRow': 100,
+        'filterModel': {'tm_area': {'type': 'equals', 'filter': area.lower()},
+                        'capacity_percent': {'type': 'greaterThan', 'filter': 50}},
+        'sortModel': [{'colId': 'capacity_percent', 'sort': 'desc'}, {'colId': 'id', 'sort': 'asc'}],
+    }
+    block = get_rows_block(store, request)
+    records = store.records()
+    expected = sorted((r for r in records if r['tm_area'] == area and r['capacity_percent'] > 50),
+                      key=lambda r: (-r['capacity_percent'], r['id']))
+    assert block['rowCount'] == len(expected)
+    assert decode(block) == expected[:100]
+
+
+def test_block_within_rows(store):
+    rows = np.array([4, 8, 15])
+    block = get_rows_block(store, {'startRow': 0, 'endRow': 50}, rows)
+    assert block['rowCount'] == 3
+    assert block['columns']['id'] == store.ids[rows].tolist()
+
+
+def log_update(store, ids, **values):
+    """Update rows the way edits and imports do: through the change log, then replayed"""
+    get_change_log().append(store.fingerprint, 'test', ids, **{name: np.asarray(v) for name, v in values.items()})
+    sync_changes(store, force=True)
+
+
+@pytest.fixture
+def worker(store, change_log):
+    """A worker's capacity store and activity store"""
+    return store, ActivityStore(store, HierarchyIndex(store))
+
+
+@pytest.fixture
+def other_worker(columns, change_log):
+    store = CapacityStore({name: np.copy(values) for name, values in generate_demo_columns().items()}, 'demo')
+    return store, ActivityStore(store, HierarchyIndex(store))
+
+
+def test_delta(worker):
+    store, activity = worker
+    version = data_version(store, activity)
+    log_update(store, store.ids[[1, 7]], capacity_used=[5, 6])
+    current, delta = get_rows_delta(store, activity, version)
+    assert current == data_version(store, activity) != version
+    # capacity_used is not a grid column; the capacity % derived from it is
+    assert delta['changed'] == ['capacity_percent']
+    assert decode(delta) == store.records(np.array([1, 7]))
+
+    # Changes outside the grid's rows send nothing
+    assert get_rows_delta(store, activity, version, np.array([2, 3]))[1] is None
+    assert get_rows_delta(store, activity, current)[1] is None
+
+    # A new target changes the row's capacity % and pacing
+    log_update(store, store.ids[[2]], capacity_target=[9])
+    assert get_rows_delta(store, activity, current)[1]['changed'] == ['capacity_percent', 'pacing_percent']
+
+
+def test_delta_of_landed_activity(worker):
+    store, activity = worker
+    version = data_version(store, activity)
+    activity.ingest([(datetime.date(2024, 3, 4), store.ids[[3, 4]], [5, 5])], stamp=1000)
+    current, delta = get_rows_delta(store, activity, version)
+    assert current[2] == 1000
+    assert delta['changed'] == ['pacing_percent']
+    assert delta['columns']['id'] == store.ids[[3, 4]].tolist()
+
+
+def test_versions_hold_across_workers(worker, other_worker):
+    store, activity = worker
+    other, other_activity = other_worker
+    version = data_version(store, activity)
+    # An unchanged tick on another worker sends nothing
+    assert get_rows_delta(other, other_activity, version) == (version, None)
+
+    log_update(store, store.ids[[1]], capacity_target=[50])
+    ahead = data_version(store, activity)
+    # The other worker has not replayed the batch yet: the client keeps its version
+    other._last_sync = float('inf')
+    assert get_rows_delta(other, other_activity, ahead) == (ahead, None)
+    # Once it has, a client from before the batch catches up there
+    sync_changes(other, force=True)
+    current, delta = get_rows_delta(other, other_activity, version)
+    assert current == ahead
+    assert decode(delta) == other.records(np.array([1])) == store.records(np.array([1]))
+
+
+def test_delta_asks_for_a_reload(worker):
+    store, activity = worker
+    version = data_version(store, activity)
+    log_update(store, store.ids[:MAX_DELTA_ROWS + 1], capacity_used=np.ones(MAX_DELTA_ROWS + 1, dtype=np.int32))
+    assert get_rows_delta(store, activity, version)[1] == {'refresh': True}
+    assert get_rows_delta(store, activity, ['other data', 0, 0.0])[1] == {'refresh': True}
+    assert get_rows_delta(store, activity, ['instance', 3])[1] == {'refresh': True}
+
+
+def test_delta_after_the_log_was_trimmed(worker, monkeypatch):
+    store, activity = worker
+    version = data_version(store, activity)
+    log_update(store, store.ids[[1]], capacity_used=[5])
+    monkeypatch.setattr(change_log_module, 'CHANGE_RETENTION', -1)
+    log_update(store, store.ids[[2]], capacity_used=[6])
+    assert get_rows_delta(store, activity, version)[1] == {'refresh': True}
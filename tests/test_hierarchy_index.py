@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from services.hierarchy.hierarchy_index import LEVELS, HierarchyIndex
+
+
+@pytest.fixture
+def index(store):
+    return HierarchyIndex(store)
+
+
+@pytest.fixture
+def labels(store):
+    return {level: np.asarray(store.categorical[level].decode()) for level in LEVELS}
+
+
+def test_nothing_selected(index, labels):
+    result = index.resolve({}, with_rows=True)
+    assert result['rows'] is None
+    assert 'rows' not in index.resolve({})
+    for level in LEVELS:
+        assert result['options'][level] == sorted(set(labels[level]))
+        assert result['values'][level] == []
+
+
+def test_options_cascade_from_the_selection(index, labels):
+    area = labels['tm_area'][0]
+    result = index.resolve({'tm_area': [area]}, with_rows=True)
+    under = labels['tm_area'] == area
+    for level in LEVELS[1:]:
+        assert result['options'][level] == sorted(set(labels[level][under]))
+    np.testing.assert_array_equal(result['rows'], np.flatnonzero(under))
+
+
+def test_rows_follow_the_deepest_selected_level(index, labels):
+    area = labels['tm_area'][0]
+    regions = sorted(set(labels['tm_region'][labels['tm_area'] == area]))[:2]
+    result = index.resolve({'tm_area': [area], 'tm_region': regions}, with_rows=True)
+    assert result['values']['tm_region'] == regions
+    np.testing.assert_array_equal(result['rows'], np.flatnonzero(np.isin(labels['tm_region'], regions)))
+
+
+def test_values_outside_the_levels_above_are_dropped(index, labels):
+    area = labels['tm_area'][0]
+    elsewhere = labels['tm_region'][labels['tm_area'] != area][0]
+    result = index.resolve({'tm_area': [area], 'tm_region': [elsewhere, 'No such region']}, with_rows=True)
+    assert result['values']['tm_region'] == []
+    np.testing.assert_array_equal(result['rows'], np.flatnonzero(labels['tm_area'] == area))
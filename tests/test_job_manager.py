@@ -0,0 +1,81 @@
+import pytest
+
+from services.jobs import job_manager
+from services.jobs.job_manager import (JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_QUEUED, JobStore, _run_job,
+                                       job_key)
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+
+def counting_job(progress, n):
+    for i in range(n):
+        progress((i + 1) / n, f'step {i + 1}', {'done': i + 1})
+    return {'total': n}
+
+
+def failing_job(progress):
+    raise RuntimeError('boom')
+
+
+def test_job_key_depends_on_parameters():
+    assert job_key('import', 'a') == job_key('import', 'a')
+    assert job_key('import', 'a') != job_key('import', 'b')
+
+
+def test_identical_submissions_share_a_job(jobs):
+    assert jobs.claim('j', 'test')
+    assert not jobs.claim('j', 'test')
+    assert jobs.get('j')['status'] == JOB_QUEUED
+
+
+def test_run_job_records_progress_and_result(jobs):
+    jobs.claim('j', 'test')
+    _run_job(jobs.path, 'j', counting_job, (3,))
+    status = jobs.get('j')
+    assert (status['status'], status['progress'], status['result']) == (JOB_DONE, 1, {'total': 3})
+    assert status['message'] == 'step 3' and status['detail'] == {'done': 3}
+    # A fresh result is reused
+    assert not jobs.claim('j', 'test')
+
+
+def test_run_job_records_failures(jobs):
+    jobs.claim('j', 'test')
+    _run_job(jobs.path, 'j', failing_job, ())
+    status = jobs.get('j')
+    assert status['status'] == JOB_FAILED and status['error'] == 'RuntimeError: boom'
+    assert jobs.claim('j', 'test')
+
+
+def test_cancelled_jobs(jobs):
+    jobs.claim('queued', 'test')
+    jobs.cancel('queued')
+    assert jobs.get('queued')['status'] == JOB_CANCELLED
+    assert not jobs.start('queued')
+
+    jobs.claim('running', 'test')
+    assert jobs.start('running')
+    jobs.cancel('running')
+    assert jobs.report('running', 0.5)
+
+
+def test_cancel_stops_a_running_job(jobs):
+    def cancelling_job(progress):
+        jobs.cancel('j')
+        progress(0.5)
+        return 'not reached'
+
+    jobs.claim('j', 'test')
+    _run_job(jobs.path, 'j', cancelling_job, ())
+    assert jobs.get('j')['status'] == JOB_CANCELLED
+
+
+def test_silent_jobs_are_reported_failed(jobs, monkeypatch):
+    jobs.claim('j', 'test')
+    jobs.start('j')
+    now = job_manager.time.time()
+    monkeypatch.setattr(job_manager.time, 'time', lambda: now + job_manager.JOB_STALE_AFTER + 1)
+    assert jobs.get('j')['status'] == JOB_FAILED
+    assert jobs.claim('j', 'test')
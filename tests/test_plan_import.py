@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.imports import plan_import
+from services.imports.plan_import import (MAX_PLANNED, MAX_TARGET, _normalize_header, import_plan_job,
+                                          plan_index, save_upload, upload_path, validate_chunk)
+from services.store.capacity_store import CapacityStore, sync_changes
+
+
+@pytest.fixture
+def index(store):
+    return plan_index(store)
+
+
+def plan_rows(store, rows):
+    """Plan file lines (cycle, activity, territory) of store row positions"""
+    records = store.records(np.asarray(rows), ('cycle', 'activity', 'tm_territory'))
+    return [[r['cycle'], r['activity'], r['tm_territory']] for r in records]
+
+
+def chunk(lines, target=True):
+    header = ['Cycle', 'Activity', 'Territory', 'Planned Activity'] + (['Target'] if target else [])
+    return pd.DataFrame([[str(v) for v in line] for line in lines], columns=header)
+
+
+def validate(frame, index):
+    return validate_chunk(frame, _normalize_header(frame.columns), index, 2)
+
+
+def test_valid_rows(store, index):
+    lines = [line + [p, t] for line, p, t in zip(plan_rows(store, [0, 5]), ['120', ' 80 '], ['200', ''])]
+    ids, planned, target, errors = validate(chunk(lines), index)
+    assert errors == []
+    assert ids.tolist() == store.ids[[0, 5]].tolist()
+    assert planned.tolist() == [120, 80]
+    assert target[0] == 200 and np.isnan(target[1])
+
+
+def test_invalid_rows_are_reported_by_line(store, index):
+    good = plan_rows(store, [0])[0]
+    cycle, activity, territory = good
+    lines = [
+        [cycle, activity, 'TM - Nowhere', '1', ''],
+        [cycle, 'Juggling', territory, '1', ''],
+        ['Cycle 99', activity, territory, '1', ''],
+        good + ['1.5', ''],
+        good + ['-1', ''],
+        good + [str(MAX_PLANNED + 1), ''],
+        good + ['1', '0'],
+        good + ['1', str(MAX_TARGET + 1)],
+        good + [str(MAX_PLANNED), '1'],
+        good + ['10', '20'],
+    ]
+    ids, _, _, errors = validate(chunk(lines), index)
+    assert ids.tolist() == [store.ids[0]]
+    assert [line for line, _ in errors] == list(range(2, 11))
+    messages = [message for _, message in errors]
+    assert 'not in the hierarchy' in messages[0]
+    assert 'Unknown activity' in messages[1]
+    assert 'Unknown cycle' in messages[2]
+    assert all('Planned activity' in m and 'whole number' in m for m in messages[3:6])
+    assert all(m.startswith("Target '") for m in messages[6:8])
+    assert 'above the largest capacity' in messages[8]
+
+
+def test_unplanned_combination(columns, store):
+    # Same categories, without the first row's (cycle, activity, territory)
+    partial = CapacityStore({name: np.asarray(values)[1:] for name, values in columns.items()})
+    _, _, _, errors = validate(chunk([plan_rows(store, [0])[0] + ['1', '']]), plan_index(partial))
+    assert 'is not planned for' in errors[0][1]
+
+
+def test_missing_columns():
+    with pytest.raises(ValueError, match='Missing column: planned'):
+        _normalize_header(['Cycle', 'Activity', 'Territory'])
+
+
+def test_upload_ids_stay_in_the_upload_folder():
+    for upload_id in ('../etc/passwd', 'abc.csv', None):
+        with pytest.raises(ValueError):
+            upload_path(upload_id)
+
+
+def test_import_job_logs_valid_rows(store, index, change_log, tmp_path, monkeypatch):
+    monkeypatch.setattr(plan_import, 'UPLOAD_DIR', str(tmp_path))
+    lines = [line + [p, t] for line, p, t in zip(plan_rows(store, [0, 1, 2]), ['10', '20', 'x'], ['', '40', ''])]
+    body = chunk(lines).to_csv(index=False).encode()
+    with open(tmp_path / 'plan.csv', 'wb') as f:
+        f.write(body)
+    with open(tmp_path / 'plan.csv', 'rb') as f:
+        upload = save_upload(f, 'plan.csv')
+
+    reports = []
+    result = import_plan_job(lambda *args: reports.append(args), upload['upload_id'], index, 'import')
+    assert (result['rows'], result['applied'], result['error_count']) == (3, 2, 1)
+    assert result['errors'][0][0] == 4
+    assert reports[-1][0] == 1.0
+
+    sync_changes(store, force=True)
+    assert store.numeric['capacity_used'][:2].tolist() == [10, 20]
+    assert store.numeric['capacity_target'][1] == 40
+    assert store.numeric['capacity_percent'][1] == 50
+
+
+def test_xlsx_chunks(store, tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Cycle', 'Activity', 'Territory', 'Planned'])
+    for line in plan_rows(store, [0, 1]):
+        sheet.append(line + [7])
+    path = str(tmp_path / 'plan.xlsx')
+    workbook.save(path)
+
+    frames = [frame for frame, _ in plan_import.read_chunks(path)]
+    assert len(frames) == 1 and frames[0]['Planned'].tolist() == ['7', '7']
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from services.repository.repository import Repository
+from services.store.capacity_store import CapacityStore, load_capacity_store
+from services.store.demo_data import generate_demo_columns
+
+
+@pytest.fixture
+def columns():
+    return generate_demo_columns()
+
+
+@pytest.fixture
+def url(tmp_path):
+    return f'sqlite:///{tmp_path / "repository.sqlite3"}'
+
+
+def test_save_and_load_round_trip(columns, url):
+    repository = Repository(url)
+    assert repository.save_columns(columns) == len(columns['id'])
+
+    loaded = repository.load_columns()
+    assert set(loaded) == set(columns)
+    for name, values in columns.items():
+        np.testing.assert_array_equal(loaded[name], np.asarray(values).astype(loaded[name].dtype), err_msg=name)
+
+
+def test_save_upserts_existing_rows(columns, url):
+    repository = Repository(url)
+    repository.save_columns(columns)
+
+    columns['capacity_target'] = np.asarray(columns['capacity_target']) + 10
+    assert repository.save_columns(columns) == len(columns['id'])
+
+    loaded = repository.load_columns()
+    assert len(loaded['id']) == len(columns['id'])
+    np.testing.assert_array_equal(loaded['capacity_target'], columns['capacity_target'])
+
+
+def test_store_loaded_from_database_matches_source(columns, url):
+    Repository(url).save_columns(columns)
+    expected = CapacityStore(columns)
+    store = load_capacity_store(url)
+
+    np.testing.assert_array_equal(store.ids, expected.ids)
+    assert store.records() == expected.records()
+    for level in ('tm_area', 'tm_territory', 'cycle'):
+        assert store.capacity_by(level) == expected.capacity_by(level)
+
+
+def test_unsupported_url():
+    with pytest.raises(ValueError):
+        Repository('mysql://localhost/reynolds')
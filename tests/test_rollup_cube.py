@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from conftest import random_updates
+from services.rollup.rollup_cube import CUBE_LEVELS, RollupCube
+
+
+def naive_cell(store, level, node, cycle=None, activity=None):
+    mask = np.asarray(store.categorical[level].decode()) == node
+    if cycle is not None:
+        mask &= np.asarray(store.categorical['cycle'].decode()) == cycle
+    if activity is not None:
+        mask &= np.asarray(store.categorical['activity'].decode()) == activity
+    return int(store.numeric['capacity_used'][mask].sum()), int(store.numeric['capacity_target'][mask].sum())
+
+
+@pytest.fixture
+def cube(store):
+    return RollupCube(store)
+
+
+def test_cells_match_a_scan(cube, store):
+    cycle = store.categorical['cycle'].categories[2]
+    activity = store.categorical['activity'].categories[1]
+    for level in CUBE_LEVELS:
+        node = store.categorical[level].categories[0]
+        for slice_ in ((None, None), (cycle, None), (None, activity), (cycle, activity)):
+            assert cube.cell(level, node, *slice_)[:2] == naive_cell(store, level, node, *slice_)
+
+
+def test_path_walks_up_the_hierarchy(cube, store):
+    record = store.records(np.array([0]))[0]
+    path = cube.path(record['tm_territory'])
+    assert [path[level][0] for level in CUBE_LEVELS] == [record[level] for level in CUBE_LEVELS]
+
+
+def test_level_totals_under_a_parent(cube, store):
+    area = store.categorical['tm_area'].categories[0]
+    names, used, target, percents = cube.level_totals('tm_region', parent=area)
+    areas = np.asarray(store.categorical['tm_area'].decode())
+    regions = np.asarray(store.categorical['tm_region'].decode())
+    assert names == sorted(set(regions[areas == area]))
+    assert target == [naive_cell(store, 'tm_region', name)[1] for name in names]
+
+
+def test_incremental_updates_match_a_rebuild(cube, store):
+    for seed in range(5):
+        ids, used, target = random_updates(store, seed)
+        store.update_rows(ids, capacity_used=used, capacity_target=target)
+    store.update_rows(ids[:10], pacing_percent=np.zeros(10))
+
+    rebuilt = RollupCube(store)
+    for level in CUBE_LEVELS:
+        np.testing.assert_array_equal(cube.used[level], rebuilt.used[level])
+        np.testing.assert_array_equal(cube.target[level], rebuilt.target[level])
@@ -0,0 +1,35 @@
+import numpy as np
+
+from conftest import random_updates
+from services.filters.filter_engine import FilterEngine
+from services.rollup.rollup_engine import Rollup, RollupEngine
+
+
+def assert_same_totals(rollup, rebuilt):
+    np.testing.assert_allclose(rollup.used, rebuilt.used)
+    np.testing.assert_allclose(rollup.target, rebuilt.target)
+    assert rollup.by_state() == rebuilt.by_state()
+    assert rollup.by_area() == rebuilt.by_area()
+    assert rollup.state_view('area') == rebuilt.state_view('area')
+
+
+def test_by_state_matches_store_groupby(store):
+    rollup = Rollup.compute(store, np.arange(len(store)))
+    assert rollup.by_state() == store.capacity_by('state')
+    assert rollup.by_area() == store.capacity_by('tm_area')
+
+
+def test_incremental_updates_match_a_rebuild(store):
+    engine = RollupEngine(store, FilterEngine(store))
+    cycles = store.categorical['cycle'].categories
+    selections = [{}, {'cycle': cycles[:2]}, {'tm_area': [store.categorical['tm_area'].categories[1]]}]
+    rollups = [engine.rollup(selection) for selection in selections]
+
+    for seed in range(5):
+        ids, used, target = random_updates(store, seed)
+        store.update_rows(ids, capacity_used=used, capacity_target=target)
+        store.update_rows(ids[:20], pacing_percent=np.zeros(20))
+
+    for selection, rollup in zip(selections, rollups):
+        assert engine.rollup(selection) is rollup
+        assert_same_totals(rollup, Rollup.compute(store, rollup.rows))
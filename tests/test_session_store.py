@@ -0,0 +1,53 @@
+import pytest
+
+from services.session import session_store
+from services.session.session_store import SessionStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(session_store.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def sessions(tmp_path, clock):
+    return SessionStore(str(tmp_path / 'sessions.sqlite3'), ttl=100)
+
+
+def expires_at(sessions, sid):
+    return sessions._connect().execute('SELECT expires_at FROM sessions WHERE sid = ?', (sid,)).fetchone()[0]
+
+
+def test_create_get_delete(sessions):
+    sid = sessions.create({'email': 'a@example.com'})
+    assert sessions.get(sid) == {'email': 'a@example.com'}
+    sessions.delete(sid)
+    assert sessions.get(sid) is None
+    assert sessions.get(None) is None
+
+
+def test_reads_renew_only_past_half_the_ttl(sessions, clock):
+    sid = sessions.create({})
+    created = expires_at(sessions, sid)
+    clock[0] += 40
+    assert sessions.get(sid) == {}
+    assert expires_at(sessions, sid) == created
+
+    clock[0] += 20
+    sessions.get(sid)
+    assert expires_at(sessions, sid) == clock[0] + 100
+
+
+def test_sessions_expire_and_are_swept(sessions, clock):
+    sid = sessions.create({})
+    clock[0] += 101
+    assert sessions.get(sid) is None
+    sessions.sweep()
+    assert sessions._connect().execute('SELECT COUNT(*) FROM sessions').fetchone()[0] == 0
+
+
+def test_session_id():
+    assert session_store.session_id({'sid': 'abc'}) == 'abc'
+    assert session_store.session_id(None) is None
@@ -0,0 +1,61 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from services.activity.activity_store import ActivityStore
+from services.hierarchy.hierarchy_index import HierarchyIndex
+from services.territory.territory_detail import TerritoryDetails
+
+
+@pytest.fixture
+def details(store):
+    activity = ActivityStore(store, HierarchyIndex(store))
+    activity.ingest([(datetime.date(2024, 3, 4), store.ids, np.full(len(store), 3))])
+    return TerritoryDetails(store, activity, maxsize=4)
+
+
+def territory_rows(store, row):
+    codes = store.categorical['tm_territory'].codes
+    return np.flatnonzero(codes == codes[row])
+
+
+def test_for_row(details, store):
+    row_id = int(store.ids[0])
+    detail, record = details.for_row(row_id)
+    rows = territory_rows(store, 0)
+    assert record == store.record(row_id, tuple(record))
+    assert sorted(detail.records) == store.ids[rows].tolist()
+    assert detail.hierarchy['tm_territory'] == record['tm_territory']
+    assert len(detail.weeks) == 1 and len(detail.pacing[row_id]) == 1
+    assert details.for_row(-1) == (None, None)
+
+
+def test_capacity_trend_matches_a_scan(details, store):
+    detail, _ = details.for_row(int(store.ids[0]))
+    rows = territory_rows(store, 0)
+    cycles = np.asarray(store.categorical['cycle'].decode(rows))
+    used = store.numeric['capacity_used'][rows]
+    target = store.numeric['capacity_target'][rows]
+    assert detail.cycles == sorted(set(cycles))
+    assert detail.capacity[None] == [round(used[cycles == c].sum() * 100 / target[cycles == c].sum())
+                                     for c in detail.cycles]
+
+
+def test_details_are_cached_until_the_territory_changes(details, store):
+    first, _ = details.for_row(int(store.ids[0]))
+    assert details.for_row(int(store.ids[0]))[0] is first
+
+    other = int(np.flatnonzero(store.categorical['tm_territory'].codes != store.categorical['tm_territory'].codes[0])[0])
+    store.update_rows([int(store.ids[other])], capacity_target=[1])
+    assert details.for_row(int(store.ids[0]))[0] is first
+
+    store.update_rows([int(store.ids[0])], capacity_target=[1])
+    detail, record = details.for_row(int(store.ids[0]))
+    assert detail is not first
+    assert record['capacity_percent'] == store.numeric['capacity_percent'][0]
+
+
+def test_cache_is_bounded(details):
+    details.preload()
+    assert len(details._details) == 4